@@ -0,0 +1,438 @@
+"""
+Streaming bulk scorer for files of property records.
+
+Reads a JSONL, CSV, Excel (.xlsx, needs openpyxl) or Parquet file in fixed-size chunks,
+scores each chunk with one vectorized call and appends the results (input id, prediction,
+per-record error) to a JSONL, CSV or Parquet output as it goes, so memory stays constant
+regardless of file size.
+
+With --workers N, chunks are scored across a process pool. Workers are started with
+the model already loaded (forked copy-on-write from the parent, or loaded once per
+worker where fork is unavailable), BLAS/OpenMP are capped to one thread per worker,
+and results are written in input order.
+
+After every chunk a checkpoint (<output>.checkpoint.json) records how far the input
+and output got; --resume continues from there after a crash. --start-offset (JSONL,
+in bytes) and --start-row skip ahead explicitly.
+
+Usage (from the repo root):
+    python -m api.bulk_score listings.jsonl scored.jsonl --chunk-size 10000
+    python -m api.bulk_score listings.csv scored.parquet --id-field id
+    python -m api.bulk_score listings.jsonl scored.jsonl --resume
+    python -m api.bulk_score listings.jsonl scored.jsonl --workers 32
+"""
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .predict import BATCH_CHUNK_SIZE, check_record, predict_batch, registry
+
+FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet",
+           ".xlsx": "excel"}
+
+
+def file_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported file type {ext!r}, expected one of {sorted(FORMATS)}")
+    return FORMATS[ext]
+
+
+class Chunk:
+    """
+    Rows read from the input as (row number, record) pairs. JSONL records are kept as
+    raw lines and parsed where they are scored, so that work is spread over the workers.
+    """
+
+    def __init__(self, rows, end_offset=None):
+        self.rows = rows
+        self.end_offset = end_offset
+
+
+def iter_jsonl(path: str, chunk_size: int, start_offset: int = 0, start_row: int = 0):
+    """
+    Yield chunks of raw JSONL lines, tracking the byte offset after each chunk.
+    start_row is the row number at start_offset; without an offset, that many rows are skipped.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        skip = start_row if start_offset == 0 else 0
+        row, rows = start_row - skip, []
+        for line in f:
+            if not line.strip():
+                continue
+            if skip:
+                skip -= 1
+                row += 1
+                continue
+            rows.append((row, line))
+            row += 1
+            if len(rows) == chunk_size:
+                yield Chunk(rows, f.tell())
+                rows = []
+        if rows:
+            yield Chunk(rows, f.tell())
+
+
+def parse_record(raw):
+    """(record, error) for a raw JSONL line or an already parsed record."""
+    if isinstance(raw, dict):
+        return raw, None
+    try:
+        record = json.loads(raw)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return None, "Record is not a JSON object"
+    return record, None
+
+
+def iter_csv(path: str, chunk_size: int, start_row: int = 0):
+    import pandas as pd
+
+    row = start_row
+    reader = pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, start_row + 1))
+    for df in reader:
+        records = df.astype(object).where(df.notna(), None).to_dict("records")
+        yield Chunk([(row + i, record) for i, record in enumerate(records)])
+        row += len(records)
+
+
+def iter_parquet(path: str, chunk_size: int, start_row: int = 0):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    row, skip = 0, start_row
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            row += batch.num_rows
+            continue
+        records = batch.slice(skip).to_pylist()
+        row += skip
+        skip = 0
+        yield Chunk([(row + i, record) for i, record in enumerate(records)])
+        row += len(records)
+
+
+def _open_workbook(path: str):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx files needs the openpyxl package (see requirements.txt)")
+    # Read-only mode streams rows from the XML instead of building the whole sheet
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def iter_excel(path: str, chunk_size: int, start_row: int = 0):
+    """Chunks of the first worksheet; its first row holds the column names."""
+    workbook = _open_workbook(path)
+    try:
+        values = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) for name in next(values, ())]
+        row, rows = 0, []
+        for cells in values:
+            if all(cell is None for cell in cells):
+                continue
+            if row >= start_row:
+                rows.append((row, dict(zip(header, cells))))
+            row += 1
+            if len(rows) == chunk_size:
+                yield Chunk(rows)
+                rows = []
+        if rows:
+            yield Chunk(rows)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(path: str, chunk_size: int, start_offset: int = 0, start_row: int = 0):
+    fmt = file_format(path)
+    if fmt == "jsonl":
+        return iter_jsonl(path, chunk_size, start_offset, start_row)
+    if start_offset:
+        raise ValueError("--start-offset is only supported for JSONL input; use --start-row")
+    if fmt == "csv":
+        return iter_csv(path, chunk_size, start_row)
+    if fmt == "excel":
+        return iter_excel(path, chunk_size, start_row)
+    return iter_parquet(path, chunk_size, start_row)
+
+
+def count_rows(path: str):
+    """Number of records in an input file without parsing them (None if unknown)."""
+    fmt = file_format(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    if fmt == "excel":
+        workbook = _open_workbook(path)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        return None if max_row is None else max(max_row - 1, 0)
+    # Line count: an estimate if there are blank lines or quoted newlines in CSV fields
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    lines += last != b"\n"
+    return max(lines - 1, 0) if fmt == "csv" else lines
+
+
+def score_chunk(records: list, engine: str = None) -> list:
+    """
+    (prediction, error) per record. Records predict() would reject get their error up front,
+    so an invalid record neither fails the whole chunk nor gets a price imputed because its
+    neighbours have the column. The rest are scored in one vectorized call, then record by
+    record if that still fails.
+    """
+    errors = []
+    for record in records:
+        try:
+            check_record(record)
+            errors.append(None)
+        except ValueError as e:
+            errors.append(f"ValueError: {e}")
+    valid = [record for record, error in zip(records, errors) if error is None]
+
+    try:
+        scored = [(float(p), None) for p in predict_batch(valid, chunk_size=max(1, len(valid)), engine=engine)]
+    except Exception:
+        scored = []
+        for record in valid:
+            try:
+                scored.append((float(predict_batch([record], chunk_size=1, engine=engine)[0]), None))
+            except Exception as e:
+                scored.append((None, f"{type(e).__name__}: {e}"))
+    scored = iter(scored)
+    return [next(scored) if error is None else (None, error) for error in errors]
+
+
+def score_rows(rows: list, engine: str = None, id_field: str = "id") -> list:
+    """(id, prediction, error) for every (row number, record) of a chunk, in order."""
+    parsed = [parse_record(raw) for _, raw in rows]
+    valid = [record for record, error in parsed if error is None]
+    scored = iter(score_chunk(valid, engine) if valid else [])
+
+    results = []
+    for (row, _), (record, error) in zip(rows, parsed):
+        prediction = None
+        if error is None:
+            prediction, error = next(scored)
+        record_id = _json_id(record.get(id_field)) if record else None
+        results.append((record_id if record_id is not None else row, prediction, error))
+    return results
+
+
+# Kept alive for the lifetime of a worker process
+_worker_thread_limits = None
+
+
+def _init_worker(version: str = None):
+    """Process-pool initializer: one BLAS/OpenMP thread per worker, model loaded once."""
+    global _worker_thread_limits
+    from threadpoolctl import threadpool_limits
+
+    _worker_thread_limits = threadpool_limits(limits=1)
+    registry.get(version)
+
+
+def scored_chunks(chunks, engine: str = None, id_field: str = "id", workers: int = 1):
+    """Yield (chunk, scored rows) in input order, scoring in a process pool if workers > 1."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, score_rows(chunk.rows, engine, id_field)
+        return
+
+    # Load in the parent so forked workers share the model pages copy-on-write
+    registry.get()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        # Bounded window of in-flight chunks keeps memory constant and output ordered
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(score_rows, chunk.rows, engine, id_field)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def _json_id(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+class JsonlSink:
+    def __init__(self, path: str, append: bool = False, truncate_to: int = None):
+        if truncate_to is not None and os.path.exists(path):
+            # Drop anything written after the last checkpoint
+            with open(path, "r+b") as f:
+                f.truncate(truncate_to)
+        self.f = open(path, "ab" if append else "wb")
+
+    def write(self, results: list):
+        self.f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode())
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def position(self) -> int:
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+class CsvSink(JsonlSink):
+    """id,row,prediction,error rows; the header is written when the file is created."""
+
+    HEADER = ["id", "row", "prediction", "error"]
+
+    def __init__(self, path: str, append: bool = False, truncate_to: int = None):
+        super().__init__(path, append, truncate_to)
+        if self.f.tell() == 0:
+            self._write_rows([self.HEADER])
+
+    def write(self, results: list):
+        self._write_rows([[r[column] for column in self.HEADER] for r in results])
+
+    def _write_rows(self, rows):
+        import csv
+
+        text = io.StringIO()
+        csv.writer(text, lineterminator="\n").writerows(rows)
+        self.f.write(text.getvalue().encode())
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+
+class ParquetSink:
+    """Writes one row group per chunk. On resume, a new part file is started."""
+
+    def __init__(self, path: str, part: int = None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if part:
+            stem, ext = os.path.splitext(path)
+            path = f"{stem}.part-{part}{ext}"
+        self.path = path
+        self.pa = pa
+        self.schema = pa.schema([("id", pa.string()), ("row", pa.int64()),
+                                 ("prediction", pa.float64()), ("error", pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, results: list):
+        columns = {
+            "id": [None if r["id"] is None else str(r["id"]) for r in results],
+            "row": [r["row"] for r in results],
+            "prediction": [r["prediction"] for r in results],
+            "error": [r["error"] for r in results],
+        }
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def position(self):
+        return None
+
+    def close(self):
+        self.writer.close()
+
+
+def checkpoint_path(output: str) -> str:
+    return output + ".checkpoint.json"
+
+
+def run(input_path: str, output_path: str, chunk_size: int = BATCH_CHUNK_SIZE, id_field: str = "id",
+        start_offset: int = 0, start_row: int = 0, resume: bool = False, engine: str = None,
+        workers: int = 1, log=sys.stderr, progress=None) -> dict:
+    """
+    Score input_path into output_path; returns a summary with row counts and throughput.
+    progress(rows_done, errors) is called after every chunk.
+    """
+    output_format = file_format(output_path)
+    if output_format == "excel":
+        raise ValueError("Output must be .jsonl, .csv or .parquet")
+
+    truncate_to = None
+    if resume and os.path.exists(checkpoint_path(output_path)):
+        with open(checkpoint_path(output_path)) as f:
+            checkpoint = json.load(f)
+        if checkpoint["input"] != os.path.abspath(input_path):
+            raise ValueError(f"Checkpoint belongs to {checkpoint['input']}, not {input_path}")
+        start_offset, start_row = checkpoint["input_offset"] or 0, checkpoint["rows_done"]
+        truncate_to = checkpoint["output_bytes"]
+
+    if output_format in ("jsonl", "csv"):
+        sink = (JsonlSink if output_format == "jsonl" else CsvSink)(
+            output_path, append=bool(resume or start_offset or start_row), truncate_to=truncate_to)
+    else:
+        sink = ParquetSink(output_path, part=start_row if resume else None)
+
+    rows_done, errors, offset = start_row, 0, start_offset
+    start = time.perf_counter()
+    try:
+        chunks = iter_chunks(input_path, chunk_size, start_offset, start_row)
+        for chunk, scored in scored_chunks(chunks, engine, id_field, workers):
+            results = []
+            for (row, _), (record_id, prediction, error) in zip(chunk.rows, scored):
+                results.append({"id": record_id, "row": row, "prediction": prediction, "error": error})
+                errors += error is not None
+            sink.write(results)
+
+            rows_done = chunk.rows[-1][0] + 1
+            offset = chunk.end_offset
+            with open(checkpoint_path(output_path), "w") as f:
+                json.dump({"input": os.path.abspath(input_path), "input_offset": offset,
+                           "rows_done": rows_done, "output_bytes": sink.position()}, f)
+
+            elapsed = time.perf_counter() - start
+            print(f"{rows_done:,} rows scored ({(rows_done - start_row) / elapsed:,.0f} rows/s, "
+                  f"{errors:,} errors)", file=log)
+            if progress is not None:
+                progress(rows_done, errors)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows_done - start_row,
+        "errors": errors,
+        "seconds": elapsed,
+        "rows_per_second": (rows_done - start_row) / elapsed if elapsed else 0.0,
+        "input_offset": offset,
+        "workers": workers,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a file of property records through the predictor")
+    parser.add_argument("input", help="JSONL, CSV, Excel or Parquet file of property records")
+    parser.add_argument("output", help="JSONL, CSV or Parquet file for the predictions")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--id-field", default="id", help="Input field copied to the output (row number if missing)")
+    parser.add_argument("--start-offset", type=int, default=0, help="Byte offset to start from (JSONL only)")
+    parser.add_argument("--start-row", type=int, default=0, help="Row number to start from")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint")
+    parser.add_argument("--engine", choices=("sklearn", "flat"), default=None)
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes (1 = single process)")
+    args = parser.parse_args()
+
+    summary = run(args.input, args.output, args.chunk_size, args.id_field, args.start_offset,
+                  args.start_row, args.resume, args.engine, args.workers)
+    print(f"Done: {summary['rows']:,} rows in {summary['seconds']:.1f} s "
+          f"({summary['rows_per_second']:,.0f} rows/s), {summary['errors']:,} errors")
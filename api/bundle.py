@@ -0,0 +1,253 @@
+"""
+Pickle-free model bundle: the fitted preprocessor parameters and the compiled tree
+arrays as raw .npy files plus a JSON manifest.
+
+Layout of a bundle directory:
+
+    manifest.json          format/version, encoder layout, array checksums, verification
+    numeric_<i>_fill.npy   imputer values of numeric block i
+    numeric_<i>_mean.npy   scaler mean of numeric block i
+    numeric_<i>_scale.npy  scaler scale of numeric block i
+    tree_<name>.npy        FlatTreeEnsemble arrays (feature, threshold, threshold32, missing_left, value)
+
+A compact bundle (export_bundle(..., compact_tolerance=...)) holds the ensemble after
+FlatTreeEnsemble.compact(): pruned subtrees, float32 leaf values, small feature indices
+and no float64 thresholds. The manifest records the pruning and the measured deviation.
+
+Arrays are loaded with np.load(mmap_mode="r"), so every worker process maps the
+same read-only pages from the OS page cache instead of unpickling its own copy,
+and inference reads them in place.
+
+Usage (from the repo root):
+    python -m api.bundle              # export models/*.pkl to models/bundle
+    python -m api.bundle --compact    # export a compact bundle to models/compact and compare
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .encoder import CompiledEncoder
+from .tree_engine import FlatTreeEnsemble
+
+BUNDLE_FORMAT = "immo-eliza-bundle"
+# Version 2: float32 leaf values, integer feature indices of any width, optional float64 thresholds
+BUNDLE_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+MANIFEST_NAME = "manifest.json"
+
+
+class BundleError(ValueError):
+    """Raised when a bundle is missing, from an unknown format or fails its checksums."""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_value(value):
+    """Categories may be NumPy scalars; store them as plain JSON values."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def export_bundle(encoder: CompiledEncoder, flat_model: FlatTreeEnsemble, bundle_dir: str,
+                  reference_model=None, X_check=None, version: str = None,
+                  compact_tolerance: float = None) -> dict:
+    """
+    Write encoder parameters and tree arrays to bundle_dir and return the manifest.
+    If reference_model and X_check are given, the bundle is loaded back and its
+    predictions are compared with reference_model.predict(X_check).
+    compact_tolerance (in prediction units) exports flat_model.compact(compact_tolerance) instead.
+    """
+    if encoder.ordinal_columns:
+        raise BundleError("Bundles only support one-hot encoded categorical columns")
+    compaction = None
+    if compact_tolerance is not None:
+        compacted = flat_model.compact(compact_tolerance)
+        compaction = {"tolerance": compact_tolerance,
+                      "trees": [flat_model.n_trees, compacted.n_trees],
+                      "depth": [flat_model.max_depth, compacted.max_depth]}
+        flat_model = compacted
+    os.makedirs(bundle_dir, exist_ok=True)
+    arrays = {}
+
+    numeric_blocks = []
+    for i, (columns, out_slice, fill, mean, scale) in enumerate(encoder.numeric_blocks):
+        names = {}
+        for kind, array in (("fill", fill), ("mean", mean), ("scale", scale)):
+            names[kind] = f"numeric_{i}_{kind}.npy"
+            arrays[names[kind]] = array
+        numeric_blocks.append({"columns": columns, "slice": [out_slice.start, out_slice.stop],
+                               "arrays": names})
+
+    tree_arrays = {}
+    for name, array in flat_model.arrays().items():
+        tree_arrays[name] = f"tree_{name}.npy"
+        arrays[tree_arrays[name]] = array
+
+    files = {}
+    for file_name, array in arrays.items():
+        path = os.path.join(bundle_dir, file_name)
+        np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        files[file_name] = {"sha256": _sha256(path), "dtype": str(array.dtype),
+                            "shape": list(array.shape)}
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "encoder": {
+            "n_features": encoder.n_features,
+            "numeric_blocks": numeric_blocks,
+            "passthrough_blocks": [{"columns": columns, "slice": [s.start, s.stop]}
+                                   for columns, s in encoder.passthrough_blocks],
+            "categorical_columns": [
+                {"column": column, "categories": [_json_value(c) for c in index],
+                 "offset": min(index.values())}
+                for column, index in encoder.categorical_columns
+            ],
+        },
+        "trees": {"init_value": flat_model.init_value, "n_features": flat_model.n_features,
+                  "arrays": tree_arrays},
+        "files": files,
+    }
+    if compaction is not None:
+        manifest["trees"]["compaction"] = compaction
+    _write_manifest(bundle_dir, manifest)
+
+    if reference_model is not None and X_check is not None:
+        bundle = load_bundle(bundle_dir)
+        diff = np.abs(bundle.flat_model.predict(X_check) - reference_model.predict(X_check))
+        manifest["verification"] = {"rows": int(len(X_check)), "max_abs_diff": float(diff.max(initial=0.0)),
+                                    "mean_abs_diff": float(diff.mean()) if len(diff) else 0.0}
+        _write_manifest(bundle_dir, manifest)
+
+    return manifest
+
+
+def _write_manifest(bundle_dir: str, manifest: dict):
+    with open(os.path.join(bundle_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+class BundleModel:
+    """A model version served from a memory-mapped bundle (no preprocessor or sklearn model)."""
+
+    preprocessor = None
+    model = None
+
+    def __init__(self, name, encoder, flat_model, manifest, paths, load_seconds, artifact_bytes):
+        self.name = name
+        self.encoder = encoder
+        self.flat_model = flat_model
+        self.manifest = manifest
+        self.paths = paths
+        self.load_seconds = load_seconds
+        self.artifact_bytes = artifact_bytes
+
+
+def load_bundle(bundle_dir: str, name: str = None, verify: bool = True) -> BundleModel:
+    """Memory-map a bundle read-only; verify=True checks every array's sha256 first."""
+    start = time.perf_counter()
+    manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise BundleError(f"No bundle manifest at {manifest_path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT or manifest.get("format_version") not in SUPPORTED_FORMAT_VERSIONS:
+        raise BundleError(f"Unsupported bundle format in {manifest_path}")
+
+    arrays = {}
+    for file_name, meta in manifest["files"].items():
+        path = os.path.join(bundle_dir, file_name)
+        if verify and _sha256(path) != meta["sha256"]:
+            raise BundleError(f"Checksum mismatch for {path}")
+        arrays[file_name] = np.load(path, mmap_mode="r", allow_pickle=False)
+
+    layout = manifest["encoder"]
+    encoder = CompiledEncoder(
+        layout["n_features"],
+        numeric_blocks=[
+            (block["columns"], slice(*block["slice"]),
+             arrays[block["arrays"]["fill"]], arrays[block["arrays"]["mean"]],
+             arrays[block["arrays"]["scale"]])
+            for block in layout["numeric_blocks"]
+        ],
+        passthrough_blocks=[(block["columns"], slice(*block["slice"]))
+                            for block in layout["passthrough_blocks"]],
+        categorical_columns=[
+            (entry["column"], {c: entry["offset"] + i for i, c in enumerate(entry["categories"])})
+            for entry in layout["categorical_columns"]
+        ],
+    )
+
+    trees = manifest["trees"]
+    tree_arrays = {name: arrays[file_name] for name, file_name in trees["arrays"].items()}
+    flat_model = FlatTreeEnsemble(init_value=trees["init_value"], n_features=trees["n_features"],
+                                  threshold=tree_arrays.pop("threshold", None), **tree_arrays)
+
+    artifact_bytes = {"bundle": sum(os.path.getsize(os.path.join(bundle_dir, f))
+                                    for f in list(manifest["files"]) + [MANIFEST_NAME])}
+    return BundleModel(name or manifest["version"], encoder, flat_model, manifest,
+                       {"bundle": bundle_dir}, time.perf_counter() - start, artifact_bytes)
+
+
+def compare_artifacts(loaded, bundle_dir: str, X_check) -> dict:
+    """
+    Artifact bytes, load seconds and prediction deviation of the bundle in bundle_dir
+    against the pickled version loaded (a registry.LoadedModel), on X_check.
+    """
+    import joblib
+
+    start = time.perf_counter()
+    reference = joblib.load(loaded.paths["model"])
+    joblib.load(loaded.paths["preprocessor"])
+    pickle_seconds = time.perf_counter() - start
+    bundle = load_bundle(bundle_dir)
+    diff = np.abs(bundle.flat_model.predict(X_check) - reference.predict(X_check))
+    return {
+        "pickle": {"bytes": sum(loaded.artifact_bytes.values()), "load_seconds": pickle_seconds},
+        "bundle": {"bytes": bundle.artifact_bytes["bundle"], "load_seconds": bundle.load_seconds},
+        "max_abs_diff": float(diff.max(initial=0.0)),
+        "mean_abs_diff": float(diff.mean()),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .registry import models_dir, registry
+
+    parser = argparse.ArgumentParser(description="Export models/*.pkl as a memory-mapped bundle")
+    parser.add_argument("--compact", action="store_true",
+                        help="Prune the trees and store float32 leaf values (to models/compact)")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="Compact: largest prediction change allowed by pruning, in euros")
+    parser.add_argument("--output", help="Bundle directory (default models/bundle or models/compact)")
+    args = parser.parse_args()
+
+    loaded = registry.get()
+    rng = np.random.default_rng(0)
+    X_check = rng.normal(size=(1_000, loaded.encoder.n_features))
+    bundle_dir = args.output or os.path.join(models_dir(), "compact" if args.compact else "bundle")
+    manifest = export_bundle(loaded.encoder, loaded.flat_model, bundle_dir,
+                             reference_model=loaded.model, X_check=X_check,
+                             compact_tolerance=args.tolerance if args.compact else None)
+    print(f"Bundle saved to: {bundle_dir} (max abs diff vs pickle: "
+          f"{manifest['verification']['max_abs_diff']:.2e})")
+    if args.compact:
+        compaction = manifest["trees"]["compaction"]
+        print(f"Trees {compaction['trees'][0]} -> {compaction['trees'][1]}, "
+              f"depth {compaction['depth'][0]} -> {compaction['depth'][1]}")
+    report = compare_artifacts(loaded, bundle_dir, X_check)
+    for kind in ("pickle", "bundle"):
+        print(f"{kind:<7} {report[kind]['bytes']:>10,} bytes  load {report[kind]['load_seconds'] * 1e3:7.2f} ms")
+    print(f"Deviation vs pickle: max {report['max_abs_diff']:.4f}, mean {report['mean_abs_diff']:.4f}")
@@ -0,0 +1,138 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+
+def file_version(path: str):
+    """Version token for an artifact file: changes whenever the file is replaced or rewritten."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Key markers for an absent column and for a value the encoder can't parse as a number. Both
+# make predict() raise, so they never share a key with a missing (None/NaN) value, which is
+# imputed and cached.
+ABSENT = ("absent",)
+INVALID = ("invalid",)
+
+
+def _canonical_number(value):
+    """Numbers and flags the way the encoder reads them: float, None when missing, INVALID if unparsable."""
+    if value is ABSENT or value is None:
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return INVALID
+    return None if math.isnan(number) else number
+
+
+def _canonical_category(value):
+    """Categories are matched as-is; None and NaN both mean missing."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions keyed on a canonical form of the input dict.
+    Only the model's feature columns are part of the key, with numbers and booleans
+    normalized the same way the encoder reads them (so 3, 3.0 and True/1 collide
+    only when they would predict the same; an absent column or an unparsable number
+    never collides with a missing value), plus a caller context (engine and model
+    version) and the version of the model file. When the model file changes, every
+    cached entry is dropped and on_invalidate is called.
+    """
+
+    def __init__(self, numeric_columns, categorical_columns, max_size: int = 1024,
+                 ttl: float = None, model_path: str = None, on_invalidate=None):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.model_path = model_path
+        # Called when the model file changes, e.g. to reload the model the entries came from
+        self.on_invalidate = on_invalidate
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = file_version(model_path) if model_path else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, input_data: dict, context: tuple = ()) -> tuple:
+        """Canonical, hashable key for an input dict; context (e.g. engine and model version) is part of it."""
+        numbers = tuple(_canonical_number(input_data.get(c, ABSENT)) for c in self.numeric_columns)
+        categories = tuple(_canonical_category(input_data.get(c, ABSENT)) for c in self.categorical_columns)
+        return (self._model_version, tuple(context), numbers, categories)
+
+    def _check_model_version(self):
+        if self.model_path is None:
+            return
+        version = file_version(self.model_path)
+        if version != self._model_version:
+            self._entries.clear()
+            self._model_version = version
+            self.invalidations += 1
+            if self.on_invalidate is not None:
+                self.on_invalidate()
+
+    def get_or_compute(self, input_data: dict, compute, context: tuple = ()):
+        """Return the cached prediction for (input_data, context), or call compute() and cache its result."""
+        with self._lock:
+            self._check_model_version()
+            key = self.key(input_data, context)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Compute outside the lock so concurrent misses don't serialize on the model
+        value = compute()
+
+        with self._lock:
+            if key[0] != self._model_version:
+                # The model changed while computing; don't store a stale entry
+                return value
+            expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters and current size, e.g. for display in the app."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,138 @@
+"""
+Comparable sold properties: a nearest-neighbour index over the training listings.
+
+src/setup_model.py builds the index from the training data and saves it next to the
+model as models/comparables.pkl. Listings are partitioned by (region, property_type)
+and every partition gets a KD-tree over the numeric features, imputed with the
+training medians and standardized, so a lookup only visits a few leaves of one small
+tree instead of scanning the dataset. Records whose partition was not seen in training
+are matched against a tree over all listings.
+
+Usage:
+    from api.comparables import find_comparables
+    find_comparables(property_dict, k=5)   # -> [{"distance": 0.41, "price": 315000.0, ...}, ...]
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add src folder to path to load the shared feature definitions
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from features import numeric_to_scale
+from .registry import models_dir
+
+COMPARABLES_PATH = "comparables.pkl"
+DEFAULT_K = 5
+
+# Listings are only compared within the same partition
+PARTITION_COLUMNS = ("region", "property_type")
+# Features the distance is computed on
+DISTANCE_COLUMNS = numeric_to_scale
+# Listing columns returned with every comparable (those present in the training data)
+RESULT_COLUMNS = ["price", "property_type", "subproperty_type", "region", "province", "epc",
+                  "state_building"] + numeric_to_scale
+# Key of the tree over all listings
+ALL_LISTINGS = None
+
+
+class ComparablesIndex:
+    """KD-trees over the standardized numeric features of the listings, one per partition."""
+
+    def __init__(self, center, scale, partitions, listings):
+        self.center = center
+        self.scale = scale
+        # partition key -> (KDTree, row numbers of its listings)
+        self.partitions = partitions
+        # column -> array of values, one per listing
+        self.listings = listings
+
+    @classmethod
+    def build(cls, df, leaf_size: int = 40) -> "ComparablesIndex":
+        """Index the rows of a training DataFrame (with a "price" column)."""
+        from sklearn.neighbors import KDTree
+
+        X = df[DISTANCE_COLUMNS].to_numpy(dtype=np.float64, na_value=np.nan)
+        center = np.nan_to_num(np.nanmedian(X, axis=0))
+        scale = np.nan_to_num(np.nanstd(X, axis=0))
+        scale[scale == 0] = 1.0
+        Z = (np.where(np.isnan(X), center, X) - center) / scale
+
+        partitions = {ALL_LISTINGS: (KDTree(Z, leaf_size=leaf_size), np.arange(len(df)))}
+        groups = df.groupby(list(PARTITION_COLUMNS), observed=True, sort=False).indices
+        for key, rows in groups.items():
+            partitions[key] = (KDTree(Z[rows], leaf_size=leaf_size), rows)
+
+        listings = {column: df[column].to_numpy() for column in RESULT_COLUMNS if column in df.columns}
+        return cls(center, scale, partitions, listings)
+
+    def __len__(self):
+        return len(self.partitions[ALL_LISTINGS][1])
+
+    def encode(self, record: dict) -> np.ndarray:
+        """Standardized distance features of one record; missing values get the training median."""
+        x = np.array([_float(record.get(column)) for column in DISTANCE_COLUMNS])
+        return ((np.where(np.isnan(x), self.center, x) - self.center) / self.scale).reshape(1, -1)
+
+    def query(self, record: dict, k: int = DEFAULT_K) -> list:
+        """The k listings closest to record in its partition, nearest first."""
+        key = tuple(record.get(column) for column in PARTITION_COLUMNS)
+        tree, rows = self.partitions.get(key) or self.partitions[ALL_LISTINGS]
+        distances, positions = tree.query(self.encode(record), k=min(k, len(rows)))
+        comparables = []
+        for distance, row in zip(distances[0], rows[positions[0]]):
+            comparable = {"distance": float(distance)}
+            for column, values in self.listings.items():
+                comparable[column] = _json_value(values[row])
+            comparables.append(comparable)
+        return comparables
+
+    def save(self, path: str):
+        import joblib
+
+        joblib.dump(self, path)
+
+
+def _float(value) -> float:
+    try:
+        return np.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _json_value(value):
+    """Listing values as plain JSON values (NumPy scalars unwrapped, missing -> None)."""
+    import pandas as pd
+
+    if isinstance(value, np.generic):
+        value = value.item()
+    return None if pd.isna(value) else value
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def load_comparables(path: str = None) -> ComparablesIndex:
+    """The index saved at path (default models_dir()/comparables.pkl), loaded once per process."""
+    path = os.path.join(models_dir(), path or COMPARABLES_PATH)
+    index = _indexes.get(path)
+    if index is None:
+        with _lock:
+            index = _indexes.get(path)
+            if index is None:
+                import joblib
+
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"No comparables index at {path}; run src/setup_model.py")
+                index = _indexes[path] = joblib.load(path)
+    return index
+
+
+def find_comparables(input_data: dict, k: int = DEFAULT_K, path: str = None) -> list:
+    """
+    The k training listings most similar to input_data (same region and property type
+    when possible), nearest first, each with its distance in standardized feature units.
+    """
+    return load_comparables(path).query(input_data, k)
@@ -0,0 +1,10 @@
+# conftest.py
+# The training scripts in src/ (trainers, incremental, data_loader, ...) are imported as
+# top-level modules by their tests, so src/ goes on sys.path here rather than through an
+# import of api.predict. Shared sample records live in api/fixtures.py.
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
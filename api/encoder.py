@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+
+
+_MISSING = object()
+
+
+def _parse_float(record: dict, column: str) -> float:
+    """
+    Numeric value of record[column] for encoding, as strict as preprocessor.transform:
+    None and NaN are missing values (imputed), but an absent key or a value that isn't a
+    number raises ValueError instead of being imputed.
+    """
+    value = record.get(column, _MISSING)
+    if value is _MISSING:
+        raise ValueError(f"Required column {column!r} is missing")
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Column {column!r} expects a number, got {value!r}") from None
+
+
+def _is_passthrough(transformer) -> bool:
+    """ColumnTransformer stores fitted 'passthrough' entries as an identity FunctionTransformer."""
+    from sklearn.preprocessing import FunctionTransformer
+
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+
+def _numeric_block(steps, columns, out):
+    """(columns, slice, fill, mean, scale) for an imputer and/or scaler pipeline."""
+    n = len(columns)
+    fill = np.full(n, np.nan)
+    mean = np.zeros(n)
+    scale = np.ones(n)
+    for step in steps:
+        if hasattr(step, "statistics_"):
+            fill = np.asarray(step.statistics_, dtype=np.float64)
+        else:
+            if step.mean_ is not None:
+                mean = np.asarray(step.mean_, dtype=np.float64)
+            if step.scale_ is not None:
+                scale = np.asarray(step.scale_, dtype=np.float64)
+    return (columns, out, fill, mean, scale)
+
+
+def _categorical_columns(encoder: "OneHotEncoder", columns, offset):
+    """(column, {category: output column index}) for each column of a fitted OneHotEncoder."""
+    if encoder.handle_unknown != "ignore" or encoder.drop is not None:
+        raise TypeError("Compiled encoding requires OneHotEncoder(handle_unknown='ignore', drop=None)")
+    result = []
+    for column, categories in zip(columns, encoder.categories_):
+        result.append((column, {category: offset + i for i, category in enumerate(categories)}))
+        offset += len(categories)
+    return result
+
+
+def _ordinal_columns(encoder: "OrdinalEncoder", columns, offset):
+    """(column, output column index, {category: code}) for each column of a fitted OrdinalEncoder."""
+    if encoder.handle_unknown != "use_encoded_value" or not np.isnan(encoder.unknown_value) \
+            or not np.isnan(encoder.encoded_missing_value):
+        raise TypeError("Compiled encoding requires OrdinalEncoder to encode unknown and missing values as NaN")
+    result = []
+    for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+        # Missing-value categories (None/NaN) encode to NaN, like unknown values
+        codes = {category: float(code) for code, category in enumerate(categories)
+                 if category is not None and category == category}
+        result.append((column, offset + i, codes))
+    return result
+
+
+class CompiledEncoder:
+    """
+    Pandas-free encoder for single records.
+    Reads the fitted parameters of the ColumnTransformer once (imputer statistics,
+    scaler mean/scale, one-hot category -> column index maps, ordinal category -> code
+    maps, passthrough columns) and encodes a dict straight into a NumPy row that
+    matches preprocessor.transform.
+    """
+
+    def __init__(self, n_features: int, numeric_blocks=(), passthrough_blocks=(), categorical_columns=(),
+                 ordinal_columns=()):
+        self.n_features = int(n_features)
+        # (columns, slice, fill values, mean, scale)
+        self.numeric_blocks = list(numeric_blocks)
+        # (columns, slice)
+        self.passthrough_blocks = list(passthrough_blocks)
+        # (column, {category: output column index})
+        self.categorical_columns = list(categorical_columns)
+        # (column, output column index, {category: code})
+        self.ordinal_columns = list(ordinal_columns)
+        self._template = np.zeros(self.n_features, dtype=np.float64)
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor: "ColumnTransformer") -> "CompiledEncoder":
+        """Compile a fitted ColumnTransformer."""
+        # scikit-learn is only needed once the fitted preprocessor is loaded
+        from sklearn.impute import SimpleImputer
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+        numeric_blocks, passthrough_blocks, categorical_columns, ordinal_columns = [], [], [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == "remainder" or (isinstance(transformer, str) and transformer == "drop"):
+                continue
+            columns = list(columns)
+            out = preprocessor.output_indices_[name]
+
+            if _is_passthrough(transformer):
+                passthrough_blocks.append((columns, out))
+                continue
+
+            steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+            step_objects = [step for _, step in steps]
+
+            if len(step_objects) == 1 and isinstance(step_objects[0], OneHotEncoder):
+                categorical_columns.extend(_categorical_columns(step_objects[0], columns, out.start))
+            elif len(step_objects) == 1 and isinstance(step_objects[0], OrdinalEncoder):
+                ordinal_columns.extend(_ordinal_columns(step_objects[0], columns, out.start))
+            elif all(isinstance(step, (SimpleImputer, StandardScaler)) for step in step_objects):
+                numeric_blocks.append(_numeric_block(step_objects, columns, out))
+            else:
+                raise TypeError(f"Unsupported transformer for compiled encoding: {name!r}")
+
+        n_features = len(preprocessor.get_feature_names_out())
+        return cls(n_features, numeric_blocks, passthrough_blocks, categorical_columns, ordinal_columns)
+
+    def encode(self, record: dict, out: np.ndarray = None) -> np.ndarray:
+        """
+        Encode one record into a row of length n_features (written into `out` if given).
+        Raises ValueError when a feature column is missing or a numeric value can't be parsed.
+        """
+        row = self._template.copy() if out is None else out
+        if out is not None:
+            row.fill(0.0)
+
+        for columns, out_slice, fill, mean, scale in self.numeric_blocks:
+            values = np.array([_parse_float(record, c) for c in columns])
+            missing = np.isnan(values)
+            values[missing] = fill[missing]
+            row[out_slice] = (values - mean) / scale
+
+        for columns, out_slice in self.passthrough_blocks:
+            row[out_slice] = [_parse_float(record, c) for c in columns]
+
+        for column, index in self.categorical_columns:
+            value = record.get(column, _MISSING)
+            if value is _MISSING:
+                raise ValueError(f"Required column {column!r} is missing")
+            try:
+                position = index.get(value)
+            except TypeError:
+                position = None
+            if position is not None:
+                row[position] = 1.0
+
+        for column, position, codes in self.ordinal_columns:
+            value = record.get(column, _MISSING)
+            if value is _MISSING:
+                raise ValueError(f"Required column {column!r} is missing")
+            try:
+                code = codes.get(value)
+            except TypeError:
+                code = None
+            row[position] = math.nan if code is None else code
+
+        return row
+
+    def encode_many(self, records) -> np.ndarray:
+        """Encode a sequence of records into a 2-D array, one row per record."""
+        records = list(records)
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for i, record in enumerate(records):
+            self.encode(record, out=X[i])
+        return X
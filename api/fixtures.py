@@ -0,0 +1,57 @@
+"""
+Sample property records shared by the tests (api/test_*.py) and the benchmarks.
+
+    from api.fixtures import make_records, sample_input, training_frame
+"""
+import numpy as np
+
+sample_input = {
+    "construction_year": 2005,
+    "total_area_sqm": 120,
+    "surface_land_sqm": 300,
+    "nbr_frontages": 2,
+    "nbr_bedrooms": 3,
+    "terrace_sqm": 15,
+    "garden_sqm": 100,
+    "primary_energy_consumption_sqm": 150,
+    "fl_furnished": False,
+    "fl_open_fire": True,
+    "fl_terrace": True,
+    "fl_garden": True,
+    "fl_swimming_pool": False,
+    "fl_floodzone": False,
+    "fl_double_glazing": True,
+    "property_type": "HOUSE",
+    "subproperty_type": "HOUSE",
+    "region": "Flanders",
+    "province": "Antwerp",
+    "equipped_kitchen": "INSTALLED",
+    "state_building": "GOOD",
+    "heating_type": "GAS",
+    "epc": "B",
+}
+
+
+def make_records(n):
+    """n variations of sample_input: growing areas, cycling bedrooms, regions and EPC ratings."""
+    records = []
+    for i in range(n):
+        record = dict(sample_input)
+        record["total_area_sqm"] = 60 + 10 * i
+        record["nbr_bedrooms"] = 1 + i % 5
+        record["region"] = ["Flanders", "Wallonia", "Brussels-Capital"][i % 3]
+        record["epc"] = ["A", "B", "C", "D", None][i % 5]
+        records.append(record)
+    return records
+
+
+def training_frame(n=200):
+    """(X, y): make_records(n) preprocessed like the training data, prices linear in the area plus noise."""
+    import pandas as pd
+
+    from api.predict import preprocess_for_prediction
+
+    rng = np.random.default_rng(0)
+    df = preprocess_for_prediction(pd.DataFrame(make_records(n)))
+    y = 2_000 * df["total_area_sqm"] + rng.normal(0, 10_000, n)
+    return df, y
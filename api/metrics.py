@@ -0,0 +1,130 @@
+"""
+Low-overhead per-stage latency histograms for the prediction hot path.
+
+Each stage records into a histogram with fixed, geometrically spaced buckets
+(1 µs to ~100 s), so recording is a bisect plus a counter increment and memory does
+not grow with traffic. snapshot() reports count, mean and p50/p95/p99 per stage.
+
+Recording is on by default; set IMMO_ELIZA_METRICS=0 (or call metrics.disable()) to
+turn it off, after which stopwatch() hands out a shared no-op object.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Bucket upper bounds in seconds: 1 µs * 1.2^k, up to ~100 s
+BUCKET_BOUNDS = [1e-6 * 1.2 ** k for k in range(102)]
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        index = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (seconds)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        with self._lock:
+            summary = {"count": self.count,
+                       "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+                       "max_ms": self.max * 1e3}
+            for q in PERCENTILES:
+                summary[f"p{q}_ms"] = self.percentile(q) * 1e3
+        return summary
+
+
+class Stopwatch:
+    """Times consecutive stages: each lap(stage) records the time since the previous lap."""
+
+    __slots__ = ("_metrics", "_start", "_last")
+
+    def __init__(self, metrics: "StageMetrics"):
+        self._metrics = metrics
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self._metrics.record(stage, now - self._last)
+        self._last = now
+
+    def total(self, stage: str):
+        """Record the time since the stopwatch started."""
+        self._metrics.record(stage, time.perf_counter() - self._start)
+
+
+class _NullStopwatch:
+    """Shared no-op stopwatch used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def lap(self, stage: str):
+        pass
+
+    def total(self, stage: str):
+        pass
+
+
+_NULL_STOPWATCH = _NullStopwatch()
+
+
+class StageMetrics:
+    """Histograms keyed by stage name."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def stopwatch(self):
+        return Stopwatch(self) if self.enabled else _NULL_STOPWATCH
+
+    def record(self, stage: str, seconds: float):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.record(seconds)
+
+    def snapshot(self) -> dict:
+        """{stage: {"count", "mean_ms", "max_ms", "p50_ms", "p95_ms", "p99_ms"}}"""
+        return {stage: histogram.summary() for stage, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+# Process-wide metrics used by api.predict
+metrics = StageMetrics(enabled=os.environ.get("IMMO_ELIZA_METRICS", "1") not in ("0", "false", "off"))
@@ -1,61 +1,214 @@
-import pandas as pd
-import joblib
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING, Iterable, Union
+
+import numpy as np
 import sys
 import os
 
-# Add src folder to path to load preprocessor if needed
+# Add src folder to path to load the shared feature definitions
 sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from features import map_epc, map_epc_value, numeric_to_scale, binary_flags, categorical_cols
+from .cache import PredictionCache
+from .encoder import _parse_float
+from .metrics import metrics
+from .registry import registry
+from .request_log import request_log
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Artifacts are loaded lazily through the registry, resolved relative to the
+# package (or IMMO_ELIZA_MODELS_DIR), so importing this module is cheap
+PREPROCESSOR_PATH = registry.paths()["preprocessor"]
+MODEL_PATH = registry.paths()["model"]
 
-# Load preprocessor and model
-PREPROCESSOR_PATH = "models/preprocessor.pkl"
-MODEL_PATH = "models/model.pkl"
+def __getattr__(name):
+    # Artifacts of the default version, loaded on first access (e.g. api.predict.model)
+    if name in ("preprocessor", "model", "encoder", "flat_model"):
+        return getattr(registry.get(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-preprocessor = joblib.load(PREPROCESSOR_PATH)
-model = joblib.load(MODEL_PATH)
+# Inference engine for the tree ensemble:
+#   "sklearn" -> model.predict
+#   "flat"    -> FlatTreeEnsemble, the ensemble compiled into contiguous arrays
+ENGINES = ("sklearn", "flat")
+ENGINE = os.environ.get("IMMO_ELIZA_ENGINE", "sklearn")
+
+def model_predict(X, engine: str = None, version: str = None) -> np.ndarray:
+    """Run the tree ensemble on an encoded feature matrix with the selected engine."""
+    engine = engine or ENGINE
+    loaded = registry.get(version)
+    # Pickle-free bundles only carry the compiled trees
+    if engine == "flat" or (engine == "sklearn" and loaded.model is None):
+        return loaded.flat_model.predict(X)
+    if engine == "sklearn":
+        return loaded.model.predict(X)
+    raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
 
 # Prediction-specific preprocessing
 def preprocess_for_prediction(df: pd.DataFrame) -> pd.DataFrame:
     """Preprocess a dataframe for prediction (no 'price' column expected)."""
     df = df.copy()
 
-    # Map EPC values to standardized categories
-    epc_mapping = {
-        "Flanders": {"A+": "excellent", "A": "excellent", "B": "good",
-                     "C": "poor", "D": "poor", "E": "bad", "F": "bad"},
-        "Brussels-Capital": {"A": "excellent", "B": "good", "C": "good",
-                             "D": "poor", "E": "poor", "F": "bad", "G": "bad"},
-        "Wallonia": {"A++": "excellent", "A+": "excellent", "A": "good",
-                     "B": "good", "C": "poor", "D": "poor", "E": "poor",
-                     "F": "bad", "G": "bad"}
-    }
-
-    df["epc_mapped"] = df.apply(
-        lambda row: epc_mapping.get(row["region"], {}).get(row.get("epc", None), "MISSING"),
-        axis=1
-    )
+    # Map EPC values to standardized categories (shared with training)
+    df["epc_mapped"] = map_epc(df)
 
     return df
 
-def predict(input_data: dict) -> float:
+# Default number of rows scored per transform/predict call in predict_batch
+BATCH_CHUNK_SIZE = 10_000
+
+# Raw columns every input record must carry (None is a missing value and is imputed);
+# epc_mapped is derived from region and epc
+INPUT_COLUMNS = numeric_to_scale + binary_flags + [c for c in categorical_cols if c != "epc_mapped"]
+_INPUT_COLUMN_SET = frozenset(INPUT_COLUMNS)
+
+def check_columns(input_data: dict):
+    """Raise ValueError when a record lacks one of INPUT_COLUMNS, as predict() does."""
+    if not input_data.keys() >= _INPUT_COLUMN_SET:
+        missing = [c for c in INPUT_COLUMNS if c not in input_data]
+        raise ValueError(f"Required columns are missing: {missing}")
+
+def check_record(input_data: dict):
+    """check_columns plus the numeric values: raises ValueError for any record predict() would reject."""
+    check_columns(input_data)
+    for column in numeric_to_scale + binary_flags:
+        _parse_float(input_data, column)
+
+def _prepare_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply prediction preprocessing and drop target columns if present."""
+    df_processed = preprocess_for_prediction(df)
+    return df_processed.drop(columns=["price", "price_per_sqm"], errors="ignore")
+
+@request_log.logged("predict")
+def predict(input_data: dict, engine: str = None, version: str = None) -> float:
     """
     Predict the price of a property given input data.
     input_data: dict with keys corresponding to features your model expects
+    engine: "sklearn" or "flat" (defaults to ENGINE)
+    version: registered model version (defaults to "default")
     Returns: predicted price as float
     """
-    # Convert input dict to DataFrame
-    df = pd.DataFrame([input_data])
-
-    # Apply prediction-specific preprocessing
-    df_processed = preprocess_for_prediction(df)
+    stopwatch = metrics.stopwatch()
 
-    # Drop target column if present
-    if "price" in df_processed.columns:
-        df_processed = df_processed.drop(columns=["price", "price_per_sqm"])
+    # Apply prediction-specific preprocessing on the dict itself
+    record = dict(input_data)
+    record["epc_mapped"] = map_epc_value(record.get("region"), record.get("epc"))
+    stopwatch.lap("predict.preprocess")
 
-    # Transform features using preprocessor
-    X_processed = preprocessor.transform(df_processed)
+    # Encode features straight into a NumPy row (equivalent to preprocessor.transform)
+    X_processed = registry.get(version).encoder.encode(record).reshape(1, -1)
+    stopwatch.lap("predict.encode")
 
     # Predict price
-    prediction = model.predict(X_processed)
+    prediction = model_predict(X_processed, engine, version)
+    stopwatch.lap("predict.model")
+    stopwatch.total("predict.total")
+
+    return float(prediction[0])
 
-    return float(prediction[0])
\ No newline at end of file
+def predict_records(records: list, engine: str = None, version: str = None) -> np.ndarray:
+    """
+    Predict prices for a small list of dicts in one model call, without pandas.
+    Suited to micro-batches; use predict_batch for large inputs.
+    """
+    stopwatch = metrics.stopwatch()
+    encoder = registry.get(version).encoder
+    prepared = []
+    for input_data in records:
+        record = dict(input_data)
+        record["epc_mapped"] = map_epc_value(record.get("region"), record.get("epc"))
+        prepared.append(record)
+    if not prepared:
+        return np.empty(0, dtype=float)
+    stopwatch.lap("records.preprocess")
+
+    X_processed = encoder.encode_many(prepared)
+    stopwatch.lap("records.encode")
+
+    predictions = model_predict(X_processed, engine, version).astype(float, copy=False)
+    stopwatch.lap("records.model")
+    stopwatch.total("records.total")
+    return predictions
+
+def _iter_chunks(records: Union[pd.DataFrame, Iterable[dict]], chunk_size: int):
+    """Yield DataFrames of at most chunk_size rows from a DataFrame or an iterable of dicts."""
+    import pandas as pd
+
+    if isinstance(records, pd.DataFrame):
+        for start in range(0, len(records), chunk_size):
+            yield records.iloc[start:start + chunk_size].reset_index(drop=True)
+        return
+
+    iterator = iter(records)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        # pd.DataFrame would turn a key absent from some records into NaN and impute it
+        for record in chunk:
+            check_columns(record)
+        yield pd.DataFrame(chunk)
+
+def predict_batch(records: Union[pd.DataFrame, Iterable[dict]],
+                  chunk_size: int = BATCH_CHUNK_SIZE, engine: str = None,
+                  version: str = None) -> np.ndarray:
+    """
+    Predict prices for many properties at once.
+    records: DataFrame, list of dicts or any iterable of dict records; every record must carry
+             INPUT_COLUMNS, like a DataFrame must (ValueError otherwise)
+    chunk_size: number of rows per preprocessor.transform / model.predict call
+    engine: "sklearn" or "flat" (defaults to ENGINE)
+    version: registered model version (defaults to "default")
+    Returns: 1-D array of predicted prices, in input order
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    loaded = registry.get(version)
+    predictions = []
+    stopwatch = metrics.stopwatch()
+    for df in _iter_chunks(records, chunk_size):
+        # Time since the previous chunk finished: reading input and building the DataFrame
+        stopwatch.lap("batch.frame")
+        df_processed = _prepare_features(df)
+        stopwatch.lap("batch.preprocess")
+        if loaded.preprocessor is not None:
+            X_processed = loaded.preprocessor.transform(df_processed)
+        else:
+            X_processed = loaded.encoder.encode_many(df_processed.to_dict("records"))
+        stopwatch.lap("batch.transform")
+        predictions.append(model_predict(X_processed, engine, version))
+        stopwatch.lap("batch.model")
+    stopwatch.total("batch.total")
+
+    if not predictions:
+        return np.empty(0, dtype=float)
+    return np.concatenate(predictions).astype(float, copy=False)
+
+# LRU cache in front of predict(), keyed on the canonical feature dict, the engine, the model
+# version and the version of the default model file
+prediction_cache = PredictionCache(
+    numeric_columns=numeric_to_scale + binary_flags,
+    # epc_mapped is derived from region and epc, so the raw epc is part of the key instead
+    categorical_columns=[c for c in categorical_cols if c != "epc_mapped"] + ["epc"],
+    max_size=int(os.environ.get("IMMO_ELIZA_CACHE_SIZE", 1024)),
+    ttl=float(os.environ["IMMO_ELIZA_CACHE_TTL"]) if os.environ.get("IMMO_ELIZA_CACHE_TTL") else None,
+    model_path=MODEL_PATH,
+    # A rewritten model.pkl is reloaded, so new entries don't come from the old model
+    on_invalidate=lambda: registry.unload(),
+)
+
+# predict() without its request log entry
+_predict = predict.__wrapped__
+
+def cached_predict(input_data: dict, engine: str = None, version: str = None) -> float:
+    """
+    predict() behind the prediction cache; identical inputs are only scored once per engine and version.
+    Nothing is written to the request log here: the caller logs each submission once, cache hits
+    included (the Streamlit app does), instead of a second "predict" entry for every cache miss.
+    """
+    context = (engine or ENGINE, version or "default")
+    return prediction_cache.get_or_compute(input_data, lambda: _predict(input_data, engine, version), context)
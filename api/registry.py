@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+# Artifacts live in <repo>/models unless IMMO_ELIZA_MODELS_DIR points elsewhere
+DEFAULT_MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+DEFAULT_VERSION = "default"
+
+
+def models_dir() -> str:
+    """Directory that relative artifact paths are resolved against."""
+    return os.path.abspath(os.environ.get("IMMO_ELIZA_MODELS_DIR", DEFAULT_MODELS_DIR))
+
+
+class LoadedModel:
+    """One model version: the fitted preprocessor and model, plus load statistics."""
+
+    def __init__(self, name, preprocessor, model, paths, load_seconds):
+        from .encoder import CompiledEncoder
+
+        self.name = name
+        self.preprocessor = preprocessor
+        self.model = model
+        self.paths = paths
+        self.load_seconds = load_seconds
+        self.artifact_bytes = {kind: os.path.getsize(path) for kind, path in paths.items()}
+        # Pandas-free encoder compiled from the fitted preprocessor, used for single predictions
+        self.encoder = CompiledEncoder.from_column_transformer(preprocessor)
+        self._flat_model = None
+
+    @property
+    def flat_model(self):
+        """The tree ensemble compiled into contiguous arrays, built on first use."""
+        if self._flat_model is None:
+            from sklearn.ensemble import GradientBoostingRegressor
+            from .tree_engine import FlatTreeEnsemble
+
+            if not isinstance(self.model, GradientBoostingRegressor):
+                raise TypeError(f"The 'flat' engine only serves models trained with --trainer gbr; version "
+                                f"{self.name!r} is a {type(self.model).__name__}, use engine='sklearn'")
+            self._flat_model = FlatTreeEnsemble.from_sklearn(self.model)
+        return self._flat_model
+
+
+class ArtifactRegistry:
+    """
+    Named model versions, loaded lazily and thread-safely on first use.
+    Relative paths are resolved against models_dir(), never the current working directory.
+    """
+
+    def __init__(self):
+        self._paths = {}
+        self._loaded = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.register(DEFAULT_VERSION, "preprocessor.pkl", "model.pkl")
+        # Pickle-free export of the default model, see api/bundle.py
+        self.register_bundle("bundle", "bundle")
+        # Pruned float32 variant of it (api/bundle.py --compact)
+        self.register_bundle("compact", "compact")
+
+    def register(self, name: str, preprocessor_path: str, model_path: str):
+        """Register (or replace) a model version; nothing is loaded until get(name)."""
+        with self._lock:
+            self._paths[name] = {"preprocessor": preprocessor_path, "model": model_path}
+            self._loaded.pop(name, None)
+            self._locks.setdefault(name, threading.Lock())
+
+    def register_bundle(self, name: str, bundle_dir: str):
+        """Register a version served from a memory-mapped bundle directory."""
+        with self._lock:
+            self._paths[name] = {"bundle": bundle_dir}
+            self._loaded.pop(name, None)
+            self._locks.setdefault(name, threading.Lock())
+
+    def paths(self, name: str = DEFAULT_VERSION) -> dict:
+        """Absolute artifact paths of a version."""
+        if name not in self._paths:
+            raise KeyError(f"Unknown model version {name!r}, registered: {sorted(self._paths)}")
+        return {kind: os.path.join(models_dir(), path) for kind, path in self._paths[name].items()}
+
+    def get(self, name: str = None):
+        """Return a loaded model version, loading it on first use."""
+        name = name or DEFAULT_VERSION
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+
+        paths = self.paths(name)
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            loaded = self._loaded.get(name)
+            if loaded is None and "bundle" in paths:
+                from .bundle import load_bundle
+
+                loaded = load_bundle(paths["bundle"], name=name)
+                self._loaded[name] = loaded
+            elif loaded is None:
+                import joblib
+
+                start = time.perf_counter()
+                preprocessor = joblib.load(paths["preprocessor"])
+                model = joblib.load(paths["model"])
+                loaded = LoadedModel(name, preprocessor, model, paths, time.perf_counter() - start)
+                self._loaded[name] = loaded
+        return loaded
+
+    def unload(self, name: str = None):
+        """Drop a loaded version so the next get() reloads it from disk."""
+        self._loaded.pop(name or DEFAULT_VERSION, None)
+
+    def versions(self) -> list:
+        return sorted(self._paths)
+
+    def info(self) -> dict:
+        """Paths, sizes and load times of every registered version."""
+        info = {}
+        for name in self.versions():
+            loaded = self._loaded.get(name)
+            info[name] = {
+                "paths": self.paths(name),
+                "loaded": loaded is not None,
+                "load_seconds": loaded.load_seconds if loaded else None,
+                "artifact_bytes": loaded.artifact_bytes if loaded else None,
+            }
+        return info
+
+
+# Process-wide registry used by api.predict
+registry = ArtifactRegistry()
@@ -0,0 +1,250 @@
+"""
+Asynchronous request/response log of the predictions served, for retraining and debugging.
+
+log() only timestamps the entry and appends it to a bounded in-memory queue (a deque:
+no lock, and the writer isn't woken per entry). A background writer thread wakes when
+batch_size entries are waiting or every flush_interval seconds, serializes the batch as
+JSON lines and writes it with one call, yielding the GIL between slices so it doesn't
+hold up predictions. The file is rotated when it would exceed max_bytes or a new day
+starts; rotated files are renamed with their rotation time and gzip-compressed. When the
+queue is full, entries are dropped and counted instead of blocking the caller.
+
+Entries come from api.predict.predict ("predict"), the Streamlit submit handler
+("streamlit") and the HTTP service's /predict ("server"); each request is logged at one
+of these layers only (cached_predict, which the app calls, doesn't log). Logging is off
+until enabled: set IMMO_ELIZA_REQUEST_LOG to a file path, or call request_log.enable()
+(the Streamlit app and the HTTP service do, writing to logs/requests.jsonl in the repo
+root unless IMMO_ELIZA_REQUEST_LOG says otherwise; "0" keeps it off).
+
+Each line: {"time": "2026-10-18T19:07:01.123Z", "source": "predict", "input": {...},
+            "prediction": 323206.75, "latency_ms": 0.41}     (or "error": "..." instead of "prediction")
+"""
+import atexit
+import collections
+import functools
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime
+
+# <repo>/logs/requests.jsonl, wherever the process is started from (like registry.models_dir())
+DEFAULT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "logs", "requests.jsonl"))
+DEFAULT_MAX_QUEUE = 10_000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Entries serialized between two voluntary GIL releases of the writer thread: a prediction
+# waiting for the GIL waits for one slice (~0.1 ms), not the 5 ms switch interval
+SERIALIZE_SLICE = 8
+
+_STOP = object()
+
+
+def _json_default(value):
+    # NumPy scalars and anything else json can't encode natively
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+_encode = json.JSONEncoder(default=_json_default).encode
+
+
+class RequestLog:
+    """Bounded queue of log entries drained to a rotating JSONL file by a writer thread."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_queue: int = DEFAULT_MAX_QUEUE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, rotate_daily: bool = True, compress: bool = True):
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.enabled = False
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.max_queue = max_queue
+        self._pending = collections.deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._day = None
+
+    def enable(self, path: str = None) -> bool:
+        """
+        Start logging to path (default: IMMO_ELIZA_REQUEST_LOG, else DEFAULT_PATH).
+        Returns False, and stays off, when IMMO_ELIZA_REQUEST_LOG is "0".
+        """
+        setting = os.environ.get("IMMO_ELIZA_REQUEST_LOG", "")
+        if setting.lower() in ("0", "false", "off"):
+            return False
+        with self._lock:
+            if self._thread is None:
+                self.path = path or setting or self.path
+                self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self.enabled = True
+        return True
+
+    def log(self, source: str, input_data: dict, prediction=None, error=None, seconds: float = None):
+        """Queue one entry without blocking; it is dropped (and counted) if the queue is full."""
+        if not self.enabled:
+            return
+        entry = {"time": time.time(), "source": source, "input": dict(input_data)}
+        if error is not None:
+            entry["error"] = str(error)
+        else:
+            entry["prediction"] = prediction
+        if seconds is not None:
+            entry["latency_ms"] = seconds * 1e3
+        pending = self._pending
+        if len(pending) >= self.max_queue:
+            with self._lock:
+                self.dropped += 1
+            return
+        pending.append(entry)
+        if len(pending) == self.batch_size:
+            self._wakeup.set()
+
+    def logged(self, source: str):
+        """Decorator logging every call func(input_data, ...) with its result or exception."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(input_data, *args, **kwargs):
+                if not self.enabled:
+                    return func(input_data, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = func(input_data, *args, **kwargs)
+                except Exception as e:
+                    self.log(source, input_data, error=e, seconds=time.perf_counter() - start)
+                    raise
+                self.log(source, input_data, prediction=result, seconds=time.perf_counter() - start)
+                return result
+            return wrapper
+        return decorate
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every entry queued so far is written; False on timeout or when not running."""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._pending.append(done)
+        self._wakeup.set()
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Write the queued entries, close the file and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self.enabled = False
+        if thread is not None and thread.is_alive():
+            self._pending.append(_STOP)
+            self._wakeup.set()
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "path": self.path, "written": self.written, "dropped": self.dropped,
+                "queued": len(self._pending), "rotations": self.rotations}
+
+    # --- writer thread ---
+
+    def _run(self):
+        pending = self._pending
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            batch = []
+            while pending:
+                item = pending.popleft()
+                if item is _STOP or isinstance(item, threading.Event):
+                    # Markers from close() and flush(): everything queued before them is written first
+                    self._write(batch)
+                    batch = []
+                    if item is _STOP:
+                        self._close_file()
+                        return
+                    item.set()
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+            self._write(batch)
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        lines = []
+        second, prefix = None, None
+        for i, entry in enumerate(batch, 1):
+            # UTC ISO 8601 with milliseconds; the date and time part is formatted once per second
+            t = entry["time"]
+            if int(t) != second:
+                second = int(t)
+                prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            entry["time"] = f"{prefix}.{int((t - second) * 1000):03d}Z"
+            lines.append(_encode(entry))
+            if i % SERIALIZE_SLICE == 0:
+                # Let a waiting prediction thread run instead of making it wait out the switch interval
+                time.sleep(0)
+        data = ("\n".join(lines) + "\n").encode()
+        try:
+            self._open_file(len(data))
+            self._file.write(data)
+            self._file.flush()
+        except OSError:
+            # A full disk or a removed directory must not stop the writer; the batch is lost
+            with self._lock:
+                self.dropped += len(batch)
+            self._close_file()
+            return
+        self._size += len(data)
+        self.written += len(batch)
+
+    def _open_file(self, incoming: int):
+        """Open the log file, rotating it first when it would grow past max_bytes or is from another day."""
+        today = date.today()
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+            # An existing file belongs to the day it was last written
+            self._day = date.fromtimestamp(os.path.getmtime(self.path)) if self._size else today
+        if self._size and (self._size + incoming > self.max_bytes or (self.rotate_daily and today != self._day)):
+            self._rotate()
+            self._file = open(self.path, "ab")
+            self._day = today
+
+    def _rotate(self):
+        self._close_file()
+        stem, ext = os.path.splitext(self.path)
+        rotated = f"{stem}.{datetime.now():%Y%m%dT%H%M%S%f}{ext}"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.remove(rotated)
+        self.rotations += 1
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._size = 0
+
+
+# Process-wide request log used by api.predict and the Streamlit app
+request_log = RequestLog()
+if os.environ.get("IMMO_ELIZA_REQUEST_LOG"):
+    request_log.enable()
@@ -0,0 +1,129 @@
+"""
+What-if sensitivity: how the predicted price of one property changes when one or two of
+its features are swept over a grid of values.
+
+Every grid point is a copy of the base property with the swept features replaced, and
+the whole grid (plus the base property itself) is scored with a single predict_records
+call, so a 200-point curve costs one encode and one model call instead of 200.
+
+Usage:
+    from api.sensitivity import sensitivity
+    sensitivity(property_dict, "total_area_sqm")                     # curve over the default grid
+    sensitivity(property_dict, ["construction_year", "epc"], points=20)  # surface, rows = first feature
+    sensitivity(property_dict, "nbr_bedrooms", values={"nbr_bedrooms": [1, 2, 3]})
+"""
+import itertools
+import math
+import numbers
+import os
+import sys
+from datetime import date
+
+import numpy as np
+
+# Add src folder to path to load the shared feature definitions
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from features import binary_flags, epc_mapping
+from .metrics import metrics
+from .predict import predict_records
+
+MAX_FEATURES = 2
+DEFAULT_POINTS = 50
+# Largest grid scored in one call (e.g. a 100 x 100 surface)
+MAX_GRID_POINTS = 10_000
+
+# Default sweep of the numeric features: (low, high, integer values only)
+NUMERIC_RANGES = {
+    "total_area_sqm": (30, 400, False),
+    "surface_land_sqm": (0, 2000, False),
+    "construction_year": (1900, date.today().year, True),
+    "nbr_frontages": (1, 4, True),
+    "nbr_bedrooms": (0, 8, True),
+    "terrace_sqm": (0, 100, False),
+    "garden_sqm": (0, 2000, False),
+    "primary_energy_consumption_sqm": (0, 600, False),
+}
+
+
+def check_points(points) -> int:
+    """points as a grid size, checked before any grid is built: an int from 2 to MAX_GRID_POINTS."""
+    if isinstance(points, bool) or not isinstance(points, numbers.Integral):
+        raise ValueError(f"points must be an integer, got {points!r}")
+    if not 2 <= points <= MAX_GRID_POINTS:
+        raise ValueError(f"points must be between 2 and {MAX_GRID_POINTS:,}, got {points}")
+    return int(points)
+
+
+def default_grid(feature: str, base: dict, points: int = DEFAULT_POINTS) -> list:
+    """
+    Values swept for feature when none are given: points evenly spaced values over
+    NUMERIC_RANGES (fewer for integer features with a short range), 0/1 for flags and,
+    for "epc", the ratings of the base property's region from best to worst.
+    """
+    if feature == "epc":
+        ratings = list(epc_mapping.get(base.get("region"), {}))
+        if not ratings:
+            raise ValueError(f"No EPC ratings for region {base.get('region')!r}; pass the epc values")
+        return ratings
+    if feature in binary_flags:
+        return [0, 1]
+    if feature in NUMERIC_RANGES:
+        points = check_points(points)
+        low, high, integer = NUMERIC_RANGES[feature]
+        grid = np.linspace(low, high, points)
+        if integer:
+            grid = np.unique(np.round(grid)).astype(int)
+        return grid.tolist()
+    raise ValueError(f"No default grid for {feature!r}; pass its values")
+
+
+def sensitivity(base: dict, features, values: dict = None, points: int = DEFAULT_POINTS,
+                engine: str = None, version: str = None) -> dict:
+    """
+    Predicted prices of base with one or two features swept.
+    features: a feature name or a list of one or two names
+    values: optional {feature: list of values}; other features get default_grid()
+    points: grid size of numeric features without explicit values (2 to MAX_GRID_POINTS)
+    Returns a JSON-ready dict: {"features": [...], "values": [[...], ...], "base": price,
+    "predictions": [...]} where predictions is a list for one feature and a list of rows
+    (one per value of the first feature) for two.
+    """
+    features = [features] if isinstance(features, str) else list(features)
+    if not 1 <= len(features) <= MAX_FEATURES:
+        raise ValueError(f"Expected 1 to {MAX_FEATURES} features to sweep, got {len(features)}")
+    if len(set(features)) != len(features):
+        raise ValueError("Features to sweep must be distinct")
+    values = values or {}
+    unknown = set(values) - set(features)
+    if unknown:
+        raise ValueError(f"Values given for features that aren't swept: {sorted(unknown)}")
+    # Sizes are checked before any grid is built, so an oversized request costs nothing
+    if any(f not in values for f in features):
+        points = check_points(points)
+    for feature, grid in values.items():
+        if isinstance(grid, (list, tuple)) and len(grid) > MAX_GRID_POINTS:
+            raise ValueError(f"{len(grid):,} values given for {feature!r}, at most {MAX_GRID_POINTS:,}")
+
+    stopwatch = metrics.stopwatch()
+    grids = [np.atleast_1d(values[f]).tolist() if f in values else default_grid(f, base, points)
+             for f in features]
+    if not all(grids):
+        raise ValueError("Every swept feature needs at least one value")
+    shape = [len(grid) for grid in grids]
+    if math.prod(shape) > MAX_GRID_POINTS:
+        raise ValueError(f"Grid of {' x '.join(map(str, shape))} points exceeds {MAX_GRID_POINTS:,}")
+
+    # The base property goes last, so it's scored in the same call
+    records = [{**base, **dict(zip(features, combo))} for combo in itertools.product(*grids)]
+    records.append(base)
+    stopwatch.lap("sensitivity.grid")
+
+    predictions = predict_records(records, engine, version)
+    stopwatch.total("sensitivity.total")
+
+    return {
+        "features": features,
+        "values": grids,
+        "base": float(predictions[-1]),
+        "predictions": predictions[:-1].reshape(shape).tolist(),
+    }
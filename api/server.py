@@ -0,0 +1,286 @@
+"""
+Asyncio HTTP prediction service with dynamic micro-batching (standard library only).
+
+Endpoints:
+    POST /predict        {"property_type": "HOUSE", ...}          -> {"prediction": 323206.75}
+    POST /predict/batch  {"records": [{...}, ...]} or [{...}, ...] -> {"predictions": [...]}
+    POST /sensitivity    {"property": {...}, "features": [...]}    -> {"values": [...], "predictions": [...]}
+    GET  /health                                                  -> {"status": "ok", ...}
+    GET  /metrics                                                 -> per-stage latency p50/p95/p99
+
+Concurrent /predict requests are queued and coalesced into micro-batches of at most
+--max-batch-size records, waiting at most --max-wait-ms for a batch to fill. Each batch
+is scored with one vectorized call on a worker thread, so the event loop never blocks.
+/predict requests and their predictions are written to the request log (api/request_log.py).
+A record with a missing feature or a value that isn't a number gets 400, never an imputed price.
+
+Usage (from the repo root):
+    python -m api.server --port 8000 --max-batch-size 64 --max-wait-ms 5
+"""
+import argparse
+import asyncio
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from .metrics import metrics
+from .predict import predict_batch, predict_records, registry
+from .request_log import request_log
+from .sensitivity import DEFAULT_POINTS, sensitivity
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Coalesces concurrently submitted records into batches scored by score_batch(list) -> array."""
+
+    def __init__(self, score_batch, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 executor: ThreadPoolExecutor = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self._queue = None
+        self._task = None
+        self.requests = 0
+        self.batches = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, record: dict) -> float:
+        """Queue one record and wait for its prediction."""
+        future = asyncio.get_running_loop().create_future()
+        self.requests += 1
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain whatever else is already waiting, up to the batch limit
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self.batches += 1
+            records = [record for record, _ in batch]
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.score_batch, records)
+            except Exception:
+                # Score one by one so a single bad record only fails its own request
+                predictions = [await self._score_one(loop, record) for record in records]
+
+            for (_, future), prediction in zip(batch, predictions):
+                if future.done():
+                    continue
+                if isinstance(prediction, Exception):
+                    future.set_exception(prediction)
+                else:
+                    future.set_result(float(prediction))
+
+    async def _score_one(self, loop, record):
+        try:
+            return (await loop.run_in_executor(self.executor, self.score_batch, [record]))[0]
+        except Exception as e:
+            return e
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class PredictionServer:
+    """Minimal HTTP/1.1 server (keep-alive, JSON bodies) on top of asyncio streams."""
+
+    def __init__(self, batcher: MicroBatcher, score_bulk=predict_batch):
+        self.batcher = batcher
+        self.score_bulk = score_bulk
+        self.started_at = time.time()
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                keep_alive = await self._handle_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _handle_request(self, head: bytes, reader, writer) -> bool:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            self._write(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        try:
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            body = await reader.readexactly(length) if length else b""
+            status, payload = HTTPStatus.OK, await self._route(method, path.split("?", 1)[0], body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": str(e)}
+        except asyncio.IncompleteReadError:
+            return False
+        except Exception as e:
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Prediction failed: {e}"}
+
+        self._write(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _route(self, method: str, path: str, body: bytes):
+        routes = {"/predict": "POST", "/predict/batch": "POST", "/sensitivity": "POST", "/health": "GET",
+                  "/metrics": "GET"}
+        if path not in routes:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        if method != routes[path]:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if path == "/metrics":
+            return {"enabled": metrics.enabled, "stages": metrics.snapshot()}
+        if path == "/health":
+            return {"status": "ok", "uptime_seconds": time.time() - self.started_at,
+                    "batching": self.batcher.stats(), "models": registry.info(),
+                    "request_log": request_log.stats()}
+
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+
+        if path == "/predict":
+            if not isinstance(data, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a JSON object with property features")
+            start = time.perf_counter()
+            try:
+                prediction = await self.batcher.submit(data)
+            except Exception as e:
+                request_log.log("server", data, error=e, seconds=time.perf_counter() - start)
+                if isinstance(e, ValueError):
+                    # Rejected by the encoder: a missing feature or a value that isn't a number
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+                raise
+            request_log.log("server", data, prediction=prediction, seconds=time.perf_counter() - start)
+            return {"prediction": prediction}
+
+        loop = asyncio.get_running_loop()
+        if path == "/sensitivity":
+            if not isinstance(data, dict) or not isinstance(data.get("property"), dict) or "features" not in data:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected {\"property\": {...}, \"features\": [...]}")
+            points = data.get("points", DEFAULT_POINTS)
+            if isinstance(points, bool) or not isinstance(points, int):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"points must be an integer, got {points!r}")
+            sweep = functools.partial(sensitivity, data["property"], data["features"], data.get("values"), points)
+            try:
+                # The whole grid is one vectorized call, scored next to the micro-batches
+                return await loop.run_in_executor(self.batcher.executor, sweep)
+            except (TypeError, ValueError) as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+
+        records = data.get("records") if isinstance(data, dict) else data
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a list of records or {\"records\": [...]}")
+        try:
+            # predict_batch checks every record's columns, so one incomplete record isn't imputed
+            predictions = await loop.run_in_executor(self.batcher.executor, self.score_bulk, records)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        return {"predictions": [float(p) for p in predictions]}
+
+    @staticmethod
+    def _write(writer, status: HTTPStatus, payload, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+
+
+async def main(host: str, port: int, max_batch_size: int, max_wait_ms: float):
+    # Load artifacts before accepting traffic so the first request isn't slow
+    registry.get()
+    request_log.enable()
+    server = PredictionServer(MicroBatcher(predict_records, max_batch_size, max_wait_ms))
+    host, port = await server.start(host, port)
+    print(f"Serving predictions on http://{host}:{port}")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Immo Eliza prediction HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,123 @@
+# test_bulk_score.py
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.bulk_score import checkpoint_path, count_rows, iter_chunks, run
+from api.predict import predict_batch
+from api.fixtures import make_records
+
+def write_jsonl(path, records, bad_line_at=None):
+    lines = [json.dumps(dict(r, id=f"prop-{i}")) for i, r in enumerate(records)]
+    if bad_line_at is not None:
+        lines.insert(bad_line_at, "{not json")
+    path.write_text("\n".join(lines) + "\n")
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_jsonl_scoring_with_per_record_errors(tmp_path):
+    records = make_records(23)
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, records, bad_line_at=5)
+
+    summary = run(str(source), str(output), chunk_size=4, log=io.StringIO())
+    results = read_jsonl(output)
+    assert summary["rows"] == 24 and summary["errors"] == 1
+    assert results[5]["error"].startswith("Invalid JSON") and results[5]["id"] == 5
+    good = [r for r in results if r["error"] is None]
+    assert [r["id"] for r in good] == [f"prop-{i}" for i in range(23)]
+    np.testing.assert_allclose([r["prediction"] for r in good], predict_batch(records))
+
+def test_invalid_values_get_an_error_not_a_price(tmp_path):
+    records = make_records(4)
+    records[1]["total_area_sqm"] = "abc"
+    del records[2]["province"]
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, records)
+
+    summary = run(str(source), str(output), chunk_size=4, log=io.StringIO())
+    results = read_jsonl(output)
+    assert summary["errors"] == 2
+    assert [r["prediction"] is None for r in results] == [False, True, True, False]
+    assert results[1]["error"].startswith("ValueError") and "'abc'" in results[1]["error"]
+    assert "province" in results[2]["error"]
+    np.testing.assert_allclose([results[0]["prediction"], results[3]["prediction"]],
+                               predict_batch([records[0], records[3]]))
+
+def test_missing_column_error_does_not_depend_on_the_chunk(tmp_path):
+    # Only one invalid record, next to valid ones that have the column: it must not be imputed
+    records = make_records(3)
+    del records[1]["total_area_sqm"]
+    source = tmp_path / "in.jsonl"
+    write_jsonl(source, records)
+
+    for chunk_size in (1, 3):
+        output = tmp_path / f"out-{chunk_size}.jsonl"
+        summary = run(str(source), str(output), chunk_size=chunk_size, log=io.StringIO())
+        results = read_jsonl(output)
+        assert summary["errors"] == 1 and results[1]["prediction"] is None
+        assert "total_area_sqm" in results[1]["error"]
+        np.testing.assert_allclose([results[0]["prediction"], results[2]["prediction"]],
+                                   predict_batch([records[0], records[2]]))
+
+def test_resume_after_crash_continues_from_checkpoint(tmp_path):
+    records = make_records(20)
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(source, records)
+    run(str(source), str(output), chunk_size=8, log=io.StringIO())
+    expected = read_jsonl(output)
+
+    # Simulate a crash after the first chunk: checkpoint at 8 rows, partial output after it
+    checkpoint = json.loads(open(checkpoint_path(str(output))).read())
+    first_chunk = list(iter_chunks(str(source), 8))[0]
+    size = len("".join(json.dumps(r) + "\n" for r in expected[:8]).encode())
+    checkpoint.update(input_offset=first_chunk.end_offset, rows_done=8, output_bytes=size)
+    open(checkpoint_path(str(output)), "w").write(json.dumps(checkpoint))
+    with open(output, "r+b") as f:
+        f.truncate(size + 10)
+
+    summary = run(str(source), str(output), chunk_size=8, resume=True, log=io.StringIO())
+    assert summary["rows"] == 12
+    assert read_jsonl(output) == expected
+
+def test_csv_to_parquet_with_start_row(tmp_path):
+    records = make_records(10)
+    source, output = tmp_path / "in.csv", tmp_path / "out.parquet"
+    pd.DataFrame(records).to_csv(source, index=False)
+
+    run(str(source), str(output), chunk_size=3, start_row=4, log=io.StringIO())
+    scored = pd.read_parquet(output)
+    assert scored["row"].tolist() == list(range(4, 10))
+    np.testing.assert_allclose(scored["prediction"], predict_batch(records[4:]))
+
+def test_unsupported_output_format(tmp_path):
+    with pytest.raises(ValueError):
+        run("in.jsonl", str(tmp_path / "out.xlsx"))
+
+def test_excel_to_csv_reports_progress(tmp_path):
+    pytest.importorskip("openpyxl")
+    records = make_records(11)
+    source, output = tmp_path / "in.xlsx", tmp_path / "out.csv"
+    pd.DataFrame(records).to_excel(source, index=False)
+    assert count_rows(str(source)) == 11
+
+    progress = []
+    run(str(source), str(output), chunk_size=4, log=io.StringIO(), progress=lambda rows, errors: progress.append(rows))
+    assert progress == [4, 8, 11]
+    scored = pd.read_csv(output)
+    assert scored.columns.tolist() == ["id", "row", "prediction", "error"]
+    np.testing.assert_allclose(scored["prediction"], predict_batch(records))
+
+def test_process_pool_preserves_order_and_results(tmp_path):
+    records = make_records(30)
+    source = tmp_path / "in.jsonl"
+    write_jsonl(source, records, bad_line_at=7)
+    run(str(source), str(tmp_path / "serial.jsonl"), chunk_size=4, log=io.StringIO())
+    summary = run(str(source), str(tmp_path / "parallel.jsonl"), chunk_size=4, workers=2,
+                  log=io.StringIO())
+    assert summary["workers"] == 2
+    assert read_jsonl(tmp_path / "parallel.jsonl") == read_jsonl(tmp_path / "serial.jsonl")
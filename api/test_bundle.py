@@ -0,0 +1,56 @@
+# test_bundle.py
+import json
+
+import numpy as np
+import pytest
+
+from api.bundle import BundleError, compare_artifacts, export_bundle, load_bundle
+from api.predict import predict, predict_batch
+from api.registry import registry
+from api.fixtures import make_records
+
+@pytest.fixture
+def bundle_dir(tmp_path):
+    loaded = registry.get()
+    X_check = np.random.default_rng(0).normal(size=(200, loaded.encoder.n_features))
+    export_bundle(loaded.encoder, loaded.flat_model, str(tmp_path),
+                  reference_model=loaded.model, X_check=X_check)
+    return tmp_path
+
+def test_bundle_is_memory_mapped_and_verified(bundle_dir):
+    manifest = json.loads((bundle_dir / "manifest.json").read_text())
+    assert manifest["verification"]["max_abs_diff"] < 1e-6
+    bundle = load_bundle(str(bundle_dir))
+    # Zero-copy: the evaluator works on read-only views of the mapped files
+    for array in (bundle.flat_model.value, bundle.flat_model.threshold32, bundle.flat_model.feature):
+        assert not array.flags.owndata and not array.flags.writeable
+
+def test_bundle_predictions_match_pickle(bundle_dir):
+    registry.register_bundle("test-bundle", str(bundle_dir))
+    records = make_records(15)
+    np.testing.assert_allclose(predict_batch(records, version="test-bundle"), predict_batch(records))
+    assert predict(records[0], version="test-bundle") == pytest.approx(predict(records[0]))
+
+def test_checksum_mismatch_is_rejected(bundle_dir):
+    path = bundle_dir / "tree_value.npy"
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(BundleError):
+        load_bundle(str(bundle_dir))
+
+def test_compact_bundle_is_smaller_and_served(tmp_path):
+    loaded = registry.get()
+    X_check = np.random.default_rng(0).normal(size=(200, loaded.encoder.n_features))
+    manifest = export_bundle(loaded.encoder, loaded.flat_model, str(tmp_path / "compact"),
+                             reference_model=loaded.model, X_check=X_check, compact_tolerance=1.0)
+    assert manifest["verification"]["max_abs_diff"] < 1.0 + 0.5
+    assert "tree_threshold.npy" not in manifest["files"]
+
+    report = compare_artifacts(loaded, str(tmp_path / "compact"), X_check)
+    assert report["bundle"]["bytes"] < report["pickle"]["bytes"]
+    registry.register_bundle("test-compact", str(tmp_path / "compact"))
+    records = make_records(15)
+    np.testing.assert_allclose(predict_batch(records, version="test-compact"), predict_batch(records), atol=1.5)
+    # Shipped compact export of the default model
+    assert predict(records[0], version="compact") == pytest.approx(predict(records[0]), abs=1.5)
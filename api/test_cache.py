@@ -0,0 +1,89 @@
+# test_cache.py
+import os
+
+import pytest
+
+from api.cache import PredictionCache
+from api.predict import cached_predict, predict, prediction_cache
+from api.fixtures import sample_input
+
+def make_cache(**kwargs):
+    return PredictionCache(["total_area_sqm", "fl_garden"], ["region"], **kwargs)
+
+def test_canonical_key_ignores_extra_keys_and_normalizes_types():
+    cache = make_cache()
+    a = {"total_area_sqm": 120, "fl_garden": True, "region": "Flanders", "zip_code": "2000"}
+    b = {"total_area_sqm": 120.0, "fl_garden": 1, "region": "Flanders"}
+    assert cache.key(a) == cache.key(b)
+    assert cache.key(a) != cache.key(dict(b, fl_garden=False))
+
+def test_absent_and_unparsable_values_dont_share_the_missing_key():
+    cache = make_cache()
+    missing = {"total_area_sqm": None, "fl_garden": True, "region": None}
+    assert cache.key(missing) == cache.key(dict(missing, total_area_sqm=float("nan")))
+    assert cache.key(missing) != cache.key(dict(missing, total_area_sqm="abc"))
+    assert cache.key(missing) != cache.key({"fl_garden": True, "region": None})
+    assert cache.key(missing) != cache.key({"total_area_sqm": None, "fl_garden": True})
+
+def test_lru_eviction_and_counters():
+    cache = make_cache(max_size=2)
+    calls = []
+    def compute(area):
+        return lambda: calls.append(area) or area * 10.0
+    for area in (1, 2, 1, 3, 2):
+        cache.get_or_compute({"total_area_sqm": area}, compute(area))
+    # 1 is reused, 2 is evicted by 3 and recomputed afterwards
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats()["hits"] == 1 and cache.stats()["evictions"] == 2
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("api.cache.time.monotonic", lambda: now[0])
+    cache = make_cache(ttl=5)
+    cache.get_or_compute({"total_area_sqm": 1}, lambda: 1.0)
+    now[0] += 10
+    assert cache.get_or_compute({"total_area_sqm": 1}, lambda: 2.0) == 2.0
+    assert cache.stats()["expirations"] == 1
+
+def test_model_file_change_invalidates(tmp_path):
+    model_file = tmp_path / "model.pkl"
+    model_file.write_bytes(b"v1")
+    reloads = []
+    cache = make_cache(model_path=str(model_file), on_invalidate=lambda: reloads.append(1))
+    cache.get_or_compute({"total_area_sqm": 1}, lambda: 1.0)
+    model_file.write_bytes(b"v2 model")
+    os.utime(model_file, ns=(0, 123))
+    assert cache.get_or_compute({"total_area_sqm": 1}, lambda: 2.0) == 2.0
+    assert cache.stats()["invalidations"] == 1 and reloads == [1]
+
+def test_context_is_part_of_the_key():
+    cache = make_cache()
+    cache.get_or_compute({"total_area_sqm": 1}, lambda: 1.0, ("sklearn", "default"))
+    assert cache.get_or_compute({"total_area_sqm": 1}, lambda: 2.0, ("flat", "default")) == 2.0
+    assert cache.get_or_compute({"total_area_sqm": 1}, lambda: 3.0, ("sklearn", "compact")) == 3.0
+    assert cache.get_or_compute({"total_area_sqm": 1}, lambda: 4.0, ("sklearn", "default")) == 1.0
+
+def test_cached_predict_matches_predict():
+    prediction_cache.clear()
+    first = cached_predict(sample_input)
+    assert cached_predict(dict(sample_input, zip_code="2000")) == first
+    assert first == pytest.approx(predict(sample_input))
+    assert prediction_cache.stats()["hits"] >= 1
+
+def test_cached_predict_reloads_a_rewritten_model(monkeypatch):
+    prediction_cache.clear()
+    cached_predict(sample_input)
+    unloaded = []
+    monkeypatch.setattr("api.predict.registry.unload", lambda name=None: unloaded.append(name))
+    # The cache sees a new model file version
+    monkeypatch.setattr(prediction_cache, "_model_version", ("old", 0))
+    cached_predict(sample_input)
+    assert unloaded == [None]
+
+def test_cached_predict_still_rejects_invalid_input_after_a_missing_value():
+    prediction_cache.clear()
+    cached_predict(dict(sample_input, total_area_sqm=None))
+    with pytest.raises(ValueError):
+        cached_predict(dict(sample_input, total_area_sqm="abc"))
+    with pytest.raises(ValueError):
+        cached_predict({k: v for k, v in sample_input.items() if k != "total_area_sqm"})
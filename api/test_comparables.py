@@ -0,0 +1,39 @@
+# test_comparables.py
+import numpy as np
+import pytest
+
+from api.comparables import ComparablesIndex, find_comparables
+from api.fixtures import sample_input, training_frame
+
+@pytest.fixture(scope="module")
+def listings():
+    X, y = training_frame(600)
+    df = X.assign(price=y)
+    df.loc[::7, "construction_year"] = np.nan
+    return df
+
+def test_comparables_match_brute_force_within_partition(listings):
+    index = ComparablesIndex.build(listings)
+    record = dict(sample_input, region="Wallonia", total_area_sqm=1234, construction_year=None)
+    comparables = index.query(record, k=5)
+
+    assert len(comparables) == 5
+    assert all(c["region"] == "Wallonia" and c["property_type"] == "HOUSE" for c in comparables)
+    partition = listings[(listings["region"] == "Wallonia") & (listings["property_type"] == "HOUSE")]
+    expected = np.sort([np.linalg.norm(index.encode(row) - index.encode(record))
+                        for row in partition.to_dict("records")])[:5]
+    np.testing.assert_allclose([c["distance"] for c in comparables], expected)
+
+def test_unknown_partition_falls_back_to_all_listings(listings):
+    index = ComparablesIndex.build(listings)
+    comparables = index.query(dict(sample_input, region="Atlantis"), k=3)
+    assert len(comparables) == 3 and comparables[0]["region"] in ("Flanders", "Wallonia", "Brussels-Capital")
+
+def test_saved_index_is_served(listings, tmp_path, monkeypatch):
+    monkeypatch.setenv("IMMO_ELIZA_MODELS_DIR", str(tmp_path))
+    ComparablesIndex.build(listings).save(str(tmp_path / "comparables.pkl"))
+    listing = listings.iloc[14].to_dict()
+    nearest = find_comparables(listing, k=1)[0]
+    # A training listing is its own nearest comparable
+    assert nearest["distance"] == 0 and nearest["price"] == pytest.approx(listing["price"])
+    assert nearest["construction_year"] is None
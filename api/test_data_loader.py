@@ -0,0 +1,44 @@
+# test_data_loader.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from api.fixtures import make_records
+import data_loader
+from data_loader import SCHEMA, cache_path, load_training_data
+
+def write_csv(path, n=50):
+    df = pd.DataFrame(make_records(n))
+    df["price"] = 2_000.0 * df["total_area_sqm"]
+    df["locality"] = "Antwerpen"  # columns not used for training are skipped
+    df.loc[3, ["nbr_bedrooms", "construction_year"]] = np.nan
+    df = df.astype({c: int for c in df.columns if c.startswith("fl_")})
+    df.to_csv(path, index=False)
+    return df
+
+def test_loads_compact_dtypes_through_parquet_cache(tmp_path, monkeypatch):
+    csv = tmp_path / "listings.csv"
+    source = write_csv(csv)
+
+    df = load_training_data(str(csv), block_size=1 << 10)
+    assert sorted(df.columns) == sorted(SCHEMA.names)
+    assert df["region"].dtype == "category" and df["total_area_sqm"].dtype == np.float32
+    assert df["nbr_bedrooms"].dtype == "Int16" and df["nbr_bedrooms"].isna().sum() == 1
+    assert df["fl_garden"].dtype == np.int8
+    np.testing.assert_allclose(df["price"], source["price"])
+    assert df["region"].astype(object).tolist() == source["region"].tolist()
+    assert os.path.exists(cache_path(str(csv)))
+
+    # Second load reads the cache without parsing the CSV again
+    monkeypatch.setattr(data_loader, "iter_csv_tables", None)
+    pd.testing.assert_frame_equal(load_training_data(str(csv)), df)
+
+def test_cache_is_keyed_by_file_content(tmp_path):
+    csv = tmp_path / "listings.csv"
+    write_csv(csv, 10)
+    first = cache_path(str(csv))
+    write_csv(csv, 12)
+    assert cache_path(str(csv)) != first
+    assert len(load_training_data(str(csv))) == 12
+    assert len(load_training_data(str(csv), use_cache=False)) == 12
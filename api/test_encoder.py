@@ -0,0 +1,35 @@
+# test_encoder.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.predict import encoder, predict, predict_batch, preprocess_for_prediction, preprocessor
+from api.fixtures import make_records, sample_input
+
+def reference_transform(records):
+    return preprocessor.transform(preprocess_for_prediction(pd.DataFrame(records)))
+
+def test_encoder_matches_preprocessor_transform():
+    records = preprocess_for_prediction(pd.DataFrame(make_records(20))).to_dict("records")
+    np.testing.assert_allclose(encoder.encode_many(records), reference_transform(records), atol=1e-12)
+
+def test_encoder_handles_missing_and_unknown_values():
+    record = dict(sample_input, construction_year=None, total_area_sqm=None, garden_sqm=np.nan,
+                  heating_type="NUCLEAR", province=None, epc_mapped="good")
+    np.testing.assert_allclose(encoder.encode(record), reference_transform([record])[0], atol=1e-12)
+
+def test_predict_fast_path_matches_batch_pipeline():
+    records = make_records(10)
+    fast = np.array([predict(r) for r in records])
+    np.testing.assert_allclose(fast, predict_batch(records))
+
+@pytest.mark.parametrize("record", [
+    dict(sample_input, total_area_sqm="abc"),
+    {k: v for k, v in sample_input.items() if k != "province"},
+    {k: v for k, v in sample_input.items() if k != "garden_sqm"},
+], ids=["unparsable number", "missing category", "missing number"])
+def test_invalid_records_fail_like_the_batch_pipeline(record):
+    with pytest.raises(ValueError):
+        predict_batch([record])
+    with pytest.raises(ValueError):
+        predict(record)
@@ -0,0 +1,18 @@
+# test_epc_mapping.py
+import numpy as np
+import pandas as pd
+
+from api.predict import preprocess_for_prediction
+from features import epc_mapping, map_epc
+
+def test_map_epc_matches_nested_dict_lookup():
+    regions = list(epc_mapping) + ["MISSING", None]
+    ratings = ["A++", "A+", "A", "B", "C", "D", "E", "F", "G", "X", None]
+    df = pd.DataFrame([(r, e) for r in regions for e in ratings], columns=["region", "epc"])
+    expected = [epc_mapping.get(r, {}).get(e, "MISSING") for r, e in zip(df["region"], df["epc"])]
+    assert list(map_epc(df)) == expected
+
+def test_missing_epc_column_maps_to_missing():
+    df = preprocess_for_prediction(pd.DataFrame([{"region": "Flanders"}]))
+    assert df["epc_mapped"].tolist() == ["MISSING"]
+    assert map_epc(pd.DataFrame({"region": [], "epc": []})).shape == (0,)
@@ -0,0 +1,50 @@
+# test_feature_cache.py
+import numpy as np
+
+from api.fixtures import training_frame
+from feature_cache import feature_key, featurize
+from preprocess_module import make_preprocessor
+from trainers import train
+
+def test_second_featurize_is_a_memory_mapped_cache_hit(tmp_path, monkeypatch):
+    X, _ = training_frame(60)
+    expected = make_preprocessor().fit_transform(X[:40])
+
+    _, X_train, X_val, info = featurize(make_preprocessor(), X[:40], X[40:], cache_dir=str(tmp_path))
+    assert not info["hit"]
+    np.testing.assert_array_equal(X_train, expected)
+
+    # A hit neither fits nor transforms
+    monkeypatch.setattr("sklearn.compose.ColumnTransformer.fit", None)
+    fitted, X_train_cached, X_val_cached, info = featurize(make_preprocessor(), X[:40], X[40:],
+                                                           cache_dir=str(tmp_path))
+    assert info["hit"] and isinstance(X_train_cached, np.memmap)
+    np.testing.assert_array_equal(X_train_cached, expected)
+    np.testing.assert_array_equal(X_val_cached, X_val)
+    np.testing.assert_array_equal(fitted.transform(X[40:]), X_val)
+
+def test_key_covers_data_and_preprocessor_definition():
+    X, _ = training_frame(30)
+    key = feature_key(make_preprocessor(), X)
+    assert feature_key(make_preprocessor(), X.copy()) == key
+    assert feature_key(make_preprocessor(native_categorical=True), X) != key
+    assert feature_key(make_preprocessor().set_params(num__imputer__strategy="mean"), X) != key
+    changed = X.copy()
+    changed.loc[0, "total_area_sqm"] += 1
+    assert feature_key(make_preprocessor(), changed) != key
+
+def test_retraining_reuses_features(tmp_path):
+    X, y = training_frame(80)
+    first = train("hist", X[:60], y[:60], X[60:], y[60:], feature_cache=str(tmp_path))[2]
+    second = train("hist", X[:60], y[:60], X[60:], y[60:], feature_cache=str(tmp_path))[2]
+    assert not first["feature_cache_hit"] and second["feature_cache_hit"]
+    assert second["val_mae"] == first["val_mae"]
+
+def test_sparse_features_are_cached_as_csr(tmp_path):
+    X, _ = training_frame(40)
+    expected = make_preprocessor(sparse=True).fit_transform(X)
+    featurize(make_preprocessor(sparse=True), X, cache_dir=str(tmp_path))
+    _, X_cached, _, info = featurize(make_preprocessor(sparse=True), X, cache_dir=str(tmp_path))
+    # Parts are read-only views of the memory-mapped files, not copies
+    assert info["hit"] and X_cached.format == "csr" and not X_cached.data.flags.writeable
+    np.testing.assert_array_equal(X_cached.toarray(), expected.toarray())
@@ -0,0 +1,74 @@
+# test_incremental.py
+import json
+import os
+
+import joblib
+import numpy as np
+
+from api.fixtures import training_frame
+from incremental import latest_version, load_version, n_stages, promote, row_hashes, update, write_version
+from trainers import train
+
+def base_version(tmp_path, trainer, df):
+    X, y = df.drop(columns=["price"]), df["price"]
+    preprocessor, model, report = train(trainer, X[:-50], y[:-50], X[-50:], y[-50:])
+    return write_version(preprocessor, model, row_hashes(df), {
+        "parent": None, "mode": "full", "trainer": trainer, "metrics": {"val_mae": report["val_mae"]}},
+        str(tmp_path))
+
+def frame(n=300):
+    # Shuffled: the areas of make_records grow with the row number
+    X, y = training_frame(n)
+    return X.assign(price=y).sample(frac=1, random_state=0, ignore_index=True)
+
+def test_no_new_rows_makes_no_version(tmp_path):
+    df = frame()
+    parent = base_version(tmp_path, "gbr", df)
+    # Same rows in another order and with another index
+    assert update(df.sample(frac=1, random_state=1).reset_index(drop=True), parent, versions_dir=str(tmp_path)) is None
+    assert latest_version(str(tmp_path)) == parent
+
+def test_appended_rows_warm_start_on_the_same_preprocessor(tmp_path):
+    df = frame()
+    parent = base_version(tmp_path, "hist", df[:200])
+    parent_preprocessor, parent_model, _, _ = load_version(parent)
+
+    child = update(df, parent, extra_stages=5, drift_threshold=0.5, versions_dir=str(tmp_path))
+    preprocessor, model, hashes, lineage = load_version(child)
+    assert latest_version(str(tmp_path)) == child
+    assert lineage["mode"] == "warm_start" and lineage["parent"] == os.path.basename(parent)
+    assert lineage["data"] == {"rows": 300, "new_rows": 100}
+    assert n_stages(model) == n_stages(parent_model) + 5 == lineage["stages"]
+    # The preprocessor is reused unchanged and every row is now seen
+    assert joblib.hash(preprocessor) == joblib.hash(parent_preprocessor)
+    np.testing.assert_array_equal(hashes, row_hashes(df))
+    assert update(df, child, versions_dir=str(tmp_path)) is None
+
+def test_drifted_rows_trigger_a_full_refit(tmp_path):
+    df = frame()
+    parent = base_version(tmp_path, "gbr", df[:200])
+    # Prices of the new listings doubled
+    df.loc[200:, "price"] *= 2
+
+    child = update(df, parent, versions_dir=str(tmp_path))
+    with open(os.path.join(child, "lineage.json")) as f:
+        lineage = json.load(f)
+    assert lineage["mode"] == "full_refit"
+    assert lineage["metrics"]["drift"] > lineage["metrics"]["drift_threshold"]
+    assert lineage["metrics"]["new_rows_mae_after"] < lineage["metrics"]["new_rows_mae_before"]
+
+def test_promote_rebuilds_every_served_artifact(tmp_path):
+    df = frame()
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    gbr = base_version(tmp_path / "versions", "gbr", df)
+    manifests = promote(gbr, df, str(models_dir))
+    assert set(manifests) == {"bundle", "compact"}
+    assert (models_dir / "bundle" / "manifest.json").exists() and (models_dir / "compact" / "manifest.json").exists()
+    assert (models_dir / "comparables.pkl").exists()
+    assert joblib.hash(joblib.load(models_dir / "model.pkl")) == joblib.hash(load_version(gbr)[1])
+
+    # The bundles of the gbr model must not outlive it
+    hist = base_version(tmp_path / "versions", "hist", df)
+    assert promote(hist, df, str(models_dir)) == {}
+    assert not (models_dir / "bundle").exists() and not (models_dir / "compact").exists()
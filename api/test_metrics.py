@@ -0,0 +1,35 @@
+# test_metrics.py
+from api.metrics import BUCKET_BOUNDS, Histogram, StageMetrics
+from api.predict import metrics, predict, predict_batch
+from api.fixtures import make_records, sample_input
+
+def test_histogram_percentiles_follow_the_buckets():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.record(0.001)
+    for _ in range(10):
+        histogram.record(0.1)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    # Reported percentiles are bucket upper bounds, within one bucket (20%) of the true value
+    assert 1.0 <= summary["p50_ms"] <= 1.2
+    assert 100.0 <= summary["p95_ms"] <= 120.0 and summary["p99_ms"] <= summary["max_ms"] + 1e-9
+    assert abs(summary["mean_ms"] - 10.9) < 1e-6
+    assert BUCKET_BOUNDS[-1] > 60
+
+def test_disabled_metrics_record_nothing():
+    stage_metrics = StageMetrics(enabled=False)
+    stopwatch = stage_metrics.stopwatch()
+    stopwatch.lap("a")
+    stopwatch.total("total")
+    assert stage_metrics.snapshot() == {}
+
+def test_predict_records_its_stages():
+    metrics.reset()
+    predict(sample_input)
+    predict_batch(make_records(3))
+    snapshot = metrics.snapshot()
+    for stage in ("predict.preprocess", "predict.encode", "predict.model", "predict.total",
+                  "batch.frame", "batch.preprocess", "batch.transform", "batch.model", "batch.total"):
+        assert snapshot[stage]["count"] == 1
+    assert snapshot["predict.total"]["mean_ms"] >= snapshot["predict.model"]["mean_ms"]
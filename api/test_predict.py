@@ -1,5 +1,8 @@
 # test_predict.py
-from predict import predict
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.predict import predict
 
 # Sample input for one property (fill in values as appropriate)
 sample_input = {
@@ -0,0 +1,34 @@
+# test_predict_batch.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.fixtures import make_records, sample_input
+from api.predict import predict, predict_batch
+
+def test_batch_matches_single_row_path():
+    records = make_records(12)
+    expected = np.array([predict(r) for r in records])
+    np.testing.assert_allclose(predict_batch(records, chunk_size=5), expected)
+
+def test_batch_accepts_dataframe_and_generator():
+    records = make_records(7)
+    from_list = predict_batch(records)
+    np.testing.assert_allclose(predict_batch(pd.DataFrame(records), chunk_size=3), from_list)
+    np.testing.assert_allclose(predict_batch((r for r in records), chunk_size=2), from_list)
+
+def test_batch_empty_and_invalid_chunk_size():
+    assert predict_batch([]).shape == (0,)
+    with pytest.raises(ValueError):
+        predict_batch(make_records(1), chunk_size=0)
+
+def test_record_missing_a_column_fails_the_batch_like_predict():
+    good, bad = make_records(2)
+    del bad["total_area_sqm"]
+    with pytest.raises(ValueError, match="total_area_sqm"):
+        predict(bad)
+    # Not imputed because the other records of the chunk have the column
+    with pytest.raises(ValueError, match="total_area_sqm"):
+        predict_batch([good, bad])
+    with pytest.raises(ValueError, match="total_area_sqm"):
+        predict_batch(iter([good, bad]), chunk_size=1)
@@ -0,0 +1,43 @@
+# test_registry.py
+import threading
+
+import pytest
+
+from api.registry import ArtifactRegistry, DEFAULT_VERSION
+
+def test_artifacts_load_lazily_and_once():
+    registry = ArtifactRegistry()
+    assert registry.info()[DEFAULT_VERSION]["loaded"] is False
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(loaded) for loaded in results}) == 1
+    info = registry.info()[DEFAULT_VERSION]
+    assert info["loaded"] and info["load_seconds"] > 0
+    assert info["artifact_bytes"]["model"] > 0
+
+def test_paths_do_not_depend_on_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert ArtifactRegistry().get().model is not None
+
+def test_named_versions():
+    registry = ArtifactRegistry()
+    default_paths = registry.paths()
+    registry.register("v2", default_paths["preprocessor"], default_paths["model"])
+    assert "v2" in registry.versions()
+    assert registry.get("v2") is not registry.get()
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+def test_flat_engine_refuses_non_gbr_models():
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    loaded = ArtifactRegistry().get()
+    loaded.model = HistGradientBoostingRegressor()
+    with pytest.raises(TypeError, match="--trainer gbr"):
+        loaded.flat_model
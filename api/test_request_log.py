@@ -0,0 +1,94 @@
+# test_request_log.py
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from api.request_log import DEFAULT_PATH, RequestLog
+from api.fixtures import sample_input
+
+@pytest.fixture(autouse=True)
+def no_log_setting(monkeypatch):
+    monkeypatch.delenv("IMMO_ELIZA_REQUEST_LOG", raising=False)
+
+def read_lines(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+def test_entries_are_written_in_the_background(tmp_path):
+    path = str(tmp_path / "requests.jsonl")
+    log = RequestLog(path)
+    log.log("predict", sample_input, prediction=1.0)  # not enabled yet: ignored
+    assert log.enable()
+
+    @log.logged("predict")
+    def score(input_data):
+        if input_data.get("bad"):
+            raise ValueError("bad record")
+        return 2.0
+
+    score(sample_input)
+    with pytest.raises(ValueError):
+        score({"bad": True})
+    assert log.flush()
+    log.close()
+
+    good, bad = read_lines(path)
+    assert good["input"] == sample_input and good["prediction"] == 2.0 and good["source"] == "predict"
+    assert good["time"].endswith("Z") and good["latency_ms"] >= 0
+    assert bad["error"] == "bad record" and "prediction" not in bad
+    assert log.stats()["written"] == 2 and not log.stats()["enabled"]
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    # The writer only wakes for a full batch or after an hour, so nothing is drained meanwhile
+    log = RequestLog(str(tmp_path / "requests.jsonl"), max_queue=3, batch_size=100, flush_interval=3600)
+    log.enable()
+    start = time.perf_counter()
+    for i in range(10):
+        log.log("predict", {"i": i}, prediction=float(i))
+    assert time.perf_counter() - start < 0.5
+    assert log.stats()["dropped"] == 7
+    log.flush()
+    log.close()
+    assert [entry["input"]["i"] for entry in read_lines(log.path)] == [0, 1, 2]
+
+def test_rotation_by_size_and_day_is_compressed(tmp_path):
+    path = str(tmp_path / "requests.jsonl")
+    # A file left over from yesterday is rotated before the first write
+    with open(path, "w") as f:
+        f.write(json.dumps({"input": {"i": -1}}) + "\n")
+    yesterday = time.time() - 86400
+    os.utime(path, (yesterday, yesterday))
+
+    log = RequestLog(path, batch_size=1, max_bytes=400)
+    log.enable()
+    for i in range(6):
+        log.log("predict", {"i": i, "padding": "x" * 100}, prediction=float(i))
+        log.flush()
+    log.close()
+
+    rotated = sorted(str(p) for p in tmp_path.glob("requests.*.jsonl.gz"))
+    assert log.stats()["rotations"] == len(rotated) >= 3
+    assert not list(tmp_path.glob("requests.*.jsonl"))
+    entries = [e for p in rotated + [path] for e in read_lines(p)]
+    assert sorted(e["input"]["i"] for e in entries) == [-1, 0, 1, 2, 3, 4, 5]
+    assert os.path.getsize(path) <= 400
+
+def test_default_path_is_under_the_repo_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert RequestLog().path == DEFAULT_PATH == os.path.join(repo_root, "logs", "requests.jsonl")
+
+def test_cached_predict_leaves_the_entry_to_its_caller(monkeypatch):
+    from api.predict import cached_predict, predict, request_log
+    sources = []
+    monkeypatch.setattr(request_log, "enabled", True)
+    monkeypatch.setattr(request_log, "log", lambda source, *args, **kwargs: sources.append(source))
+    # A cache miss scores the record without a "predict" entry of its own
+    cached_predict(dict(sample_input, total_area_sqm=137))
+    assert sources == []
+    predict(sample_input)
+    assert sources == ["predict"]
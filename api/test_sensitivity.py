@@ -0,0 +1,54 @@
+# test_sensitivity.py
+import time
+
+import numpy as np
+import pytest
+
+from api.predict import predict
+from api.sensitivity import sensitivity
+from api.fixtures import sample_input
+
+def test_curve_matches_single_predictions():
+    areas = [60, 120, 250]
+    result = sensitivity(sample_input, "total_area_sqm", values={"total_area_sqm": areas})
+    assert result["features"] == ["total_area_sqm"] and result["values"] == [areas]
+    np.testing.assert_allclose(result["predictions"],
+                               [predict(dict(sample_input, total_area_sqm=a)) for a in areas])
+    assert result["base"] == pytest.approx(predict(sample_input))
+
+def test_surface_shape_and_default_grids():
+    result = sensitivity(sample_input, ["construction_year", "epc"], points=12)
+    years, ratings = result["values"]
+    assert len(years) == 12 and ratings[0] in ("A++", "A+", "A")
+    assert np.asarray(result["predictions"]).shape == (12, len(ratings))
+    # EPC ratings are swept through the same epc_mapped preprocessing as predict()
+    epc = ratings[-1]
+    assert result["predictions"][0][-1] == pytest.approx(
+        predict(dict(sample_input, construction_year=years[0], epc=epc)))
+
+def test_invalid_sweeps():
+    with pytest.raises(ValueError):
+        sensitivity(sample_input, [])
+    with pytest.raises(ValueError):
+        sensitivity(sample_input, ["total_area_sqm", "nbr_bedrooms", "garden_sqm"])
+    with pytest.raises(ValueError):
+        sensitivity(sample_input, "province")  # no default grid for a free category
+    with pytest.raises(ValueError):
+        sensitivity(sample_input, "total_area_sqm", values={"garden_sqm": [1]})
+
+@pytest.mark.parametrize("points", [1, 10**9, 2.5, "50", True, None])
+def test_points_are_checked_before_the_grid_is_built(points, monkeypatch):
+    monkeypatch.setattr(np, "linspace", lambda *a, **k: pytest.fail("grid built for invalid points"))
+    with pytest.raises(ValueError, match="points"):
+        sensitivity(sample_input, "total_area_sqm", points=points)
+
+def test_too_many_explicit_values():
+    with pytest.raises(ValueError, match="at most"):
+        sensitivity(sample_input, "total_area_sqm", values={"total_area_sqm": list(range(10_001))})
+
+def test_200_point_sweep_is_one_fast_call():
+    sensitivity(sample_input, "total_area_sqm", points=200)
+    start = time.perf_counter()
+    result = sensitivity(sample_input, "total_area_sqm", points=200)
+    assert len(result["predictions"]) == 200
+    assert time.perf_counter() - start < 0.1
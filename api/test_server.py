@@ -0,0 +1,114 @@
+# test_server.py
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from api.predict import predict, predict_records
+from api.server import MicroBatcher, PredictionServer
+from api.fixtures import make_records
+
+async def http(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def run_with_server(scenario, score=predict_records, **batcher_options):
+    async def main():
+        server = PredictionServer(MicroBatcher(score, **batcher_options))
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return await scenario(server, port)
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+def test_concurrent_requests_are_micro_batched():
+    records = make_records(40)
+
+    async def scenario(server, port):
+        responses = await asyncio.gather(*(http(port, "POST", "/predict", r) for r in records))
+        return responses, server.batcher.stats()
+
+    responses, stats = run_with_server(scenario, max_batch_size=16, max_wait_ms=50)
+    assert all(status == 200 for status, _ in responses)
+    np.testing.assert_allclose([body["prediction"] for _, body in responses],
+                               [predict(r) for r in records])
+    assert stats["requests"] == 40 and stats["batches"] < 40
+
+def test_batch_endpoint_and_errors():
+    records = make_records(5)
+
+    async def scenario(server, port):
+        return [
+            await http(port, "POST", "/predict/batch", {"records": records}),
+            await http(port, "GET", "/health"),
+            await http(port, "GET", "/predict"),
+            await http(port, "POST", "/nope", {}),
+            await http(port, "POST", "/predict", [1, 2]),
+        ]
+
+    batch, health, wrong_method, missing, bad_body = run_with_server(scenario)
+    assert batch[0] == 200
+    np.testing.assert_allclose(batch[1]["predictions"], [predict(r) for r in records])
+    assert health[0] == 200 and health[1]["status"] == "ok"
+    assert [wrong_method[0], missing[0], bad_body[0]] == [405, 404, 400]
+
+def test_bad_record_only_fails_its_own_request():
+    def score(records):
+        if any(r.get("bad") for r in records):
+            raise ValueError("bad record")
+        return [float(r["x"]) for r in records]
+
+    async def scenario(server, port):
+        payloads = [{"x": 1}, {"bad": True}, {"x": 3}]
+        return await asyncio.gather(*(http(port, "POST", "/predict", p) for p in payloads))
+
+    good, bad, other = run_with_server(scenario, score=score, max_wait_ms=50)
+    assert good == (200, {"prediction": 1.0}) and other == (200, {"prediction": 3.0})
+    assert bad[0] == 400 and "bad record" in bad[1]["error"]
+
+def test_invalid_records_are_client_errors():
+    good, incomplete = make_records(2)
+    del incomplete["province"]
+
+    async def scenario(server, port):
+        return [
+            await http(port, "POST", "/predict", incomplete),
+            await http(port, "POST", "/predict", dict(good, total_area_sqm="abc")),
+            await http(port, "POST", "/predict/batch", [good, incomplete]),
+            await http(port, "POST", "/predict", good),
+        ]
+
+    missing, unparsable, batch, ok = run_with_server(scenario)
+    assert [missing[0], unparsable[0], batch[0], ok[0]] == [400, 400, 400, 200]
+    assert "province" in missing[1]["error"] and "province" in batch[1]["error"]
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        MicroBatcher(predict_records, max_batch_size=0)
+
+def test_sensitivity_endpoint():
+    record = make_records(1)[0]
+    sweep = {"property": record, "features": ["total_area_sqm"], "values": {"total_area_sqm": [80, 160]}}
+
+    async def scenario(server, port):
+        return [
+            await http(port, "POST", "/sensitivity", sweep),
+            await http(port, "POST", "/sensitivity", dict(sweep, features=["province"], values=None)),
+            await http(port, "POST", "/sensitivity", dict(sweep, values=None, points="50")),
+            await http(port, "POST", "/sensitivity", dict(sweep, values=None, points=10**9)),
+        ]
+
+    (status, body), *bad = run_with_server(scenario)
+    assert status == 200 and body["values"] == [[80, 160]]
+    np.testing.assert_allclose(body["predictions"], [predict(dict(record, total_area_sqm=a)) for a in (80, 160)])
+    assert [status for status, _ in bad] == [400, 400, 400]
+    assert "integer" in bad[1][1]["error"] and "points" in bad[2][1]["error"]
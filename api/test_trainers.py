@@ -0,0 +1,58 @@
+# test_trainers.py
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.fixtures import make_records, sample_input, training_frame
+from api.predict import predict, predict_batch, preprocess_for_prediction, registry
+from trainers import train
+
+@pytest.mark.parametrize("trainer", ["gbr", "hist", "xgboost"])
+def test_trainers_report_time_and_validation_error(trainer):
+    if trainer == "xgboost":
+        pytest.importorskip("xgboost")
+    X, y = training_frame()
+    _, _, report = train(trainer, X[:150], y[:150], X[150:], y[150:])
+    assert report["trainer"] == trainer and report["train_seconds"] > 0
+    assert report["val_rmse"] >= report["val_mae"] > 0
+
+def test_native_categorical_artifacts_are_served_by_the_api(tmp_path):
+    X, y = training_frame()
+    preprocessor, model, report = train("hist", X, y)
+    # One ordinal code column per categorical feature instead of dense one-hot
+    assert report["n_features"] == len(preprocessor.transformers_[0][2]) + \
+        len(preprocessor.transformers_[1][2]) + len(preprocessor.transformers_[2][2])
+
+    joblib.dump(preprocessor, tmp_path / "preprocessor.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    registry.register("hist-test", str(tmp_path / "preprocessor.pkl"), str(tmp_path / "model.pkl"))
+    try:
+        records = make_records(10) + [dict(sample_input, heating_type="NUCLEAR", province=None)]
+        expected = model.predict(preprocessor.transform(preprocess_for_prediction(pd.DataFrame(records))))
+        single = [predict(r, version="hist-test") for r in records]
+        np.testing.assert_allclose(single, expected)
+        np.testing.assert_allclose(predict_batch(records, version="hist-test"), expected)
+    finally:
+        registry.unload("hist-test")
+
+def test_sparse_one_hot_training_and_serving(tmp_path):
+    X, y = training_frame()
+    dense_preprocessor, dense_model, dense = train("gbr", X[:150], y[:150], X[150:], y[150:])
+    preprocessor, model, report = train("gbr", X[:150], y[:150], X[150:], y[150:], sparse=True)
+    assert report["sparse"] and report["feature_bytes"] < dense["feature_bytes"]
+    assert preprocessor.transform(X[:5]).format == "csr"
+    np.testing.assert_allclose(report["val_mae"], dense["val_mae"], rtol=1e-6)
+    with pytest.raises(ValueError):
+        train("hist", X, y, sparse=True)
+
+    joblib.dump(preprocessor, tmp_path / "preprocessor.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+    registry.register("sparse-test", str(tmp_path / "preprocessor.pkl"), str(tmp_path / "model.pkl"))
+    try:
+        records = make_records(20)
+        expected = np.array([predict(r, version="sparse-test") for r in records])
+        for engine in ("sklearn", "flat"):
+            np.testing.assert_allclose(predict_batch(records, engine=engine, version="sparse-test"), expected)
+    finally:
+        registry.unload("sparse-test")
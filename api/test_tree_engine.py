@@ -0,0 +1,44 @@
+# test_tree_engine.py
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+from api.predict import flat_model, model, predict, predict_batch
+from api.fixtures import make_records
+from api.tree_engine import FlatTreeEnsemble
+
+def test_flat_engine_matches_model_predict():
+    X = np.random.default_rng(0).normal(size=(1000, model.n_features_in_))
+    np.testing.assert_allclose(flat_model.predict(X), model.predict(X), rtol=1e-12)
+
+def test_flat_engine_handles_unbalanced_trees():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] > 1.5) * 10 + X[:, 1]
+    gbr = GradientBoostingRegressor(n_estimators=20, max_depth=5, min_samples_leaf=30).fit(X, y)
+    X_test = rng.normal(size=(500, 4))
+    np.testing.assert_allclose(FlatTreeEnsemble.from_sklearn(gbr).predict(X_test), gbr.predict(X_test))
+
+def test_predict_engines_agree():
+    records = make_records(10)
+    np.testing.assert_allclose(predict_batch(records, engine="flat"), predict_batch(records, engine="sklearn"))
+    assert predict(records[0], engine="flat") == pytest.approx(predict(records[0], engine="sklearn"))
+    with pytest.raises(ValueError):
+        predict(records[0], engine="gpu")
+
+def test_compact_ensemble_stays_within_tolerance():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(1000, 6))
+    y = (X[:, 0] > 1) * 1e5 + X[:, 1] * 3e4 + rng.normal(0, 1e3, 1000)
+    gbr = GradientBoostingRegressor(n_estimators=50, max_depth=4).fit(X, y)
+    flat = FlatTreeEnsemble.from_sklearn(gbr)
+    X_test = rng.normal(size=(2000, 6))
+
+    exact = flat.compact()
+    assert exact.value.dtype == np.float32 and exact.feature.itemsize == 1 and exact.threshold is None
+    np.testing.assert_allclose(exact.predict(X_test), gbr.predict(X_test), atol=0.1)
+
+    # A tolerance as large as a whole tree's spread prunes trees and levels
+    pruned = flat.compact(tolerance=50 * 2e4)
+    assert pruned.n_trees < flat.n_trees or pruned.max_depth < flat.max_depth
+    assert np.abs(pruned.predict(X_test) - gbr.predict(X_test)).max() <= 50 * 2e4 + 0.1
@@ -0,0 +1,23 @@
+# test_tune_model.py
+import numpy as np
+
+from api.fixtures import training_frame
+from tune_model import tune
+
+def test_halving_search_prunes_and_refits_best(tmp_path):
+    X, y = training_frame(300)
+    preprocessor, model, results, report = tune("hist", X[:240], y[:240], X[240:], y[240:], candidates=9,
+                                                cv=2, factor=3, workers=2, feature_cache=str(tmp_path))
+    # 9 configurations on few rows, then the best 3, then the best 1 on the most rows
+    assert results.groupby("iter").size().tolist() == [9, 3, 1]
+    assert results["n_resources"].is_monotonic_decreasing
+    assert (results["mean_fit_time"] > 0).all() and report["fits"] == 13 * 2
+    assert results.loc[0, "rank_test_score"] == 1 and report["best_cv_mae"] == results.loc[0, "mean_cv_mae"]
+    np.testing.assert_allclose(model.predict(preprocessor.transform(X[240:])).shape, (60,))
+    assert report["val_mae"] > 0
+
+def test_random_search_results_table():
+    X, y = training_frame(120)
+    _, _, results, report = tune("gbr", X, y, search="random", candidates=3, cv=2, feature_cache=None)
+    assert len(results) == 3 and (results["n_resources"] == 120).all()
+    assert "val_mae" not in report and set(report["best_params"]) >= {"n_estimators", "learning_rate"}
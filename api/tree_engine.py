@@ -0,0 +1,211 @@
+import numpy as np
+
+# Rows per traversal block; small blocks keep the rows x trees x nodes working set in cache
+TRAVERSAL_BLOCK_SIZE = 256
+
+
+def float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 <= each float64 threshold.
+    sklearn compares float32 features against float64 thresholds, and for a float32
+    x, `x <= t` holds exactly when `x <= float32_thresholds(t)`, so the comparison
+    can stay in float32 without changing any split decision.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class FlatTreeEnsemble:
+    """
+    Array-based evaluator for a fitted GradientBoostingRegressor.
+    Every tree is padded to a complete binary tree of the ensemble's max depth and
+    stored in heap order, so all trees live in contiguous (n_trees, n_nodes) arrays
+    of feature index, threshold and missing-value direction, plus an
+    (n_trees, n_leaves) array of leaf values. Children are implicit: node i has
+    children 2i + 1 and 2i + 2. A whole batch is evaluated against every tree at
+    once, one depth level per step, with no per-tree Python loop.
+    """
+
+    def __init__(self, feature, threshold, missing_left, value, init_value, n_features,
+                 threshold32=None):
+        # Compact ensembles (see compact()) keep small feature indices and float32 leaf
+        # values, and only the float32 thresholds used by the traversal
+        feature = np.ascontiguousarray(feature)
+        self.feature = feature if np.issubdtype(feature.dtype, np.integer) else feature.astype(np.intp)
+        if threshold is None and threshold32 is None:
+            raise ValueError("Either threshold or threshold32 is required")
+        self.threshold = None if threshold is None else np.ascontiguousarray(threshold, dtype=np.float64)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        value = np.ascontiguousarray(value)
+        self.value = value if value.dtype in (np.float32, np.float64) else value.astype(np.float64)
+        self.init_value = float(init_value)
+        self.n_features = int(n_features)
+
+        self.n_trees, n_internal = self.feature.shape
+        self.max_depth = int(np.log2(n_internal + 1))
+        # Flattened views used by the traversal
+        self._feature_flat = self.feature.ravel()
+        if threshold32 is None:
+            threshold32 = float32_thresholds(self.threshold)
+        self.threshold32 = np.ascontiguousarray(threshold32, dtype=np.float32)
+        self._threshold32_flat = self.threshold32.ravel()
+        self._missing_left_flat = self.missing_left.ravel()
+        self._value_flat = self.value.ravel()
+        n_leaves = self.value.shape[1]
+        self._leaf_index = np.arange(n_leaves, dtype=np.min_scalar_type(n_leaves))[None, :, None]
+        self._leaf_base = (np.arange(self.n_trees, dtype=np.intp) * n_leaves)[:, None]
+
+    @classmethod
+    def from_sklearn(cls, model: "GradientBoostingRegressor") -> "FlatTreeEnsemble":
+        """Compile a fitted single-output GradientBoostingRegressor."""
+        from sklearn.dummy import DummyRegressor
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        if not isinstance(model, GradientBoostingRegressor):
+            raise TypeError(f"Expected a GradientBoostingRegressor, got {type(model).__name__}")
+
+        if isinstance(model.init_, str) and model.init_ == "zero":
+            init_value = 0.0
+        elif isinstance(model.init_, DummyRegressor):
+            init_value = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise TypeError("Only DummyRegressor or 'zero' init estimators can be compiled")
+
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        depth = max(1, max(tree.max_depth for tree in trees))
+        n_internal, n_leaves = 2 ** depth - 1, 2 ** depth
+
+        feature = np.zeros((len(trees), n_internal), dtype=np.intp)
+        threshold = np.full((len(trees), n_internal), np.inf)
+        missing_left = np.ones((len(trees), n_internal), dtype=bool)
+        value = np.zeros((len(trees), n_leaves))
+
+        for t, tree in enumerate(trees):
+            # (sklearn node, heap position) pairs, visited top-down
+            stack = [(0, 0)]
+            while stack:
+                node, position = stack.pop()
+                if tree.children_left[node] == -1:
+                    # Leaf above max depth: every padded leaf below it gets its value,
+                    # so the direction taken through the padding does not matter
+                    level = int(np.log2(position + 1))
+                    first = (position + 1) * 2 ** (depth - level) - 1 - n_internal
+                    # Fold the learning rate into the leaf values once
+                    value[t, first:first + 2 ** (depth - level)] = (
+                        tree.value[node, 0, 0] * model.learning_rate
+                    )
+                    continue
+                feature[t, position] = tree.feature[node]
+                threshold[t, position] = tree.threshold[node]
+                missing_left[t, position] = tree.missing_go_to_left[node]
+                stack.append((tree.children_left[node], 2 * position + 1))
+                stack.append((tree.children_right[node], 2 * position + 2))
+
+        return cls(feature, threshold, missing_left, value, init_value, model.n_features_in_)
+
+    def compact(self, tolerance: float = 0.0) -> "FlatTreeEnsemble":
+        """
+        Smaller copy of the ensemble whose predictions differ by at most tolerance
+        (plus float32 rounding of the leaf values):
+          - every subtree whose leaf values span at most 2 * tolerance / n_trees is
+            merged into one leaf (the midpoint), so each tree moves a row's prediction
+            by at most tolerance / n_trees; tolerance=0 only merges identical leaves
+          - trees reduced to a constant are folded into the initial value and dropped
+          - the padding depth shrinks to the deepest remaining split
+          - leaf values are stored as float32, feature indices in the smallest
+            integer type, and the float64 thresholds (unused by the traversal) dropped
+        """
+        depth = self.max_depth
+        n_internal = 2 ** depth - 1
+        budget = tolerance / self.n_trees
+        value = np.array(self.value, dtype=np.float64)
+
+        # Top-down, so a merged node's children are already constant when visited.
+        # The leaves below node i of a level are value[:, i * span:(i + 1) * span]
+        for level in range(depth):
+            leaves = value.reshape(self.n_trees, 2 ** level, -1)
+            low, high = leaves.min(axis=2, keepdims=True), leaves.max(axis=2, keepdims=True)
+            value = np.where(high - low <= 2 * budget, (low + high) / 2, leaves).reshape(self.n_trees, -1)
+
+        # A split still matters if the leaves below it differ
+        live = np.zeros((self.n_trees, n_internal), dtype=bool)
+        for level in range(depth):
+            leaves = value.reshape(self.n_trees, 2 ** level, -1)
+            live[:, 2 ** level - 1:2 ** (level + 1) - 1] = leaves.max(axis=2) > leaves.min(axis=2)
+
+        keep = live[:, 0]
+        if not keep.any():
+            keep[0] = True
+        init_value = self.init_value + float(value[~keep, 0].sum())
+        live = live[keep]
+        levels = [level for level in range(depth) if live[:, 2 ** level - 1:2 ** (level + 1) - 1].any()]
+        new_depth = max(levels) + 1 if levels else 1
+        nodes = slice(0, 2 ** new_depth - 1)
+
+        # Heap order makes the shallower tree a prefix of the internal nodes, and every
+        # group of 2 ** (depth - new_depth) padded leaves holds a single value
+        feature = np.where(live, self.feature[keep], 0)[:, nodes]
+        return FlatTreeEnsemble(
+            feature.astype(np.min_scalar_type(max(self.n_features - 1, 0))),
+            None,
+            np.where(live, self.missing_left[keep], True)[:, nodes],
+            value[keep, ::2 ** (depth - new_depth)].astype(np.float32),
+            init_value,
+            self.n_features,
+            threshold32=np.where(live, self.threshold32[keep], np.float32(np.inf))[:, nodes],
+        )
+
+    def arrays(self) -> dict:
+        """The compiled ensemble as a dict of plain arrays (for export)."""
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "threshold32": self.threshold32,
+            "missing_left": self.missing_left,
+            "value": self.value,
+        }
+        return {name: array for name, array in arrays.items() if array is not None}
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict for a 2-D feature matrix; matches GradientBoostingRegressor.predict.
+        Sparse matrices are densified one traversal block at a time.
+        """
+        sparse = hasattr(X, "tocsr")
+        X = X.tocsr() if sparse else np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected an array of shape (n, {self.n_features}), got {X.shape}")
+
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], TRAVERSAL_BLOCK_SIZE):
+            block = X[start:start + TRAVERSAL_BLOCK_SIZE]
+            if sparse:
+                block = block.toarray().astype(np.float32, copy=False)
+            out[start:start + len(block)] = self._predict_block(block)
+        return out
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+
+        # Evaluate every split of every tree once. Working on X.T keeps the
+        # feature gather a contiguous row copy: (trees * internal nodes, rows)
+        x = np.ascontiguousarray(X.T)[self._feature_flat]
+        go_right = ~(x <= self._threshold32_flat[:, None])
+        missing = np.isnan(x)
+        if missing.any():
+            go_right = np.where(missing, ~self._missing_left_flat[:, None], go_right)
+        go_right = go_right.reshape(self.n_trees, -1, n_rows)
+
+        # Resolve all trees bottom-up, one depth level per step: each node takes
+        # the leaf index its split selects, using small-int arithmetic instead of
+        # gathering node indices
+        leaf = self._leaf_index
+        for level in reversed(range(self.max_depth)):
+            decisions = go_right[:, 2 ** level - 1:2 ** (level + 1) - 1]
+            left = leaf[:, 0::2]
+            leaf = left + decisions * (leaf[:, 1::2] - left)
+
+        return self.init_value + self._value_flat.take(self._leaf_base + leaf[:, 0]).sum(axis=0, dtype=np.float64)
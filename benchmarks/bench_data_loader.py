@@ -0,0 +1,62 @@
+# bench_data_loader.py
+# Benchmark: training data load time and peak RSS, pd.read_csv + preprocess (the previous
+# setup_model.py path) vs the chunked loader, first run (CSV -> Parquet) and cached run.
+# Each variant runs in a fresh interpreter so peak RSS is measured on its own.
+# Usage: python benchmarks/bench_data_loader.py [n_rows]   (default: 1000000)
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from api.fixtures import make_records
+
+VARIANT_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {src!r})
+import pandas as pd
+from data_loader import load_training_data
+from preprocess_module import preprocess
+start = time.perf_counter()
+if {variant!r} == "read_csv":
+    df = preprocess(pd.read_csv({csv!r}))
+else:
+    df = preprocess(load_training_data({csv!r}, cache_dir={cache!r}), copy=False)
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "frame_mb": df.memory_usage(deep=True).sum() / 1e6}}))
+"""
+
+def write_listings(path, n_rows):
+    """Synthetic listings CSV with the training columns plus a few unused ones."""
+    rng = np.random.default_rng(0)
+    base = pd.DataFrame(make_records(100))
+    df = base.sample(n_rows, replace=True, random_state=0).reset_index(drop=True)
+    df["total_area_sqm"] = rng.integers(30, 400, n_rows).astype(float)
+    df["price"] = 2_000.0 * df["total_area_sqm"] + rng.normal(0, 20_000, n_rows)
+    df["locality"] = rng.choice(["Antwerpen", "Gent", "Liège", "Namur", "Brussel"], n_rows)
+    df["latitude"] = rng.uniform(49.5, 51.5, n_rows)
+    df["longitude"] = rng.uniform(2.5, 6.4, n_rows)
+    df.astype({c: int for c in df.columns if c.startswith("fl_")}).to_csv(path, index=False)
+
+def run_variant(variant, csv, cache):
+    script = VARIANT_SCRIPT.format(src=os.path.join(ROOT, "src"), variant=variant, csv=csv, cache=cache)
+    return json.loads(subprocess.run([sys.executable, "-c", script], capture_output=True,
+                                     text=True, check=True).stdout)
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, cache = os.path.join(tmp, "listings.csv"), os.path.join(tmp, "cache")
+        write_listings(csv, n_rows)
+        print(f"{n_rows:,} rows, CSV {os.path.getsize(csv) / 1e6:,.0f} MB")
+        print(f"{'variant':<18} {'seconds':>8} {'peak RSS MB':>12} {'frame MB':>9}")
+        for label, variant in (("read_csv", "read_csv"), ("loader (1st run)", "loader"),
+                               ("loader (cached)", "loader")):
+            r = run_variant(variant, csv, cache)
+            print(f"{label:<18} {r['seconds']:>8.2f} {r['peak_rss_mb']:>12,.0f} {r['frame_mb']:>9,.0f}")
@@ -0,0 +1,46 @@
+# bench_epc_mapping.py
+# Micro-benchmark: vectorized map_epc vs the previous row-wise df.apply mapping.
+# Usage: python benchmarks/bench_epc_mapping.py [n_rows]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from features import epc_mapping, map_epc
+
+def map_epc_apply(df: pd.DataFrame) -> pd.Series:
+    """Reference implementation: the original per-row lambda."""
+    return df.apply(
+        lambda row: epc_mapping.get(row["region"], {}).get(row["epc"], "MISSING"),
+        axis=1
+    )
+
+def make_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    regions = ["Flanders", "Wallonia", "Brussels-Capital", "MISSING"]
+    ratings = ["A++", "A+", "A", "B", "C", "D", "E", "F", "G", None]
+    return pd.DataFrame({
+        "region": rng.choice(regions, n_rows),
+        "epc": rng.choice(np.array(ratings, dtype=object), n_rows),
+    })
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = make_frame(n_rows)
+
+    vectorized, t_vectorized = timed(map_epc, df)
+    reference, t_apply = timed(map_epc_apply, df)
+    assert (vectorized == reference.to_numpy()).all()
+
+    print(f"rows:       {n_rows:,}")
+    print(f"df.apply:   {t_apply:.3f} s")
+    print(f"map_epc:    {t_vectorized:.4f} s")
+    print(f"speedup:    {t_apply / t_vectorized:,.0f}x")
@@ -0,0 +1,331 @@
+# bench_load_replay.py
+# Load test: replays logged prediction requests (api/request_log.py JSONL, rotated .gz files, or
+# plain JSONL property records) against the in-process api.predict functions or an HTTP service.
+# Closed loop (--concurrency workers sending back to back) measures the maximum throughput; open
+# loop (--rate requests/s, constant or Poisson arrivals) measures latency at a given load. Open-loop
+# latency is counted from each request's scheduled arrival, so time spent waiting for a free worker
+# is included instead of hiding the backlog. Several --rate values are run as steps, and the
+# highest rate that keeps up (achieved >= 95% of offered, p99 <= --slo-ms, < 1% errors) is reported
+# as the maximum sustainable rate. CPU and RSS of this process (or --pid, e.g. the HTTP server)
+# are sampled every --sample-interval seconds.
+# The JSON report has the shape of bench_suite.py's, so --compare flags regressions the same way.
+# Usage:
+#   python benchmarks/bench_load_replay.py logs/requests.jsonl --concurrency 8 --duration 30
+#   python benchmarks/bench_load_replay.py logs/requests.jsonl --rate 200 400 800 --output load.json
+#   python benchmarks/bench_load_replay.py logs/requests.jsonl --target http://127.0.0.1:8000 \
+#       --rate 500 --pid $(pgrep -f api.server) --compare load.json
+import argparse
+import glob
+import gzip
+import http.client
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+import psutil
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from bench_suite import compare, environment
+
+PERCENTILES = (50, 90, 99, 99.9)
+# A rate is sustained when the achieved rate is at least this share of the offered one
+SUSTAINED_SHARE = 0.95
+MAX_ERROR_RATE = 0.01
+
+
+def read_requests(paths: list, source: str = None, limit: int = None) -> list:
+    """
+    Property dicts from JSONL files (.gz allowed, glob patterns expanded): the "input" of
+    request-log entries (optionally only those from source), or each line itself otherwise.
+    """
+    records = []
+    for path in sorted({p for pattern in paths for p in glob.glob(pattern)}) or paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "input" in entry:
+                    if source and entry.get("source") != source:
+                        continue
+                    entry = entry["input"]
+                records.append(entry)
+                if limit and len(records) >= limit:
+                    return records
+    if not records:
+        raise SystemExit(f"No requests found in {', '.join(paths)}")
+    return records
+
+
+def in_process_target(function: str):
+    """Callable scoring one record with api.predict.<function>."""
+    from api import predict as api_predict
+
+    func = getattr(api_predict, function)
+    if function == "predict_records":
+        return lambda record: func([record])[0]
+    return func
+
+
+def http_target(url: str):
+    """Callable POSTing one record to <url>/predict, over one keep-alive connection per thread."""
+    parts = urlsplit(url)
+    path = (parts.path.rstrip("/") or "") + "/predict"
+    local = threading.local()
+
+    def call(record: dict):
+        body = json.dumps(record)
+        for attempt in (0, 1):
+            connection = getattr(local, "connection", None)
+            if connection is None:
+                connection = local.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80,
+                                                                           timeout=30)
+            try:
+                connection.request("POST", path, body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                payload = response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # Stale keep-alive connection: reconnect once
+                connection.close()
+                local.connection = None
+                if attempt:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            return json.loads(payload)["prediction"]
+
+    return call
+
+
+class Recorder:
+    """Completion time, latency and error of every request (list appends are thread-safe)."""
+
+    def __init__(self):
+        self.completed = []
+        self.latencies = []
+        self.errors = []
+
+    def call(self, target, record: dict, started: float):
+        error = None
+        try:
+            target(record)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+        self.completed.append(end)
+        self.latencies.append(end - started)
+        self.errors.append(error)
+
+
+class Sampler(threading.Thread):
+    """Samples CPU, RSS, throughput and latency of the last interval into a timeline."""
+
+    def __init__(self, recorder: Recorder, start: float, interval: float, pid: int = None):
+        super().__init__(daemon=True)
+        self.recorder = recorder
+        self.start_time = start
+        self.interval = interval
+        self.process = psutil.Process(pid)
+        self.timeline = []
+        self._done = threading.Event()
+
+    def run(self):
+        self.process.cpu_percent(None)
+        seen = 0
+        last = self.start_time
+        while not self._done.wait(self.interval):
+            now = time.perf_counter()
+            done = len(self.recorder.latencies)
+            latencies = np.array(self.recorder.latencies[seen:done]) * 1e3
+            sample = {
+                "t_seconds": round(now - self.start_time, 3),
+                "cpu_percent": self.process.cpu_percent(None),
+                "rss_mb": self.process.memory_info().rss / 2 ** 20,
+                "requests_per_second": (done - seen) / (now - last),
+                "errors": sum(e is not None for e in self.recorder.errors[seen:done]),
+            }
+            if len(latencies):
+                sample["p50_ms"] = float(np.percentile(latencies, 50))
+                sample["p99_ms"] = float(np.percentile(latencies, 99))
+            self.timeline.append(sample)
+            seen, last = done, now
+
+    def stop(self) -> list:
+        self._done.set()
+        self.join()
+        return self.timeline
+
+
+def closed_loop(target, records: list, recorder: Recorder, concurrency: int, duration: float):
+    """concurrency workers each sending the next request as soon as the previous one returned."""
+    deadline = time.perf_counter() + duration
+    cursor = itertools.count()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            recorder.call(target, records[next(cursor) % len(records)], time.perf_counter())
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def open_loop(target, records: list, recorder: Recorder, rate: float, duration: float, concurrency: int,
+              arrivals: str = "constant", seed: int = 0) -> int:
+    """Requests arriving at rate per second, whether or not earlier ones have finished. Returns the count sent."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    offset = 0.0
+    sent = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while offset < duration:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(recorder.call, target, records[sent % len(records)], scheduled)
+            sent += 1
+            offset += rng.exponential(1 / rate) if arrivals == "poisson" else 1 / rate
+    return sent
+
+
+def summarize(recorder: Recorder, start: float, timeline: list, rate: float = None) -> dict:
+    latencies = np.array(recorder.latencies) * 1e3
+    errors = Counter(e for e in recorder.errors if e is not None)
+    elapsed = (max(recorder.completed) if recorder.completed else time.perf_counter()) - start
+    requests = len(latencies)
+    summary = {
+        "requests": requests,
+        "error_rate": sum(errors.values()) / requests if requests else 0.0,
+        "latency": {"mean_ms": float(latencies.mean()) if requests else 0.0,
+                    **{f"p{str(q).replace('.', '')}_ms": float(np.percentile(latencies, q)) if requests else 0.0
+                       for q in PERCENTILES},
+                    "max_ms": float(latencies.max()) if requests else 0.0},
+        "throughput": {"requests_per_second": requests / elapsed if elapsed > 0 else 0.0},
+        "resources": {
+            "cpu_mean_percent": float(np.mean([s["cpu_percent"] for s in timeline])) if timeline else 0.0,
+            "cpu_max_percent": max((s["cpu_percent"] for s in timeline), default=0.0),
+            "rss_max_mb": max((s["rss_mb"] for s in timeline), default=0.0),
+        },
+        # Lists are left out of comparisons
+        "errors": [{"error": error, "count": count} for error, count in errors.most_common(10)],
+        "timeline": timeline,
+    }
+    if rate is not None:
+        summary["throughput"]["offered_per_second"] = rate
+    return summary
+
+
+def run_step(target, records: list, duration: float, concurrency: int, rate: float = None,
+             arrivals: str = "constant", sample_interval: float = 1.0, pid: int = None, seed: int = 0) -> dict:
+    recorder = Recorder()
+    start = time.perf_counter()
+    sampler = Sampler(recorder, start, sample_interval, pid)
+    sampler.start()
+    if rate is None:
+        closed_loop(target, records, recorder, concurrency, duration)
+    else:
+        open_loop(target, records, recorder, rate, duration, concurrency, arrivals, seed)
+    return summarize(recorder, start, sampler.stop(), rate)
+
+
+def sustained(step: dict, slo_ms: float) -> bool:
+    throughput = step["throughput"]
+    return (throughput["requests_per_second"] >= SUSTAINED_SHARE * throughput["offered_per_second"]
+            and step["latency"]["p99_ms"] <= slo_ms and step["error_rate"] < MAX_ERROR_RATE)
+
+
+def run(paths: list, target: str = "predict", concurrency: int = 4, rates: list = None, duration: float = 10.0,
+        arrivals: str = "constant", warmup: float = 1.0, sample_interval: float = 1.0, slo_ms: float = 100.0,
+        pid: int = None, source: str = None, limit: int = None, seed: int = 0) -> dict:
+    records = read_requests(paths, source, limit)
+    call = http_target(target) if target.startswith("http") else in_process_target(target)
+    if warmup:
+        # Loads artifacts, warms caches and connections; not part of the report
+        closed_loop(call, records, Recorder(), concurrency, warmup)
+
+    results = {
+        "environment": environment(),
+        "config": {"logs": paths, "requests_loaded": len(records), "target": target, "concurrency": concurrency,
+                   "rates": rates, "duration_seconds": duration, "arrivals": arrivals, "slo_ms": slo_ms,
+                   "source": source, "pid": pid, "seed": seed},
+        "runs": {},
+    }
+    if not rates:
+        results["runs"][f"closed_c{concurrency}"] = run_step(call, records, duration, concurrency, None, arrivals,
+                                                              sample_interval, pid, seed)
+    for rate in rates or []:
+        step = run_step(call, records, duration, concurrency, rate, arrivals, sample_interval, pid, seed)
+        results["runs"][f"open_{rate:g}"] = step
+        if sustained(step, slo_ms):
+            results["max_sustainable_per_second"] = max(results.get("max_sustainable_per_second", 0), rate)
+    return results
+
+
+def print_table(results: dict):
+    print(f"{'run':<14}{'requests':>10}{'req/s':>10}{'errors':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+          f"{'p99.9 ms':>10}{'cpu %':>8}{'rss MB':>8}")
+    for name, step in results["runs"].items():
+        latency, resources = step["latency"], step["resources"]
+        print(f"{name:<14}{step['requests']:>10,}{step['throughput']['requests_per_second']:>10,.0f}"
+              f"{step['error_rate']:>8.1%}{latency['p50_ms']:>9.2f}{latency['p90_ms']:>9.2f}{latency['p99_ms']:>9.2f}"
+              f"{latency['p999_ms']:>10.2f}{resources['cpu_mean_percent']:>8.0f}{resources['rss_max_mb']:>8.0f}")
+    if results["config"]["rates"]:
+        print(f"Max sustainable rate: {results.get('max_sustainable_per_second', 'none of the rates')} req/s "
+              f"(p99 <= {results['config']['slo_ms']:g} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay logged prediction requests as a load test")
+    parser.add_argument("logs", nargs="+", help="JSONL request logs (.gz and glob patterns allowed)")
+    parser.add_argument("--target", default="predict",
+                        help="api.predict function (predict, cached_predict, predict_records) or http://host:port")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Closed loop: workers sending back to back; open loop: maximum requests in flight")
+    parser.add_argument("--rate", type=float, nargs="+", help="Open loop: arrivals per second, one step per value")
+    parser.add_argument("--arrivals", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of unreported load first")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between CPU/RSS samples")
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="p99 a sustainable rate must stay under")
+    parser.add_argument("--pid", type=int, help="Process to sample CPU/RSS of (default: this one)")
+    parser.add_argument("--source", help="Only replay request-log entries from this source (e.g. server)")
+    parser.add_argument("--limit", type=int, help="Replay at most this many logged requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Baseline report; exit 1 if any metric regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run(args.logs, args.target, args.concurrency, args.rate, args.duration, args.arrivals, args.warmup,
+                  args.sample_interval, args.slo_ms, args.pid, args.source, args.limit, args.seed)
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        # compare() skips metrics that were 0 in the baseline, but new errors are always a regression
+        for name, step in results["runs"].items():
+            if baseline.get("runs", {}).get(name, {}).get("error_rate") == 0 and step["error_rate"] > 0:
+                regressions.append({"metric": f"runs.{name}.error_rate", "baseline": 0.0,
+                                    "current": step["error_rate"], "worse_by": float("inf")})
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} "
+                  f"({r['worse_by']:+.0%})", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
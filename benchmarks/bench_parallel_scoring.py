@@ -0,0 +1,34 @@
+# bench_parallel_scoring.py
+# Benchmark: bulk scoring throughput with a process pool vs the single-process path.
+# Usage: python benchmarks/bench_parallel_scoring.py [n_rows] [workers ...]
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.bulk_score import run
+from api.fixtures import make_records
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    worker_counts = [int(w) for w in sys.argv[2:]] or sorted({2, 4, os.cpu_count() or 1})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "listings.jsonl")
+        records = make_records(100)
+        with open(source, "w") as f:
+            for i in range(n_rows):
+                f.write(json.dumps(dict(records[i % len(records)], id=i)) + "\n")
+
+        baseline = run(source, os.path.join(tmp, "out-1.jsonl"), log=io.StringIO())
+        print(f"{'workers':>8} {'rows/s':>12} {'speedup':>8}")
+        print(f"{1:>8} {baseline['rows_per_second']:>12,.0f} {1.0:>7.1f}x")
+        for workers in worker_counts:
+            if workers <= 1:
+                continue
+            summary = run(source, os.path.join(tmp, f"out-{workers}.jsonl"), workers=workers,
+                          log=io.StringIO())
+            speedup = summary["rows_per_second"] / baseline["rows_per_second"]
+            print(f"{workers:>8} {summary['rows_per_second']:>12,.0f} {speedup:>7.1f}x")
@@ -0,0 +1,69 @@
+# bench_sparse_features.py
+# Benchmark: dense vs sparse (CSR) one-hot features. Featurization time, matrix size and
+# peak memory on n_rows synthetic records, GradientBoostingRegressor training time on n_train
+# rows and batch prediction time. Each variant runs in a fresh interpreter.
+# Usage: python benchmarks/bench_sparse_features.py [n_rows] [n_train]   (default: 1000000 50000)
+import json
+import subprocess
+import sys
+
+VARIANT_SCRIPT = """
+import json, os, sys, time, tracemalloc
+sys.path.insert(0, {benchmarks!r})
+from bench_suite import synthetic_records
+import pandas as pd
+from preprocess_module import make_preprocessor, preprocess
+from trainers import _nbytes, make_estimator
+
+records = pd.DataFrame(synthetic_records({n_rows}))
+records["price"] = 2_000.0 * records["total_area_sqm"]
+X = preprocess(records, copy=False).drop(columns=["price", "price_per_sqm"])
+y = records["price"]
+
+start = time.perf_counter()
+preprocessor = make_preprocessor(sparse={sparse})
+X_processed = preprocessor.fit_transform(X)
+featurize_seconds = time.perf_counter() - start
+
+# Peak memory allocated while featurizing, measured on a second, traced run
+tracemalloc.start()
+make_preprocessor(sparse={sparse}).fit_transform(X)
+featurize_peak = tracemalloc.get_traced_memory()[1] / 1e6
+tracemalloc.stop()
+
+model = make_estimator("gbr", [], X_processed.shape[1])
+start = time.perf_counter()
+model.fit(X_processed[:{n_train}], y[:{n_train}])
+train_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+for chunk in range(0, len(X), 10_000):
+    model.predict(preprocessor.transform(X[chunk:chunk + 10_000]))
+predict_seconds = time.perf_counter() - start
+
+print(json.dumps({{"n_features": X_processed.shape[1], "matrix_mb": _nbytes(X_processed) / 1e6,
+                  "featurize_seconds": featurize_seconds, "featurize_peak_mb": featurize_peak,
+                  "train_seconds": train_seconds, "predict_seconds": predict_seconds}}))
+"""
+
+if __name__ == "__main__":
+    import os
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_train = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+    results = {}
+    for sparse in (False, True):
+        script = VARIANT_SCRIPT.format(benchmarks=os.path.join(root, "benchmarks"), n_rows=n_rows,
+                                       n_train=n_train, sparse=sparse)
+        env = dict(os.environ, PYTHONPATH=os.path.join(root, "src"))
+        results["sparse" if sparse else "dense"] = json.loads(subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env).stdout)
+
+    print(f"{n_rows:,} rows featurized, {n_train:,} rows trained, {n_rows:,} rows predicted in 10k chunks")
+    print(f"{'':<7} {'features':>8} {'matrix MB':>10} {'featurize s':>12} {'featurize peak MB':>17} "
+          f"{'train s':>8} {'predict s':>10}")
+    for name, r in results.items():
+        print(f"{name:<7} {r['n_features']:>8} {r['matrix_mb']:>10,.0f} {r['featurize_seconds']:>12.2f} "
+              f"{r['featurize_peak_mb']:>17,.0f} {r['train_seconds']:>8.2f} {r['predict_seconds']:>10.2f}")
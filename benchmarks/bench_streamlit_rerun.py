@@ -0,0 +1,117 @@
+# bench_streamlit_rerun.py
+# Benchmark: server-side time per widget interaction in the Streamlit app, driven headless
+# by streamlit.testing's AppTest. Each interaction (bedrooms, region, terrace checkbox,
+# Predict button) is repeated after a warm-up run, and every app version runs in a fresh
+# interpreter. The app source is copied with a stopwatch around the whole script, so the
+# time reported is the script's own run time, not AppTest's polling.
+# AppTest always reruns the whole script; what a fragment-only rerun costs in a live
+# server is read from the app's own "app.fragment.*" stages (api.metrics).
+# --before REV also runs streamlit/app_v1.0.py as of git revision REV, for a before/after table.
+# Usage: python benchmarks/bench_streamlit_rerun.py [--repeats 20] [--before HEAD~1] [--output out.json]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_PATH = os.path.join(ROOT, "streamlit", "app_v1.0.py")
+
+# (label, widget kind, values cycled through, fragment that owns the widget);
+# labels are shared by every app version
+INTERACTIONS = [
+    ("Number of Bedrooms *", "number_input", [3, 4], "app.fragment.details"),
+    ("Region *", "selectbox", ["Wallonia", "Flanders"], "app.fragment.details"),
+    ("🌿 Terrace", "checkbox", [True, False], "app.fragment.site"),
+    ("Predict Price", "button", [None], "app.fragment.prediction"),
+]
+
+PROLOGUE = "import time as _bench_time\n_bench_start = _bench_time.perf_counter()\n"
+EPILOGUE = ("\nfrom api.metrics import metrics as _bench_metrics\n"
+            "_bench_metrics.record('bench.script', _bench_time.perf_counter() - _bench_start)\n")
+
+
+def instrumented_copy(source: str, name: str) -> str:
+    """Write the app source with the script stopwatch next to the real app, so relative paths resolve."""
+    path = os.path.join(ROOT, "streamlit", f"_bench_{name}.py")
+    with open(path, "w") as f:
+        f.write(PROLOGUE + source + EPILOGUE)
+    return path
+
+
+def run_app(app_path: str, repeats: int) -> dict:
+    """Per interaction: mean script run time and the app's own stages, in milliseconds."""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, ROOT)
+    from api.metrics import metrics
+
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{app_path} raised {at.exception[0].message}")
+    results = {"first_run_ms": metrics.snapshot()["bench.script"]["mean_ms"]}
+    at.run()
+
+    for label, kind, values, _ in INTERACTIONS:
+        metrics.reset()
+        for i in range(repeats):
+            widget = next(w for w in getattr(at, kind) if w.label == label)
+            value = values[i % len(values)]
+            if kind == "button":
+                widget.click()
+            elif kind == "checkbox":
+                widget.check() if value else widget.uncheck()
+            elif kind == "selectbox":
+                widget.select(value)
+            else:
+                widget.set_value(value)
+            at.run()
+        results[label] = {stage: summary["mean_ms"] for stage, summary in metrics.snapshot().items()
+                          if stage.startswith(("app.", "bench."))}
+    return results
+
+
+def print_table(results: dict):
+    names = list(results)
+    print(f"{'full script rerun':<24}" + "".join(f"{name:>12}" for name in names) + f"{'fragment only':>16}")
+    print(f"{'first run':<24}" + "".join(f"{results[n]['first_run_ms']:>10.1f}ms" for n in names))
+    for label, _, _, fragment in INTERACTIONS:
+        fragment_ms = results["current"][label].get(fragment)
+        print(f"{label:<24}" + "".join(f"{results[n][label]['bench.script']:>10.1f}ms" for n in names)
+              + (f"{fragment_ms:>14.1f}ms" if fragment_ms is not None else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time Streamlit app reruns per widget interaction")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--before", help="Also benchmark streamlit/app_v1.0.py at this git revision")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_app(args.worker, args.repeats)))
+        sys.exit()
+
+    def run_in_subprocess(name: str, source: str) -> dict:
+        path = instrumented_copy(source, name)
+        try:
+            out = subprocess.run([sys.executable, __file__, "--worker", path, "--repeats", str(args.repeats)],
+                                 check=True, capture_output=True, text=True).stdout
+        finally:
+            os.remove(path)
+        return json.loads(out.strip().splitlines()[-1])
+
+    results = {}
+    if args.before:
+        results["before"] = run_in_subprocess("before", subprocess.run(
+            ["git", "show", f"{args.before}:streamlit/app_v1.0.py"], cwd=ROOT,
+            check=True, capture_output=True, text=True).stdout)
+    with open(APP_PATH) as f:
+        results["current"] = run_in_subprocess("current", f.read())
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
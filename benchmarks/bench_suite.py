@@ -0,0 +1,226 @@
+# bench_suite.py
+# Benchmark suite: single-call latency, batch throughput, cold import/load time and peak RSS
+# of the prediction API on synthetic property records, written as JSON for comparing commits.
+# Usage:
+#   python benchmarks/bench_suite.py --output bench.json
+#   python benchmarks/bench_suite.py --output new.json --compare bench.json --tolerance 0.2
+import argparse
+import hashlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "src"))
+from features import EPC_RATINGS, binary_flags, numeric_to_scale
+
+# Plausible ranges for the numeric features, (low, high)
+NUMERIC_RANGES = {
+    "construction_year": (1850, 2025),
+    "total_area_sqm": (30, 400),
+    "surface_land_sqm": (0, 2000),
+    "nbr_frontages": (1, 4),
+    "nbr_bedrooms": (0, 6),
+    "terrace_sqm": (0, 40),
+    "garden_sqm": (0, 800),
+    "primary_energy_consumption_sqm": (30, 600),
+}
+
+# Metrics where a higher value is a regression; the rest (throughput) regress when lower
+LOWER_IS_BETTER = ("_ms", "_seconds", "_mb", "_percent", "error_rate")
+
+# Timed in a fresh interpreter: import of api.predict, then loading the default artifacts
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from api.predict import registry
+imported = time.perf_counter()
+registry.get({version!r})
+loaded = time.perf_counter()
+print(json.dumps({{"import_seconds": imported - start, "load_seconds": loaded - imported}}))
+"""
+
+
+def synthetic_records(n_rows: int, seed: int = 0) -> list:
+    """Property dicts with every model feature, categories drawn from the fitted preprocessor."""
+    from api.predict import registry
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column in numeric_to_scale:
+        low, high = NUMERIC_RANGES[column]
+        columns[column] = rng.integers(low, high + 1, n_rows).tolist()
+    for column in binary_flags:
+        columns[column] = rng.random(n_rows) < 0.5
+    for column, index in registry.get().encoder.categorical_columns:
+        if column == "epc_mapped":
+            # Derived from region and epc at prediction time
+            continue
+        categories = list(index)
+        columns[column] = [categories[i] for i in rng.integers(0, len(categories), n_rows)]
+    columns["epc"] = [EPC_RATINGS[i] for i in rng.integers(0, len(EPC_RATINGS), n_rows)]
+    return [{column: (bool(values[i]) if column in binary_flags else values[i])
+             for column, values in columns.items()} for i in range(n_rows)]
+
+
+def latency(records: list, engine: str = None, version: str = None) -> dict:
+    from api.predict import predict
+
+    for record in records[:20]:
+        predict(record, engine, version)
+    times = []
+    for record in records:
+        start = time.perf_counter()
+        predict(record, engine, version)
+        times.append(time.perf_counter() - start)
+    times_ms = np.array(times) * 1e3
+    return {
+        "calls": len(times),
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p95_ms": float(np.percentile(times_ms, 95)),
+        "p99_ms": float(np.percentile(times_ms, 99)),
+        "max_ms": float(times_ms.max()),
+    }
+
+
+def throughput(records: list, sizes: list, engine: str = None, version: str = None) -> dict:
+    from api.predict import predict_batch
+
+    results = {}
+    for size in sizes:
+        batch = (records * (size // len(records) + 1))[:size]
+        repeat = max(1, min(20, 100_000 // size))
+        best = min(_timed(predict_batch, batch, size, engine, version) for _ in range(repeat))
+        results[str(size)] = {"best_seconds": best, "rows_per_second": size / best}
+    return results
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def cold_start(version: str = None, runs: int = 3) -> dict:
+    """Best of several fresh interpreters: import time of api.predict and artifact load time."""
+    script = COLD_START_SCRIPT.format(root=ROOT, version=version)
+    samples = [json.loads(subprocess.run([sys.executable, "-c", script], capture_output=True,
+                                         text=True, check=True).stdout) for _ in range(runs)]
+    return {key: min(sample[key] for sample in samples) for key in samples[0]}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def environment(version: str = None) -> dict:
+    import sklearn
+    from api.predict import registry
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "artifacts": {os.path.basename(path): _sha256(path)
+                      for path in registry.paths(version or "default").values() if os.path.isfile(path)},
+    }
+
+
+def run(n_calls: int = 1_000, sizes=(1, 100, 1_000, 10_000), engine: str = None,
+        version: str = None, seed: int = 0) -> dict:
+    # Cold start first, in subprocesses, so this process's state can't influence it
+    cold = cold_start(version)
+    records = synthetic_records(n_calls, seed)
+    return {
+        "environment": environment(version),
+        "config": {"n_calls": n_calls, "sizes": list(sizes), "engine": engine, "seed": seed},
+        "cold_start": cold,
+        "latency": latency(records, engine, version),
+        "throughput": throughput(records, list(sizes), engine, version),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Numeric measurements as {"latency.p50_ms": ...}; environment and config are skipped."""
+    flat = {}
+    for key, value in results.items():
+        if not prefix and key in ("environment", "config"):
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Metrics that got worse than the baseline by more than tolerance (a fraction)."""
+    regressions = []
+    old = flatten(baseline)
+    for name, value in flatten(current).items():
+        if name not in old or not old[name] or name.endswith(".calls"):
+            continue
+        change = value / old[name] - 1
+        if not name.endswith(LOWER_IS_BETTER):
+            change = -change
+        if change > tolerance:
+            regressions.append({"metric": name, "baseline": old[name], "current": value,
+                                "worse_by": change})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction latency/throughput/memory benchmark")
+    parser.add_argument("--output", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument("--calls", type=int, default=1_000, help="Single predict() calls to time")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1_000, 10_000])
+    parser.add_argument("--engine", choices=("sklearn", "flat"), default=None)
+    parser.add_argument("--version", default=None, help="Registered model version to benchmark")
+    parser.add_argument("--compare", help="Baseline JSON; exit 1 if any metric regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run(args.calls, args.sizes, args.engine, args.version)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} "
+                  f"({r['worse_by']:+.0%})", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
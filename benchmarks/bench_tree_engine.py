@@ -0,0 +1,44 @@
+# bench_tree_engine.py
+# Benchmark: FlatTreeEnsemble vs GradientBoostingRegressor.predict at several batch sizes.
+# Usage: python benchmarks/bench_tree_engine.py [size ...]   (default: 1 100 10000 1000000)
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.predict import encoder, flat_model, model
+
+def synthetic_features(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Encoded rows: scaled numerics, 0/1 flags and one active category per one-hot group."""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, encoder.n_features))
+    for _, out_slice, *_ in encoder.numeric_blocks:
+        X[:, out_slice] = rng.normal(size=(n_rows, out_slice.stop - out_slice.start))
+    for _, out_slice in encoder.passthrough_blocks:
+        X[:, out_slice] = rng.integers(0, 2, size=(n_rows, out_slice.stop - out_slice.start))
+    for _, index in encoder.categorical_columns:
+        columns = np.fromiter(index.values(), dtype=np.intp)
+        X[np.arange(n_rows), rng.choice(columns, n_rows)] = 1.0
+    return X
+
+def best_time(func, X, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1, 100, 10_000, 1_000_000]
+    print(f"{'rows':>10} {'sklearn':>12} {'flat':>12} {'speedup':>8} {'max abs diff':>13}")
+    for n_rows in sizes:
+        X = synthetic_features(n_rows)
+        repeat = max(1, min(200, 100_000 // n_rows))
+        t_sklearn = best_time(model.predict, X, repeat)
+        t_flat = best_time(flat_model.predict, X, repeat)
+        diff = np.abs(flat_model.predict(X) - model.predict(X)).max()
+        print(f"{n_rows:>10,} {t_sklearn * 1e3:>10.3f}ms {t_flat * 1e3:>10.3f}ms "
+              f"{t_sklearn / t_flat:>7.1f}x {diff:>13.2e}")
@@ -0,0 +1,118 @@
+# Out-of-core training data loader.
+# The CSV is streamed in blocks by pyarrow's CSV reader, keeping only the training columns
+# in compact types (categoricals for the string columns, small ints for counts and flags,
+# float32 for areas), and written once to a Parquet cache keyed by the source file's hash.
+# Later runs load the Parquet file directly.
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from features import binary_flags, categorical_cols, numeric_to_scale
+
+# Bump when the schema below changes, so existing caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+# Bytes of CSV parsed per block
+DEFAULT_BLOCK_SIZE = 16 << 20
+
+# Raw CSV columns needed for training and their types.
+# epc_mapped is derived from region and epc by preprocess().
+CATEGORY_COLUMNS = [c for c in categorical_cols if c != "epc_mapped"] + ["epc"]
+COUNT_COLUMNS = ["construction_year", "nbr_frontages", "nbr_bedrooms"]
+AREA_COLUMNS = [c for c in numeric_to_scale if c not in COUNT_COLUMNS]
+
+SCHEMA = pa.schema(
+    [(c, pa.string()) for c in CATEGORY_COLUMNS]
+    + [(c, pa.int16()) for c in COUNT_COLUMNS]
+    + [(c, pa.float32()) for c in AREA_COLUMNS]
+    + [(c, pa.int8()) for c in binary_flags]
+    # Kept in float64: float32 would round prices above ~16.7M to whole euros or worse
+    + [("price", pa.float64())]
+)
+
+# Integers are parsed as float32 first ("3.0" is common in the CSV), then cast to the
+# schema type, which fails on fractional values instead of truncating them
+_PARSE_TYPES = {f.name: pa.float32() if pa.types.is_integer(f.type) else f.type for f in SCHEMA}
+
+# Nullable pandas dtypes for integer columns with missing values
+_PANDAS_TYPES = {pa.int16(): pd.Int16Dtype(), pa.int8(): pd.Int8Dtype()}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(csv_path: str, cache_dir: str = None) -> str:
+    """Parquet cache file for csv_path: <cache_dir>/<stem>-<sha256 prefix>-v<format>.parquet"""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), "cache")
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{file_hash(csv_path)[:16]}-v{CACHE_FORMAT_VERSION}.parquet")
+
+
+def iter_csv_tables(csv_path: str, block_size: int = DEFAULT_BLOCK_SIZE):
+    """Arrow tables of the training columns in SCHEMA types, one per block of the CSV."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [c for c in SCHEMA.names if c not in header]
+    if missing:
+        raise ValueError(f"{csv_path} is missing training columns: {missing}")
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(include_columns=SCHEMA.names, column_types=_PARSE_TYPES,
+                                              strings_can_be_null=True),
+    )
+    for batch in reader:
+        yield pa.Table.from_batches([batch]).select(SCHEMA.names).cast(SCHEMA)
+
+
+def write_parquet_cache(csv_path: str, parquet_path: str, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """Stream the CSV into parquet_path block by block; returns the number of rows written."""
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = parquet_path + ".tmp"
+    rows = 0
+    with pq.ParquetWriter(tmp_path, SCHEMA) as writer:
+        for table in iter_csv_tables(csv_path, block_size):
+            writer.write_table(table)
+            rows += table.num_rows
+    os.replace(tmp_path, parquet_path)
+    return rows
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """DataFrame with categoricals for the string columns and nullable small ints."""
+    for column in CATEGORY_COLUMNS:
+        index = table.schema.get_field_index(column)
+        if not pa.types.is_dictionary(table.schema.field(index).type):
+            table = table.set_column(index, column, table.column(index).dictionary_encode())
+    df = table.to_pandas(types_mapper=_PANDAS_TYPES.get, self_destruct=True)
+    # Plain NumPy ints where nothing is missing: passthrough columns of several nullable
+    # dtypes would otherwise come out of the ColumnTransformer as an object array
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, "numpy_dtype") \
+                and not df[column].hasnans:
+            df[column] = df[column].astype(dtype.numpy_dtype)
+    return df
+
+
+def load_training_data(csv_path: str, cache_dir: str = None, block_size: int = DEFAULT_BLOCK_SIZE,
+                       use_cache: bool = True) -> pd.DataFrame:
+    """
+    Training columns of csv_path in compact dtypes.
+    The first call converts the CSV to a Parquet cache; later calls with an unchanged
+    CSV read the cache. use_cache=False streams the CSV without writing a cache.
+    """
+    if not use_cache:
+        return to_pandas(pa.concat_tables(list(iter_csv_tables(csv_path, block_size)) or [SCHEMA.empty_table()]))
+
+    parquet_path = cache_path(csv_path, cache_dir)
+    if not os.path.exists(parquet_path):
+        write_parquet_cache(csv_path, parquet_path, block_size)
+    return to_pandas(pq.read_table(parquet_path, read_dictionary=CATEGORY_COLUMNS))
@@ -0,0 +1,112 @@
+# Content-addressed cache of featurized training data.
+# An entry is keyed by the hash of the input frames plus the (unfitted) preprocessor
+# definition, and holds the fitted preprocessor and the transformed matrices as .npy
+# files that are memory-mapped on load (CSR matrices as their data/indices/indptr arrays). Retraining with other model hyperparameters on
+# the same data and preprocessing skips fitting and transforming entirely.
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Bump when the entry layout changes, so existing entries are ignored
+FEATURE_CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "features")
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Hash of a DataFrame's values, index, column names and dtypes."""
+    digest = hashlib.sha256()
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def feature_key(preprocessor, *frames) -> str:
+    """Cache key for fitting preprocessor on frames[0] and transforming every frame."""
+    import sklearn
+
+    digest = hashlib.sha256()
+    digest.update(f"v{FEATURE_CACHE_VERSION} sklearn {sklearn.__version__}".encode())
+    # joblib.hash pickles the unfitted transformer: column lists and every parameter
+    digest.update(joblib.hash(preprocessor).encode())
+    for frame in frames:
+        digest.update(b"-" if frame is None else frame_digest(frame).encode())
+    return digest.hexdigest()[:32]
+
+
+def featurize(preprocessor, X_train, X_val=None, cache_dir: str = DEFAULT_CACHE_DIR):
+    """
+    Fit preprocessor on X_train and transform X_train (and X_val), through the cache.
+    Returns (fitted preprocessor, X_train_processed, X_val_processed or None, info) where
+    info holds the key, whether it was a cache hit and the time spent.
+    cache_dir=None disables the cache.
+    """
+    start = time.perf_counter()
+    if cache_dir is None:
+        X_train_processed = preprocessor.fit_transform(X_train)
+        X_val_processed = None if X_val is None else preprocessor.transform(X_val)
+        return preprocessor, X_train_processed, X_val_processed, \
+            {"key": None, "hit": False, "seconds": time.perf_counter() - start}
+
+    key = feature_key(preprocessor, X_train, X_val)
+    entry = os.path.join(cache_dir, key)
+    hit = os.path.exists(os.path.join(entry, "meta.json"))
+    if not hit:
+        preprocessor.fit(X_train)
+        arrays = {"X_train": preprocessor.transform(X_train)}
+        if X_val is not None:
+            arrays["X_val"] = preprocessor.transform(X_val)
+        _write_entry(entry, preprocessor, arrays)
+
+    fitted, arrays = _read_entry(entry)
+    return fitted, arrays["X_train"], arrays.get("X_val"), \
+        {"key": key, "hit": hit, "seconds": time.perf_counter() - start}
+
+
+def _write_entry(entry: str, preprocessor, arrays: dict):
+    """Write into a temporary directory and rename it, so readers never see a partial entry."""
+    tmp = f"{entry}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    joblib.dump(preprocessor, os.path.join(tmp, "preprocessor.pkl"))
+    meta = {}
+    for name, array in arrays.items():
+        if hasattr(array, "tocsr"):
+            array = array.tocsr()
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(tmp, f"{name}.{part}.npy"), getattr(array, part), allow_pickle=False)
+            meta[name] = {"format": "csr", "dtype": str(array.dtype), "shape": list(array.shape)}
+            continue
+        if array.dtype == object:
+            # Nullable pandas columns passed through by the ColumnTransformer
+            array = array.astype(np.float64)
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        meta[name] = {"format": "dense", "dtype": str(array.dtype), "shape": list(array.shape)}
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"format_version": FEATURE_CACHE_VERSION, "arrays": meta}, f, indent=2)
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # Another run wrote the same entry first; both are identical
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_entry(entry: str):
+    with open(os.path.join(entry, "meta.json")) as f:
+        meta = json.load(f)
+    preprocessor = joblib.load(os.path.join(entry, "preprocessor.pkl"))
+    arrays = {}
+    for name, info in meta["arrays"].items():
+        if info["format"] == "csr":
+            from scipy.sparse import csr_matrix
+
+            parts = [np.load(os.path.join(entry, f"{name}.{part}.npy"), mmap_mode="r", allow_pickle=False)
+                     for part in ("data", "indices", "indptr")]
+            arrays[name] = csr_matrix(tuple(parts), shape=tuple(info["shape"]), copy=False)
+        else:
+            arrays[name] = np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+    return preprocessor, arrays
@@ -0,0 +1,75 @@
+# Feature definitions shared by training (preprocess_module) and serving (api).
+# Kept free of scikit-learn imports so the prediction API can import it cheaply.
+import numpy as np
+
+# Map EPC values to standardized categories, per region
+epc_mapping = {
+    "Flanders": {"A+": "excellent", "A": "excellent", "B": "good",
+                 "C": "poor", "D": "poor", "E": "bad", "F": "bad"},
+    "Brussels-Capital": {"A": "excellent", "B": "good", "C": "good",
+                         "D": "poor", "E": "poor", "F": "bad", "G": "bad"},
+    "Wallonia": {"A++": "excellent", "A+": "excellent", "A": "good",
+                 "B": "good", "C": "poor", "D": "poor", "E": "poor",
+                 "F": "bad", "G": "bad"}
+}
+
+# (region, epc) -> category lookup table, built once at import time.
+# The extra last row/column holds "MISSING" so that unknown values, whose
+# categorical code is -1, land on it without any special casing.
+EPC_REGIONS = list(epc_mapping)
+EPC_RATINGS = sorted({epc for ratings in epc_mapping.values() for epc in ratings})
+EPC_TABLE = np.full((len(EPC_REGIONS) + 1, len(EPC_RATINGS) + 1), "MISSING", dtype=object)
+for i, region in enumerate(EPC_REGIONS):
+    for epc, category in epc_mapping[region].items():
+        EPC_TABLE[i, EPC_RATINGS.index(epc)] = category
+
+def map_epc(df: "pd.DataFrame") -> np.ndarray:
+    """Vectorized EPC mapping: returns the epc_mapped category for every row."""
+    import pandas as pd
+
+    region_codes = pd.Categorical(df["region"], categories=EPC_REGIONS).codes
+    if "epc" in df.columns:
+        epc_codes = pd.Categorical(df["epc"], categories=EPC_RATINGS).codes
+    else:
+        epc_codes = np.full(len(df), -1, dtype=np.int8)
+    return EPC_TABLE[region_codes, epc_codes]
+
+def map_epc_value(region, epc) -> str:
+    """Scalar EPC mapping for a single record, consistent with map_epc."""
+    try:
+        return epc_mapping.get(region, {}).get(epc, "MISSING")
+    except TypeError:
+        return "MISSING"
+
+# Model feature columns
+numeric_to_scale = [
+    "construction_year",
+    "total_area_sqm",
+    "surface_land_sqm",
+    "nbr_frontages",
+    "nbr_bedrooms",
+    "terrace_sqm",
+    "garden_sqm",
+    "primary_energy_consumption_sqm"
+]
+
+binary_flags = [
+    "fl_furnished",
+    "fl_open_fire",
+    "fl_terrace",
+    "fl_garden",
+    "fl_swimming_pool",
+    "fl_floodzone",
+    "fl_double_glazing"
+]
+
+categorical_cols = [
+    "property_type",
+    "subproperty_type",
+    "region",
+    "province",
+    "equipped_kitchen",
+    "state_building",
+    "heating_type",
+    "epc_mapped"
+]
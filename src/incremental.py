@@ -0,0 +1,292 @@
+# Incremental retraining on newly appended listings.
+# Every trained model is written as a version directory with its lineage:
+#
+#   models/versions/<version>/preprocessor.pkl
+#   models/versions/<version>/model.pkl
+#   models/versions/<version>/row_hashes.npy   64-bit hash of every data row the version has seen
+#   models/versions/<version>/lineage.json     parent, mode, data source, row counts, metrics
+#
+# An update hashes the current data, keeps the rows the latest version hasn't seen and
+# measures the model's error on them. If it has drifted more than the threshold above the
+# reference error, the preprocessor and model are refitted from scratch. Otherwise the
+# preprocessor is reused unchanged (same categories and statistics) and extra boosting
+# stages are warm-started on all rows.
+#
+# --promote makes the new version the default model: its pickles replace models/*.pkl and the
+# bundles and comparables index are rebuilt, so every served artifact comes from it.
+#
+# Usage (from the repo root):
+#   python src/incremental.py --extra-stages 20 --drift-threshold 0.25 [--promote]
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+# Repo root on the path for the serving-side bundle exporter and comparables index
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+VERSIONS_DIR = os.path.join("models", "versions")
+# Pickle-free exports of the default model, served as registry versions "bundle" and "compact"
+BUNDLE_DIRS = {"bundle": "bundle", "compact": "compact"}
+DEFAULT_COMPACT_TOLERANCE = 1.0
+DEFAULT_EXTRA_STAGES = 20
+DEFAULT_DRIFT_THRESHOLD = 0.25
+# Old rows scored for the reference error when the parent has no validation error
+REFERENCE_SAMPLE = 10_000
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray:
+    # Numbers are hashed as float64: the loader's int dtypes turn nullable once a column
+    # has missing values, which must not change the hashes of the rows already seen
+    numeric = df.select_dtypes("number").columns
+    df = df.astype({c: np.float64 for c in numeric})
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Sorted unique 64-bit hashes of the rows' values (independent of the index and int dtypes)."""
+    return np.unique(_hash_rows(df))
+
+
+def new_row_mask(df: pd.DataFrame, seen: np.ndarray) -> np.ndarray:
+    """True for rows whose hash is not in the sorted array seen."""
+    return ~np.isin(_hash_rows(df), seen)
+
+
+def trainer_of(model) -> str:
+    """Engine name (see trainers.py) of a fitted estimator."""
+    names = {"GradientBoostingRegressor": "gbr", "HistGradientBoostingRegressor": "hist",
+             "XGBRegressor": "xgboost"}
+    try:
+        return names[type(model).__name__]
+    except KeyError:
+        raise TypeError(f"Incremental updates don't support {type(model).__name__}")
+
+
+def n_stages(model) -> int:
+    """Number of boosting stages in a fitted estimator."""
+    if hasattr(model, "n_estimators_"):
+        return int(model.n_estimators_)
+    if hasattr(model, "n_iter_"):
+        return int(model.n_iter_)
+    return int(model.get_booster().num_boosted_rounds())
+
+
+def warm_start(model, X, y, extra_stages: int = DEFAULT_EXTRA_STAGES):
+    """Add extra_stages boosting stages fitted on (X, y) to a fitted model, keeping the existing ones."""
+    trainer = trainer_of(model)
+    if trainer == "gbr":
+        model.set_params(warm_start=True, n_estimators=n_stages(model) + extra_stages)
+        # Early stopping would be checked against the stages already fitted
+        model.set_params(n_iter_no_change=None)
+        return model.fit(X, y)
+    if trainer == "hist":
+        model.set_params(warm_start=True, max_iter=n_stages(model) + extra_stages, early_stopping=False)
+        return model.fit(X, y)
+    # XGBoost continues training from the existing booster
+    from sklearn.base import clone
+
+    continued = clone(model).set_params(n_estimators=extra_stages)
+    return continued.fit(X, y, xgb_model=model.get_booster())
+
+
+def latest_version(versions_dir: str = VERSIONS_DIR):
+    """Path of the most recent version directory, or None."""
+    if not os.path.isdir(versions_dir):
+        return None
+    versions = sorted(v for v in os.listdir(versions_dir)
+                      if os.path.exists(os.path.join(versions_dir, v, "lineage.json")))
+    return os.path.join(versions_dir, versions[-1]) if versions else None
+
+
+def load_version(version_dir: str):
+    """(preprocessor, model, seen row hashes, lineage) of a version directory."""
+    with open(os.path.join(version_dir, "lineage.json")) as f:
+        lineage = json.load(f)
+    return (joblib.load(os.path.join(version_dir, "preprocessor.pkl")),
+            joblib.load(os.path.join(version_dir, "model.pkl")),
+            np.load(os.path.join(version_dir, "row_hashes.npy")),
+            lineage)
+
+
+def write_version(preprocessor, model, hashes: np.ndarray, lineage: dict,
+                  versions_dir: str = VERSIONS_DIR) -> str:
+    """Write a new version directory; lineage gets its version name and creation time."""
+    now = datetime.now(timezone.utc)
+    version = now.strftime("%Y%m%dT%H%M%S%fZ")
+    lineage = dict(lineage, version=version, created=now.isoformat(timespec="seconds"))
+    version_dir = os.path.join(versions_dir, version)
+    os.makedirs(version_dir)
+    joblib.dump(preprocessor, os.path.join(version_dir, "preprocessor.pkl"))
+    joblib.dump(model, os.path.join(version_dir, "model.pkl"))
+    np.save(os.path.join(version_dir, "row_hashes.npy"), hashes, allow_pickle=False)
+    with open(os.path.join(version_dir, "lineage.json"), "w") as f:
+        json.dump(lineage, f, indent=2)
+    return version_dir
+
+
+def data_source(path: str, rows: int) -> dict:
+    from data_loader import file_hash
+
+    return {"path": os.path.abspath(path), "sha256": file_hash(path), "rows": rows}
+
+
+def update(df: pd.DataFrame, parent_dir: str, extra_stages: int = DEFAULT_EXTRA_STAGES,
+           drift_threshold: float = DEFAULT_DRIFT_THRESHOLD, data: dict = None,
+           versions_dir: str = VERSIONS_DIR, random_state: int = 0):
+    """
+    Update the version in parent_dir with the rows of df (preprocessed, with "price") it hasn't seen.
+    Returns the new version directory, or None if there are no new rows.
+    """
+    from trainers import train
+
+    preprocessor, model, seen, parent = load_version(parent_dir)
+    is_new = new_row_mask(df, seen)
+    if not is_new.any():
+        return None
+
+    X = df.drop(columns=["price", "price_per_sqm"], errors="ignore")
+    y = df["price"].to_numpy()
+    X_new, y_new = X[is_new], y[is_new]
+
+    # Drift: error on the new rows relative to the parent's validation error, or, without
+    # one, to its error on a sample of the rows it has seen (optimistic, so refits come sooner)
+    reference_mae = parent.get("metrics", {}).get("val_mae")
+    if reference_mae is None:
+        old = np.flatnonzero(~is_new)
+        old = np.random.default_rng(random_state).choice(old, min(len(old), REFERENCE_SAMPLE), replace=False)
+        reference_mae = mean_absolute_error(y[old], model.predict(preprocessor.transform(X.iloc[old])))
+    mae_before = mean_absolute_error(y_new, model.predict(preprocessor.transform(X_new)))
+    drift = mae_before / reference_mae - 1 if reference_mae else float("inf")
+
+    trainer = trainer_of(model)
+    start = time.perf_counter()
+    if drift > drift_threshold:
+        mode = "full_refit"
+        preprocessor, model, _ = train(trainer, X, y, random_state=random_state,
+                                       sparse=parent.get("sparse", False))
+    else:
+        mode = "warm_start"
+        model = warm_start(model, preprocessor.transform(X), y, extra_stages)
+    fit_seconds = time.perf_counter() - start
+
+    lineage = {
+        "parent": parent["version"],
+        "mode": mode,
+        "trainer": trainer,
+        "sparse": parent.get("sparse", False),
+        "data": dict(data or {}, rows=len(df), new_rows=int(is_new.sum())),
+        "stages": n_stages(model),
+        "fit_seconds": fit_seconds,
+        "metrics": {
+            "reference_mae": float(reference_mae),
+            "new_rows_mae_before": float(mae_before),
+            "new_rows_mae_after": float(mean_absolute_error(y_new, model.predict(preprocessor.transform(X_new)))),
+            "drift": float(drift),
+            "drift_threshold": drift_threshold,
+            # A warm-started model keeps the parent's validation error as the reference for
+            # the next update; a refitted one has none
+            "val_mae": parent.get("metrics", {}).get("val_mae") if mode == "warm_start" else None,
+        },
+    }
+    hashes = np.union1d(seen, row_hashes(df))
+    return write_version(preprocessor, model, hashes, lineage, versions_dir)
+
+
+def export_bundles(preprocessor, model, X_check, models_dir: str = "models",
+                   compact_tolerance: float = DEFAULT_COMPACT_TOLERANCE) -> dict:
+    """
+    Export the served model as models/bundle and its pruned float32 variant models/compact,
+    each verified against model.predict(X_check), and return their manifests by version name.
+    The compiled tree engine only covers gbr; for other engines both directories are removed,
+    so the registry can't serve a bundle of an earlier model. Returns {} then.
+    """
+    from api.bundle import export_bundle
+    from api.encoder import CompiledEncoder
+    from api.tree_engine import FlatTreeEnsemble
+
+    bundle_dirs = {name: os.path.join(models_dir, path) for name, path in BUNDLE_DIRS.items()}
+    if trainer_of(model) != "gbr":
+        for bundle_dir in bundle_dirs.values():
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+        return {}
+    encoder = CompiledEncoder.from_column_transformer(preprocessor)
+    flat_model = FlatTreeEnsemble.from_sklearn(model)
+    return {
+        "bundle": export_bundle(encoder, flat_model, bundle_dirs["bundle"], reference_model=model,
+                                X_check=X_check),
+        "compact": export_bundle(encoder, flat_model, bundle_dirs["compact"], reference_model=model,
+                                 X_check=X_check, compact_tolerance=compact_tolerance),
+    }
+
+
+def promote(version_dir: str, df: pd.DataFrame, models_dir: str = "models",
+            compact_tolerance: float = DEFAULT_COMPACT_TOLERANCE) -> dict:
+    """
+    Make a version the default model: re-export models/bundle and models/compact from it,
+    rebuild models/comparables.pkl from df (the preprocessed data it was trained on) and
+    copy its pickles over models/preprocessor.pkl and models/model.pkl, so no served
+    artifact is left from the previous training. Returns the bundle manifests.
+    """
+    from api.comparables import ComparablesIndex
+
+    preprocessor, model, _, _ = load_version(version_dir)
+    X = df.drop(columns=["price", "price_per_sqm"], errors="ignore")
+    manifests = export_bundles(preprocessor, model, preprocessor.transform(X[:1000]), models_dir,
+                               compact_tolerance)
+    ComparablesIndex.build(df).save(os.path.join(models_dir, "comparables.pkl"))
+    # The pickles go last: the prediction cache sees the new model.pkl and reloads
+    for name in ("preprocessor.pkl", "model.pkl"):
+        tmp = os.path.join(models_dir, name + ".tmp")
+        shutil.copyfile(os.path.join(version_dir, name), tmp)
+        os.replace(tmp, os.path.join(models_dir, name))
+    return manifests
+
+
+if __name__ == "__main__":
+    from data_loader import load_training_data
+    from preprocess_module import preprocess
+
+    parser = argparse.ArgumentParser(description="Update the latest model version with new listings")
+    parser.add_argument("--data", default="data/immo_data_subset.csv")
+    parser.add_argument("--versions-dir", default=VERSIONS_DIR)
+    parser.add_argument("--extra-stages", type=int, default=DEFAULT_EXTRA_STAGES,
+                        help="Boosting stages added by a warm-start update")
+    parser.add_argument("--drift-threshold", type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                        help="Relative MAE increase on new rows above which the model is refitted")
+    parser.add_argument("--promote", action="store_true",
+                        help="Also make the new version the default model (pickles, bundles, comparables)")
+    parser.add_argument("--compact-tolerance", type=float, default=DEFAULT_COMPACT_TOLERANCE,
+                        help="Largest prediction change (euros) allowed when pruning the compact bundle")
+    args = parser.parse_args()
+
+    parent_dir = latest_version(args.versions_dir)
+    if parent_dir is None:
+        raise SystemExit(f"No version in {args.versions_dir}; run src/setup_model.py first")
+
+    df = preprocess(load_training_data(args.data), copy=False)
+    version_dir = update(df, parent_dir, args.extra_stages, args.drift_threshold,
+                         data_source(args.data, len(df)), args.versions_dir)
+    if version_dir is None:
+        print(f"No new rows since {parent_dir}")
+    else:
+        with open(os.path.join(version_dir, "lineage.json")) as f:
+            lineage = json.load(f)
+        metrics = lineage["metrics"]
+        print(f"{lineage['mode']}: {lineage['data']['new_rows']:,} new rows, drift {metrics['drift']:+.1%}, "
+              f"MAE on new rows {metrics['new_rows_mae_before']:,.0f} -> {metrics['new_rows_mae_after']:,.0f}, "
+              f"{lineage['stages']} stages, {lineage['fit_seconds']:.1f} s")
+        print(f"Version saved to: {version_dir}")
+        if args.promote:
+            manifests = promote(version_dir, df, compact_tolerance=args.compact_tolerance)
+            exported = " and ".join(f"models/{BUNDLE_DIRS[name]}" for name in manifests) or "no bundles"
+            print(f"Promoted to models/preprocessor.pkl and models/model.pkl, with {exported} "
+                  f"and models/comparables.pkl rebuilt")
@@ -1,81 +1,61 @@
+import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
+from features import map_epc, numeric_to_scale, binary_flags, categorical_cols
 
 # Preprocessing function
-def preprocess(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    
+def preprocess(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+    """Add the derived columns; copy=False adds them to df in place to save memory."""
+    if copy:
+        df = df.copy()
+
     # Calculate price per square meter
     df["price_per_sqm"] = df["price"] / df["total_area_sqm"]
     df["price_per_sqm"].replace([float("inf"), float("-inf")], pd.NA)
     df["price_per_sqm"].fillna(df["price_per_sqm"].median())
 
     # Map EPC values to standardized categories
-    epc_mapping = {
-        "Flanders": {"A+": "excellent", "A": "excellent", "B": "good",
-                     "C": "poor", "D": "poor", "E": "bad", "F": "bad"},
-        "Brussels-Capital": {"A": "excellent", "B": "good", "C": "good",
-                             "D": "poor", "E": "poor", "F": "bad", "G": "bad"},
-        "Wallonia": {"A++": "excellent", "A+": "excellent", "A": "good",
-                     "B": "good", "C": "poor", "D": "poor", "E": "poor",
-                     "F": "bad", "G": "bad"}
-    }
-    df["epc_mapped"] = df.apply(
-        lambda row: epc_mapping.get(row["region"], {}).get(row["epc"], "MISSING"),
-        axis=1
-    )
+    df["epc_mapped"] = map_epc(df)
 
     return df
 
 # Define preprocessor for model features
-numeric_to_scale = [
-    "construction_year",
-    "total_area_sqm",
-    "surface_land_sqm",
-    "nbr_frontages",
-    "nbr_bedrooms",
-    "terrace_sqm",
-    "garden_sqm",
-    "primary_energy_consumption_sqm"
-]
-
-binary_flags = [
-    "fl_furnished",
-    "fl_open_fire",
-    "fl_terrace",
-    "fl_garden",
-    "fl_swimming_pool",
-    "fl_floodzone",
-    "fl_double_glazing"
-]
-
-categorical_cols = [
-    "property_type",
-    "subproperty_type",
-    "region",
-    "province",
-    "equipped_kitchen",
-    "state_building",
-    "heating_type",
-    "epc_mapped"
-]
-
-numeric_transformer = Pipeline([
-    ("imputer", SimpleImputer(strategy="median")),
-    ("scaler", StandardScaler())
-])
-
-categorical_transformer = Pipeline([
-    ("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=False))
-])
-
-binary_transformer = "passthrough"
-
-preprocessor = ColumnTransformer([
-    ("num", numeric_transformer, numeric_to_scale),
-    ("bin", binary_transformer, binary_flags),
-    ("cat", categorical_transformer, categorical_cols)
-])
\ No newline at end of file
+def make_preprocessor(native_categorical: bool = False, sparse: bool = False) -> ColumnTransformer:
+    """
+    Unfitted ColumnTransformer for the model features.
+    native_categorical=False one-hot encodes the categorical columns (dense).
+    native_categorical=True encodes them as one ordinal code column each (unknown or
+    missing -> NaN), for engines that split on categories natively.
+    sparse=True keeps the one-hot columns sparse and outputs a CSR matrix, for
+    estimators that accept sparse input.
+    """
+    if sparse and native_categorical:
+        raise ValueError("sparse output only applies to one-hot encoded categoricals")
+
+    numeric_transformer = Pipeline([
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler())
+    ])
+
+    if native_categorical:
+        categorical_transformer = Pipeline([
+            ("encoder", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan,
+                                       encoded_missing_value=np.nan))
+        ])
+    else:
+        categorical_transformer = Pipeline([
+            ("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=sparse))
+        ])
+
+    binary_transformer = "passthrough"
+
+    return ColumnTransformer([
+        ("num", numeric_transformer, numeric_to_scale),
+        ("bin", binary_transformer, binary_flags),
+        ("cat", categorical_transformer, categorical_cols)
+    ], sparse_threshold=1.0 if sparse else 0.0)
+
+preprocessor = make_preprocessor()
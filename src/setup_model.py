@@ -1,35 +1,113 @@
-import pandas as pd
+import argparse
+import os
+import sys
 import joblib
-from sklearn.ensemble import GradientBoostingRegressor
-from preprocess_module import preprocess, preprocessor
+from data_loader import load_training_data
+from preprocess_module import preprocess
+from feature_cache import DEFAULT_CACHE_DIR
+from incremental import data_source, export_bundles, n_stages, row_hashes, write_version
+from trainers import DEFAULT_TRAINER, TRAINERS, format_report, split, train
+
+# Repo root on the path for the serving-side comparables index
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from api.comparables import ComparablesIndex
 
 # Paths
 DATA_PATH = "data/immo_data_subset.csv"
 PREPROCESSOR_PATH = "models/preprocessor.pkl"
 MODEL_PATH = "models/model.pkl"
+BUNDLE_DIR = "models/bundle"
+COMPARABLES_PATH = "models/comparables.pkl"
+COMPACT_BUNDLE_DIR = "models/compact"
+
+# Training engine (see trainers.py), validation split and engines to compare against
+parser = argparse.ArgumentParser(description="Train and save the Immo Eliza price model")
+parser.add_argument("--trainer", choices=TRAINERS, default=DEFAULT_TRAINER,
+                    help="Engine whose artifacts are saved (default: IMMO_ELIZA_TRAINER or gbr)")
+parser.add_argument("--compare", nargs="*", choices=TRAINERS, default=[],
+                    help="Also train these engines on the same split and report them (not saved)")
+parser.add_argument("--validation-fraction", type=float, default=0.2,
+                    help="Share of rows held out for the validation error; the saved model is then refit on all rows")
+parser.add_argument("--n-jobs", type=int, default=None, help="Threads for multithreaded engines")
+parser.add_argument("--sparse", action="store_true",
+                    help="Train on a sparse (CSR) one-hot matrix instead of a dense one (gbr only)")
+parser.add_argument("--no-cache", action="store_true",
+                    help="Don't read or write the Parquet data cache and the feature cache")
+parser.add_argument("--compact-tolerance", type=float, default=1.0,
+                    help="Largest prediction change (euros) allowed when pruning the compact bundle")
+args = parser.parse_args()
 
-# Load dataset
-df = pd.read_csv(DATA_PATH)
+# Load dataset (compact dtypes, from the Parquet cache in data/cache/ after the first run)
+df = load_training_data(DATA_PATH, use_cache=not args.no_cache)
 
-# Preprocess dataframe
-df_processed = preprocess(df)
+# Preprocess dataframe in place, the loaded frame isn't needed separately
+df_processed = preprocess(df, copy=False)
 
 # Define target and features
 y = df_processed["price"]
 X = df_processed.drop(columns=["price", "price_per_sqm"])
+X_train, X_val, y_train, y_val = split(X, y, args.validation_fraction)
 
-# Fit preprocessor
-preprocessor.fit(X)
-X_processed = preprocessor.transform(X)
+# Fit preprocessor and train model; featurized data is reused from data/cache/features/
+# when neither the data nor the preprocessing changed
+feature_cache = None if args.no_cache else DEFAULT_CACHE_DIR
+preprocessor, model, report = train(args.trainer, X_train, y_train, X_val, y_val, args.n_jobs,
+                                    feature_cache=feature_cache, sparse=args.sparse)
+reports = [report]
+for trainer in args.compare:
+    if trainer != args.trainer:
+        reports.append(train(trainer, X_train, y_train, X_val, y_val, args.n_jobs,
+                             feature_cache=feature_cache)[2])
+print(format_report(reports))
+
+# The validation split only measures the error; the saved model is refit on every row
+if X_val is not None:
+    preprocessor, model, refit = train(args.trainer, X, y, n_jobs=args.n_jobs,
+                                       feature_cache=feature_cache, sparse=args.sparse)
+    report["train_seconds"] = refit["train_seconds"]
+    print(f"Refit {args.trainer} on all {len(X):,} rows in {refit['train_seconds']:.1f}s")
 
 # Save preprocessor
 joblib.dump(preprocessor, PREPROCESSOR_PATH)
 print(f"Preprocessor saved to: {PREPROCESSOR_PATH}")
 
-# Train model
-model = GradientBoostingRegressor()
-model.fit(X_processed, y)
-
 # Save trained model
 joblib.dump(model, MODEL_PATH)
-print(f"Model saved to: {MODEL_PATH}")
\ No newline at end of file
+print(f"Model saved to: {MODEL_PATH} ({args.trainer})")
+
+# Nearest-neighbour index of all listings for "comparable properties" lookups
+comparables = ComparablesIndex.build(df_processed)
+comparables.save(COMPARABLES_PATH)
+print(f"Comparables index saved to: {COMPARABLES_PATH} ({len(comparables):,} listings, "
+      f"{len(comparables.partitions) - 1} region/property type partitions)")
+
+# Snapshot as a version with lineage, the starting point for src/incremental.py updates
+version_dir = write_version(preprocessor, model, row_hashes(df_processed), {
+    "parent": None,
+    "mode": "full",
+    "trainer": args.trainer,
+    "sparse": args.sparse,
+    "data": dict(data_source(DATA_PATH, len(df_processed)), new_rows=len(df_processed)),
+    "stages": n_stages(model),
+    "fit_seconds": report["train_seconds"],
+    "metrics": {k: report[k] for k in ("val_mae", "val_rmse", "val_r2") if k in report},
+})
+print(f"Version saved to: {version_dir}")
+
+# Export pickle-free, memory-mappable bundles, verified against the pickled model.
+# The compiled tree engine only covers GradientBoostingRegressor on one-hot features;
+# for other engines stale bundles of an earlier gbr model are removed.
+manifests = export_bundles(preprocessor, model, preprocessor.transform(X[:1000]), "models",
+                           args.compact_tolerance)
+if manifests:
+    manifest = manifests["bundle"]
+    print(f"Bundle saved to: {BUNDLE_DIR} (max abs diff vs pickle: {manifest['verification']['max_abs_diff']:.2e})")
+    # Pruned float32 variant, served as version "compact"
+    manifest = manifests["compact"]
+    compaction = manifest["trees"]["compaction"]
+    print(f"Compact bundle saved to: {COMPACT_BUNDLE_DIR} (trees {compaction['trees'][0]} -> "
+          f"{compaction['trees'][1]}, depth {compaction['depth'][0]} -> {compaction['depth'][1]}, "
+          f"max abs diff vs pickle: {manifest['verification']['max_abs_diff']:.2e})")
+else:
+    print(f"Bundle not exported: the {args.trainer!r} engine is served from the pickles only "
+          f"(removed {BUNDLE_DIR} and {COMPACT_BUNDLE_DIR})")
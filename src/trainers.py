@@ -0,0 +1,123 @@
+# Pluggable training engines for setup_model.py.
+#   "gbr"     -> GradientBoostingRegressor on one-hot features (exact splits, single-threaded)
+#   "hist"    -> HistGradientBoostingRegressor, categorical columns split natively (OpenMP)
+#   "xgboost" -> XGBRegressor(tree_method="hist"), categorical columns split natively (multithreaded)
+# Every engine produces a (preprocessor, model) pair with model.predict(preprocessor.transform(X)),
+# which is what api/predict.py loads from models/preprocessor.pkl and models/model.pkl.
+import os
+import time
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from feature_cache import featurize
+from preprocess_module import make_preprocessor
+
+TRAINERS = ("gbr", "hist", "xgboost")
+DEFAULT_TRAINER = os.environ.get("IMMO_ELIZA_TRAINER", "gbr")
+
+# Engines fed ordinal category codes instead of dense one-hot columns
+NATIVE_CATEGORICAL = ("hist", "xgboost")
+# Engines that can train on the sparse (CSR) one-hot matrix
+SPARSE_INPUT = ("gbr",)
+
+
+def make_estimator(trainer: str, categorical_features: list, n_features: int,
+                   n_jobs: int = None, random_state: int = 0):
+    """Unfitted estimator; categorical_features are column indices of the preprocessed matrix."""
+    n_jobs = n_jobs or os.cpu_count()
+    if trainer == "gbr":
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(random_state=random_state)
+    if trainer == "hist":
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        # Thread count follows OMP_NUM_THREADS / threadpoolctl
+        return HistGradientBoostingRegressor(categorical_features=categorical_features,
+                                             random_state=random_state)
+    if trainer == "xgboost":
+        try:
+            from xgboost import XGBRegressor
+        except ImportError:
+            raise ImportError("The 'xgboost' trainer needs the xgboost package (see requirements.txt)")
+        feature_types = ["c" if i in set(categorical_features) else "q" for i in range(n_features)]
+        return XGBRegressor(tree_method="hist", enable_categorical=True, feature_types=feature_types,
+                            n_jobs=n_jobs, random_state=random_state)
+    raise ValueError(f"Unknown trainer {trainer!r}, expected one of {TRAINERS}")
+
+
+def categorical_feature_indices(preprocessor) -> list:
+    """Output columns of a fitted preprocessor that hold category codes (native encoding only)."""
+    out = preprocessor.output_indices_["cat"]
+    return list(range(out.start, out.stop))
+
+
+def train(trainer: str, X_train, y_train, X_val=None, y_val=None, n_jobs: int = None,
+          random_state: int = 0, feature_cache: str = None, sparse: bool = False):
+    """
+    Fit a preprocessor and a fresh estimator with the given engine.
+    Returns (preprocessor, model, report) where report holds the featurization and
+    wall-clock training time and, if validation data is given, the validation MAE/RMSE/R².
+    feature_cache is a feature_cache.py directory; when set, featurized data is reused
+    across runs with the same data and preprocessing.
+    sparse=True trains on a CSR one-hot matrix (engines in SPARSE_INPUT only).
+    """
+    if sparse and trainer not in SPARSE_INPUT:
+        raise ValueError(f"The {trainer!r} trainer does not take sparse input, use one of {SPARSE_INPUT}")
+    native = trainer in NATIVE_CATEGORICAL
+    preprocessor, X_processed, X_val_processed, features = featurize(
+        make_preprocessor(native_categorical=native, sparse=sparse), X_train, X_val,
+        cache_dir=feature_cache)
+
+    start = time.perf_counter()
+    categorical = categorical_feature_indices(preprocessor) if native else []
+    model = make_estimator(trainer, categorical, X_processed.shape[1], n_jobs, random_state)
+    model.fit(X_processed, y_train)
+    train_seconds = time.perf_counter() - start
+
+    report = {
+        "trainer": trainer,
+        "featurize_seconds": features["seconds"],
+        "feature_cache_hit": features["hit"],
+        "train_seconds": train_seconds,
+        "rows_train": len(X_train),
+        "n_features": int(X_processed.shape[1]),
+        "sparse": sparse,
+        "feature_bytes": _nbytes(X_processed),
+    }
+    if X_val is not None:
+        y_pred = model.predict(X_val_processed)
+        report.update({
+            "rows_validation": len(X_val),
+            "val_mae": float(mean_absolute_error(y_val, y_pred)),
+            "val_rmse": float(np.sqrt(mean_squared_error(y_val, y_pred))),
+            "val_r2": float(r2_score(y_val, y_pred)),
+        })
+    return preprocessor, model, report
+
+
+def _nbytes(X) -> int:
+    """Memory held by a dense array or a CSR matrix."""
+    if hasattr(X, "indptr"):
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(X.nbytes)
+
+
+def split(X, y, validation_fraction: float = 0.2, random_state: int = 0):
+    """(X_train, X_val, y_train, y_val); no validation set if validation_fraction is 0."""
+    if not validation_fraction:
+        return X, None, y, None
+    return train_test_split(X, y, test_size=validation_fraction, random_state=random_state)
+
+
+def format_report(reports: list) -> str:
+    """Plain-text table of training reports."""
+    lines = [f"{'trainer':<8} {'features s':>15} {'train s':>9} {'val MAE':>12} {'val RMSE':>12} {'val R2':>7}"]
+    for r in reports:
+        features = f"{r['featurize_seconds']:.2f}{' (cached)' if r['feature_cache_hit'] else ''}"
+        if "val_mae" in r:
+            lines.append(f"{r['trainer']:<8} {features:>15} {r['train_seconds']:>9.2f} {r['val_mae']:>12,.0f} "
+                         f"{r['val_rmse']:>12,.0f} {r['val_r2']:>7.3f}")
+        else:
+            lines.append(f"{r['trainer']:<8} {features:>15} {r['train_seconds']:>9.2f} {'-':>12} {'-':>12} {'-':>7}")
+    return "\n".join(lines)
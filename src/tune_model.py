@@ -0,0 +1,189 @@
+# Hyperparameter search for the training engines in trainers.py.
+# Candidates are cross-validated in a process pool with successive halving: every round
+# fits the surviving configurations on a larger share of the training rows and keeps the
+# best 1/factor, so bad configurations are pruned after cheap fits on few rows.
+# The transformed training matrix comes memory-mapped from the feature cache, and joblib
+# passes memmaps to the workers by file name, so all workers share one copy in the page cache.
+#
+# Usage (from the repo root):
+#   python src/tune_model.py --trainer gbr --candidates 48 --workers 8
+#   python src/tune_model.py --trainer hist --search random --candidates 20
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import HalvingRandomSearchCV, KFold, RandomizedSearchCV
+
+from feature_cache import DEFAULT_CACHE_DIR, featurize
+from preprocess_module import make_preprocessor
+from trainers import NATIVE_CATEGORICAL, TRAINERS, categorical_feature_indices, make_estimator
+
+SEARCHES = ("halving", "random")
+
+# Search spaces per engine (scipy distributions or lists, as accepted by sklearn searches)
+PARAM_SPACES = {
+    "gbr": {
+        "n_estimators": randint(100, 600),
+        "learning_rate": loguniform(0.02, 0.3),
+        "max_depth": randint(2, 7),
+        "min_samples_leaf": randint(1, 50),
+        "subsample": uniform(0.6, 0.4),
+        "max_features": [None, "sqrt", 0.5],
+    },
+    "hist": {
+        "max_iter": randint(100, 1000),
+        "learning_rate": loguniform(0.02, 0.3),
+        "max_leaf_nodes": randint(15, 128),
+        "min_samples_leaf": randint(5, 100),
+        "l2_regularization": loguniform(1e-3, 10),
+    },
+    "xgboost": {
+        "n_estimators": randint(100, 1000),
+        "learning_rate": loguniform(0.02, 0.3),
+        "max_depth": randint(3, 10),
+        "min_child_weight": loguniform(0.5, 20),
+        "subsample": uniform(0.6, 0.4),
+        "colsample_bytree": uniform(0.5, 0.5),
+    },
+}
+
+# Early stopping on an internal validation split: stops adding trees once the score
+# hasn't improved for n_iter_no_change rounds, so oversized n_estimators cost little
+EARLY_STOPPING = {
+    "gbr": {"n_iter_no_change": 10, "validation_fraction": 0.1},
+    "hist": {"early_stopping": True, "n_iter_no_change": 10, "validation_fraction": 0.1},
+}
+
+RESULT_COLUMNS = ["iter", "n_resources", "rank_test_score", "mean_cv_mae", "std_cv_mae",
+                  "mean_fit_time", "std_fit_time", "mean_score_time", "params"]
+
+
+def make_search(trainer: str, estimator, search: str = "halving", candidates: int = 32, cv: int = 3,
+                factor: int = 3, workers: int = 1, random_state: int = 0):
+    """Unfitted cross-validated search over PARAM_SPACES[trainer], scored by MAE."""
+    common = dict(param_distributions=PARAM_SPACES[trainer], cv=KFold(cv, shuffle=True, random_state=random_state),
+                  scoring="neg_mean_absolute_error", n_jobs=workers, random_state=random_state, refit=True)
+    if search == "halving":
+        # n_samples is the resource: early rounds fit on few rows, the last on all of them
+        return HalvingRandomSearchCV(estimator, n_candidates=candidates, factor=factor,
+                                     resource="n_samples", min_resources="exhaust", **common)
+    if search == "random":
+        return RandomizedSearchCV(estimator, n_iter=candidates, **common)
+    raise ValueError(f"Unknown search {search!r}, expected one of {SEARCHES}")
+
+
+def tune(trainer: str, X_train, y_train, X_val=None, y_val=None, search: str = "halving",
+         candidates: int = 32, cv: int = 3, factor: int = 3, workers: int = 1, early_stopping: bool = True,
+         feature_cache: str = DEFAULT_CACHE_DIR, sparse: bool = False, random_state: int = 0):
+    """
+    Search hyperparameters of one engine.
+    Returns (preprocessor, best model refitted on all of X_train, results DataFrame, report).
+    """
+    if trainer not in TRAINERS:
+        raise ValueError(f"Unknown trainer {trainer!r}, expected one of {TRAINERS}")
+    native = trainer in NATIVE_CATEGORICAL
+    with tempfile.TemporaryDirectory() as tmp:
+        # Without a cache directory the matrices are still written once and memory-mapped,
+        # so they can be shared with the workers
+        preprocessor, X_processed, X_val_processed, features = featurize(
+            make_preprocessor(native_categorical=native, sparse=sparse), X_train, X_val,
+            cache_dir=feature_cache or tmp)
+
+        estimator = make_estimator(trainer, categorical_feature_indices(preprocessor) if native else [],
+                                   X_processed.shape[1], n_jobs=1, random_state=random_state)
+        if early_stopping and trainer in EARLY_STOPPING:
+            estimator.set_params(**EARLY_STOPPING[trainer])
+
+        searcher = make_search(trainer, estimator, search, candidates, cv, factor, workers, random_state)
+        start = time.perf_counter()
+        searcher.fit(X_processed, np.asarray(y_train))
+        search_seconds = time.perf_counter() - start
+
+        report = {
+            "trainer": trainer,
+            "search": search,
+            "candidates": candidates,
+            "fits": len(searcher.cv_results_["params"]) * cv,
+            "workers": workers,
+            "featurize_seconds": features["seconds"],
+            "search_seconds": search_seconds,
+            "refit_seconds": float(searcher.refit_time_),
+            "best_params": _json_params(searcher.best_params_),
+            "best_cv_mae": float(-searcher.best_score_),
+        }
+        if X_val is not None:
+            y_pred = searcher.best_estimator_.predict(X_val_processed)
+            report["val_mae"] = float(mean_absolute_error(y_val, y_pred))
+            report["val_rmse"] = float(np.sqrt(mean_squared_error(y_val, y_pred)))
+
+    return preprocessor, searcher.best_estimator_, results_table(searcher, len(X_train)), report
+
+
+def results_table(searcher, n_rows: int) -> pd.DataFrame:
+    """One row per configuration and halving round, last round first, best first, with fit times."""
+    results = pd.DataFrame(searcher.cv_results_)
+    if "iter" not in results:
+        # Plain random search: a single round on all rows
+        results["iter"] = 0
+        results["n_resources"] = n_rows
+    results["mean_cv_mae"] = -results["mean_test_score"]
+    results["std_cv_mae"] = results["std_test_score"]
+    results["params"] = results["params"].map(lambda p: json.dumps(_json_params(p), sort_keys=True))
+    return results[RESULT_COLUMNS].sort_values(["iter", "rank_test_score"], ascending=[False, True],
+                                               ignore_index=True)
+
+
+def _json_params(params: dict) -> dict:
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+
+
+if __name__ == "__main__":
+    from data_loader import load_training_data
+    from preprocess_module import preprocess
+    from trainers import split
+
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search")
+    parser.add_argument("--data", default="data/immo_data_subset.csv")
+    parser.add_argument("--output-dir", default="models/tuned",
+                        help="Where the best preprocessor.pkl/model.pkl, results.csv and report.json go")
+    parser.add_argument("--trainer", choices=TRAINERS, default="gbr")
+    parser.add_argument("--search", choices=SEARCHES, default="halving",
+                        help="halving = successive halving over training rows, random = plain random search")
+    parser.add_argument("--candidates", type=int, default=32, help="Configurations sampled")
+    parser.add_argument("--cv", type=int, default=3, help="Cross-validation folds")
+    parser.add_argument("--factor", type=int, default=3, help="Halving: keep the best 1/factor per round")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes fitting in parallel")
+    parser.add_argument("--no-early-stopping", action="store_true")
+    parser.add_argument("--validation-fraction", type=float, default=0.2)
+    parser.add_argument("--sparse", action="store_true", help="Sparse one-hot features (gbr only)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the data/feature caches")
+    args = parser.parse_args()
+
+    df = preprocess(load_training_data(args.data, use_cache=not args.no_cache), copy=False)
+    X_train, X_val, y_train, y_val = split(df.drop(columns=["price", "price_per_sqm"]), df["price"],
+                                           args.validation_fraction)
+    preprocessor, model, results, report = tune(
+        args.trainer, X_train, y_train, X_val, y_val, args.search, args.candidates, args.cv, args.factor,
+        args.workers, not args.no_early_stopping, None if args.no_cache else DEFAULT_CACHE_DIR, args.sparse)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    joblib.dump(preprocessor, os.path.join(args.output_dir, "preprocessor.pkl"))
+    joblib.dump(model, os.path.join(args.output_dir, "model.pkl"))
+    results.to_csv(os.path.join(args.output_dir, "results.csv"), index=False)
+    with open(os.path.join(args.output_dir, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(results.head(10).to_string())
+    print(f"Best CV MAE {report['best_cv_mae']:,.0f} with {report['best_params']}")
+    if "val_mae" in report:
+        print(f"Validation MAE {report['val_mae']:,.0f}, RMSE {report['val_rmse']:,.0f}")
+    print(f"Search: {report['fits']} fits in {report['search_seconds']:.1f} s on {args.workers} workers; "
+          f"best model saved to {args.output_dir}")
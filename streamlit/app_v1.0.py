@@ -1,14 +1,93 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import functools
+import io
+import shutil
+import tempfile
+import time
 from datetime import datetime
 import streamlit as st
 from PIL import Image
-from api.predict import predict
+from api.predict import cached_predict, registry
+from api import bulk_score
+from api.comparables import find_comparables
+from api.sensitivity import sensitivity
+from api.metrics import metrics
+from api.request_log import request_log
+
+# Streamlit reruns this whole script on every widget interaction. Everything static is
+# built once per server process with st.cache_resource, predictions are memoized by
+# cached_predict, and each form section is a fragment: interacting with one of its
+# widgets reruns that section only. Rerun times are recorded as "app.*" stages and shown
+# in the latency expander.
+rerun_stopwatch = metrics.stopwatch()
 
 # --- PAGE SETUP ---
 st.set_page_config(page_title="Immo Eliza - Belgian Property Price Predictor", page_icon="🏠", layout="wide")
 
+# --- CACHED RESOURCES (once per server process) ---
+@st.cache_resource
+def load_logo():
+    logo_path = os.path.join(os.path.dirname(__file__), "..", "src", "Immo_Eliza_Logo.png")
+    logo = Image.open(logo_path)
+    logo.load()
+    return logo
+
+@st.cache_resource
+def load_model():
+    """Load the default model version up front instead of on the first prediction."""
+    return registry.get()
+
+@st.cache_resource
+def start_request_log():
+    """Start the background writer of the request log (logs/requests.jsonl unless IMMO_ELIZA_REQUEST_LOG says otherwise)."""
+    request_log.enable()
+    return request_log
+
+@st.cache_resource
+def form_options():
+    """Choices and label mappings of the form widgets (read-only)."""
+    return {
+        "property_type_map": {"HOUSE": "House", "APARTMENT": "Apartment"},
+        "subproperty_mapping": {
+            "Apartment": ["Apartment","Duplex","Flat Studio","Ground Floor","Kot","Loft","Penthouse","Service Flat","Triplex"],
+            "House": ["Apartment Block","Bungalow","Castle","Chalet","Country Cottage","Exceptional Property","Farmhouse","House",
+                      "Manor House","Mansion","Mixed Use Building","Other Property","Town House","Villa"]
+        },
+        "region_province_map": {
+            "Flanders": ["Flemish Brabant","East Flanders","West Flanders","Antwerp","Limburg"],
+            "Brussels-Capital": ["Brussels"],
+            "Wallonia": ["Walloon Brabant","Namur","Liège","Luxembourg","Hainaut"],
+            "MISSING": ["MISSING"]
+        },
+        "state_building_map": {
+            "AS_NEW": "As New","JUST_RENOVATED": "Just Renovated","GOOD": "Good",
+            "TO_BE_DONE_UP": "To be Done Up","TO_RESTORE": "To Restore","TO_RENOVATE": "To Renovate",
+            "MISSING": "Missing"
+        },
+        "equipped_kitchen_map": {"Equipped":"INSTALLED","Partially Equipped":"SEMI_EQUIPPED","Not Equipped":"NOT_INSTALLED","Unknown":"MISSING"},
+        "heating_type_list": ["Solar", "Electric", "Gas", "Pellet", "FuelOil", "Wood", "Carbon", "MISSING"],
+        "epc_ratings": ["A+","A","B","C","D","E","F","G","Unknown"],
+        "epc_to_energy": {"A+":50,"A":75,"B":100,"C":150,"D":200,"E":250,"F":300,"G":400,"Unknown":150},
+    }
+
+def timed_fragment(stage: str):
+    """st.fragment that records its run time under stage."""
+    def decorate(func):
+        @st.fragment
+        @functools.wraps(func)
+        def run():
+            stopwatch = metrics.stopwatch()
+            func()
+            stopwatch.total(stage)
+        return run
+    return decorate
+
+options = form_options()
+load_model()
+start_request_log()
+
 # --- GLOBAL STYLES ---
 st.markdown("""
 <style>
@@ -32,14 +111,10 @@ input[type="number"], select, input[type="text"] {
 }
 """, unsafe_allow_html=True)
 
-# --- LOAD LOGO ---
-logo_path = os.path.join(os.path.dirname(__file__), "..", "src", "Immo_Eliza_Logo.png")
-logo = Image.open(logo_path)
-
 # --- TITLE WITH LOGO ---
 col1, col2 = st.columns([1, 5])
 with col1:
-    st.image(logo, width=190)
+    st.image(load_logo(), width=190)
 with col2:
     st.markdown("""
         <div style='margin-top:-25px;'>
@@ -53,141 +128,288 @@ with col2:
 # --- CALCULATE CURRENT YEAR ---
 current_year = datetime.now().year
 
-# --- PROPERTY DETAILS ---
-st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>🏷️ Details</h3>", unsafe_allow_html=True)
+# Widget values live in st.session_state under these keys, so the prediction fragment
+# can read them without rerunning the other sections
 
-with st.container():
-    st.markdown('<div>', unsafe_allow_html=True)
+# --- PROPERTY DETAILS ---
+@timed_fragment("app.fragment.details")
+def details_section():
+    st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>🏷️ Details</h3>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
 
-    property_type_map = {"HOUSE": "House", "APARTMENT": "Apartment"}
-    subproperty_mapping = {
-        "Apartment": ["Apartment","Duplex","Flat Studio","Ground Floor","Kot","Loft","Penthouse","Service Flat","Triplex"],
-        "House": ["Apartment Block","Bungalow","Castle","Chalet","Country Cottage","Exceptional Property","Farmhouse","House",
-                  "Manor House","Mansion","Mixed Use Building","Other Property","Town House","Villa"]
-    }
-    region_province_map = {
-        "Flanders": ["Flemish Brabant","East Flanders","West Flanders","Antwerp","Limburg"],
-        "Brussels-Capital": ["Brussels"],
-        "Wallonia": ["Walloon Brabant","Namur","Liège","Luxembourg","Hainaut"],
-        "MISSING": ["MISSING"]
-    }
-    state_building_map = {
-        "AS_NEW": "As New","JUST_RENOVATED": "Just Renovated","GOOD": "Good",
-        "TO_BE_DONE_UP": "To be Done Up","TO_RESTORE": "To Restore","TO_RENOVATE": "To Renovate",
-        "MISSING": "Missing"
-    }
-
     with col1:
-        property_type = st.selectbox("Property Type *", list(property_type_map.values()))
-        subproperty_choices = subproperty_mapping.get(property_type, ["Other"])
-        subproperty_type = st.selectbox("Subproperty Type *", sorted(subproperty_choices))
-        region = st.selectbox("Region *", sorted(region_province_map.keys()))
-        province_choices = region_province_map.get(region, ["MISSING"])
-        province = st.selectbox("Province *", sorted(province_choices))
+        property_type = st.selectbox("Property Type *", list(options["property_type_map"].values()), key="property_type")
+        subproperty_choices = options["subproperty_mapping"].get(property_type, ["Other"])
+        st.selectbox("Subproperty Type *", sorted(subproperty_choices), key="subproperty_type")
+        region = st.selectbox("Region *", sorted(options["region_province_map"].keys()), key="region")
+        province_choices = options["region_province_map"].get(region, ["MISSING"])
+        st.selectbox("Province *", sorted(province_choices), key="province")
 
     with col2:
-        zip_code = st.text_input("ZIP Code")
-        state_building = st.selectbox("State of Building *", list(state_building_map.values()))
-        nbr_bedrooms = st.number_input("Number of Bedrooms *", min_value=0, max_value=20, value=2)
-        nbr_frontages = st.number_input("Number of Frontages *", min_value=1, max_value=18, value=2)
+        st.text_input("ZIP Code", key="zip_code")
+        st.selectbox("State of Building *", list(options["state_building_map"].values()), key="state_building")
+        st.number_input("Number of Bedrooms *", min_value=0, max_value=20, value=2, key="nbr_bedrooms")
+        st.number_input("Number of Frontages *", min_value=1, max_value=18, value=2, key="nbr_frontages")
 
     with col3:
-        total_area_sqm = st.number_input("Internal Area (sqm) *", min_value=8, max_value=100000, value=180)
-        surface_land_sqm = st.number_input("Land Area (sqm) *", min_value=0, max_value=1000000, value=200)
-        construction_year = st.number_input("Construction Year *", min_value=1750, max_value=current_year, value=2000)
-        epc_rating = st.selectbox("EPC Rating", ["A+","A","B","C","D","E","F","G","Unknown"], index=8)
-
-    st.markdown("</div>", unsafe_allow_html=True)
+        st.number_input("Internal Area (sqm) *", min_value=8, max_value=100000, value=180, key="total_area_sqm")
+        st.number_input("Land Area (sqm) *", min_value=0, max_value=1000000, value=200, key="surface_land_sqm")
+        st.number_input("Construction Year *", min_value=1750, max_value=current_year, value=2000, key="construction_year")
+        st.selectbox("EPC Rating", options["epc_ratings"], index=8, key="epc_rating")
 
 # --- AMENITIES ---
-st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>✨ Amenities</h3>", unsafe_allow_html=True)
-
-with st.container():
-    st.markdown('<div>', unsafe_allow_html=True)
+@timed_fragment("app.fragment.amenities")
+def amenities_section():
+    st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>✨ Amenities</h3>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        fl_double_glazing = st.checkbox("🪟 Double Glazing")
-        fl_open_fire = st.checkbox("🔥 Open Fire")
+        st.checkbox("🪟 Double Glazing", key="fl_double_glazing")
+        st.checkbox("🔥 Open Fire", key="fl_open_fire")
 
     with col2:
-        fl_swimming_pool = st.checkbox("🏊 Swimming Pool")
-        fl_furnished = st.checkbox("🏠 Furnished")
+        st.checkbox("🏊 Swimming Pool", key="fl_swimming_pool")
+        st.checkbox("🏠 Furnished", key="fl_furnished")
 
     with col3:
-        equipped_kitchen_map = {"Equipped":"EQUIPPED","Partially Equipped":"PARTIALLY_EQUIPPED","Not Equipped":"NOT_EQUIPPED","Unknown":"UNKNOWN"}
-        equipped_kitchen = st.selectbox("👩🏼‍🍳 Equipped Kitchen", list(equipped_kitchen_map.keys()))
-
-    st.markdown("</div>", unsafe_allow_html=True)
+        st.selectbox("👩🏼‍🍳 Equipped Kitchen", list(options["equipped_kitchen_map"].keys()), key="equipped_kitchen")
 
 # --- CHARACTERISTICS ---
-st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>📐 Site Characteristics</h3>", unsafe_allow_html=True)
-
-with st.container():
-    st.markdown('<div>', unsafe_allow_html=True)
+@timed_fragment("app.fragment.site")
+def site_section():
+    st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>📐 Site Characteristics</h3>", unsafe_allow_html=True)
     col1, col2 = st.columns(2)
 
     with col1:
-        fl_terrace = st.checkbox("🌿 Terrace")
-        terrace_sqm = st.number_input("Terrace Area (sqm, approx.)", min_value=0, max_value=4000, value=8) if fl_terrace else 0
-        fl_garden = st.checkbox("🌳 Garden")
-        garden_sqm = st.number_input("Garden Area (sqm, approx.)", min_value=0, max_value=200000, value=50) if fl_garden else 0
+        if st.checkbox("🌿 Terrace", key="fl_terrace"):
+            st.number_input("Terrace Area (sqm, approx.)", min_value=0, max_value=4000, value=8, key="terrace_sqm")
+        if st.checkbox("🌳 Garden", key="fl_garden"):
+            st.number_input("Garden Area (sqm, approx.)", min_value=0, max_value=200000, value=50, key="garden_sqm")
 
     with col2:
-        fl_floodzone = st.checkbox("🌊 Flood Zone")
-        heating_type_list = ["Solar", "Electric", "Gas", "Pellet", "FuelOil", "Wood", "Carbon", "MISSING"]
-        heating_type = st.selectbox("🌡️ Heating Type", heating_type_list)
+        st.checkbox("🌊 Flood Zone", key="fl_floodzone")
+        st.selectbox("🌡️ Heating Type", options["heating_type_list"], key="heating_type")
 
-    st.markdown("</div>", unsafe_allow_html=True)
+def collect_input() -> dict:
+    """The model input from the widget values in st.session_state."""
+    state = st.session_state
+    # The selectboxes show labels; the model and the comparables index use the category codes
+    # of the training data ("Town House" -> "TOWN_HOUSE", "FuelOil" -> "FUELOIL")
+    property_type_codes = {label: code for code, label in options["property_type_map"].items()}
+    state_building_codes = {label: code for code, label in options["state_building_map"].items()}
+    return {
+        "property_type": property_type_codes[state.property_type],
+        "subproperty_type": state.subproperty_type.upper().replace(" ", "_"),
+        "region": state.region,
+        "province": state.province,
+        # The model field; "Unknown" isn't a rating and maps to MISSING like an absent one
+        "epc": state.epc_rating,
+        "construction_year": state.construction_year,
+        "total_area_sqm": state.total_area_sqm,
+        "nbr_bedrooms": state.nbr_bedrooms,
+        "terrace_sqm": state.get("terrace_sqm", 8) if state.fl_terrace else 0,
+        "garden_sqm": state.get("garden_sqm", 50) if state.fl_garden else 0,
+        "surface_land_sqm": state.surface_land_sqm,
+        "nbr_frontages": state.nbr_frontages,
+        "fl_furnished": state.fl_furnished,
+        "fl_open_fire": state.fl_open_fire,
+        "fl_terrace": state.fl_terrace,
+        "fl_garden": state.fl_garden,
+        "fl_swimming_pool": state.fl_swimming_pool,
+        "fl_double_glazing": state.fl_double_glazing,
+        "equipped_kitchen": options["equipped_kitchen_map"].get(state.equipped_kitchen, "MISSING"),
+        "state_building": state_building_codes[state.state_building],
+        "heating_type": state.heating_type.upper(),
+        "fl_floodzone": state.fl_floodzone,
+        "zip_code": state.zip_code,
+        "primary_energy_consumption_sqm": options["epc_to_energy"].get(state.epc_rating, 150),
+    }
 
 # --- PREDICTION BUTTON & PRICE ---
-col_btn, col_price = st.columns([1,2])
-with col_btn:
-    predict_btn = st.button("Predict Price")
-with col_price:
-    price_placeholder = st.empty()
-
-# --- COLLECT INPUTS & PREDICTION ---
-equipped_kitchen_label = equipped_kitchen_map.get(equipped_kitchen, "UNKNOWN")
-input_data = {
-    "property_type": property_type,
-    "subproperty_type": subproperty_type,
-    "region": region,
-    "province": province,
-    "epc_rating": epc_rating,
-    "construction_year": construction_year,
-    "total_area_sqm": total_area_sqm,
-    "nbr_bedrooms": nbr_bedrooms,
-    "terrace_sqm": terrace_sqm,
-    "garden_sqm": garden_sqm,
-    "surface_land_sqm": surface_land_sqm,
-    "nbr_frontages": nbr_frontages,
-    "fl_furnished": fl_furnished,
-    "fl_open_fire": fl_open_fire,
-    "fl_terrace": fl_terrace,
-    "fl_garden": fl_garden,
-    "fl_swimming_pool": fl_swimming_pool,
-    "fl_double_glazing": fl_double_glazing,
-    "equipped_kitchen": equipped_kitchen_label,
-    "state_building": state_building,
-    "heating_type": heating_type,
-    "fl_floodzone": fl_floodzone,
-    "zip_code": zip_code,
+@timed_fragment("app.fragment.prediction")
+def prediction_section():
+    state = st.session_state
+    col_btn, col_price = st.columns([1,2])
+    with col_btn:
+        predict_btn = st.button("Predict Price")
+    with col_price:
+        price_placeholder = st.empty()
+
+    if predict_btn:
+        input_data = collect_input()
+        start = time.perf_counter()
+        try:
+            predicted_price = cached_predict(input_data)
+            # Every submission is logged, including the ones answered from the cache
+            request_log.log("streamlit", input_data, prediction=predicted_price, seconds=time.perf_counter() - start)
+            state.prediction = {"input": input_data, "price": predicted_price}
+        except Exception as e:
+            request_log.log("streamlit", input_data, error=e, seconds=time.perf_counter() - start)
+            state.prediction = {"input": input_data, "error": e}
+
+    # The last prediction stays on screen when this section reruns for its own widgets
+    prediction = state.get("prediction")
+    if prediction is not None:
+        if "error" in prediction:
+            price_placeholder.error(f"Prediction failed: {prediction['error']}")
+        else:
+            price_placeholder.markdown(f"""
+                <div style="padding:15px;border-radius:1px">
+                    <h3>💶 Estimated Property Price: €{prediction['price']:,.2f}</h3>
+                </div>
+            """, unsafe_allow_html=True)
+
+        # --- COMPARABLE PROPERTIES ---
+        with st.expander("🏘️ Comparable sold properties", expanded=True):
+            try:
+                comparables = find_comparables(prediction["input"], k=5)
+            except FileNotFoundError:
+                st.caption("No comparables index available; retrain with src/setup_model.py.")
+            else:
+                st.dataframe([{
+                    "Price (€)": c["price"], "Type": c["subproperty_type"], "Province": c["province"],
+                    "Area (sqm)": c["total_area_sqm"], "Bedrooms": c["nbr_bedrooms"],
+                    "Built": c["construction_year"], "EPC": c["epc"], "Similarity distance": round(c["distance"], 2),
+                } for c in comparables], hide_index=True)
+
+    # --- LATENCY PER STAGE ---
+    # app.rerun is a full-page rerun, app.fragment.* a rerun of one section
+    with st.expander("⏱️ Prediction latency"):
+        latency = metrics.snapshot()
+        if latency:
+            st.table([{"stage": stage, **summary} for stage, summary in latency.items()])
+        else:
+            st.caption("No predictions timed yet.")
+
+    if prediction is not None and "error" not in prediction:
+        sensitivity_section(prediction["input"])
+
+# --- WHAT-IF SENSITIVITY ---
+# Swept features by label; a curve has SWEEP_POINTS points, a surface SURFACE_POINTS per axis.
+# The whole grid is scored in one vectorized call. The chart is part of the prediction section
+# and sweeps the property that was just predicted, so it is redrawn on every Predict and always
+# matches the price shown above it.
+SWEEP_FEATURES = {
+    "Internal Area (sqm)": "total_area_sqm",
+    "Construction Year": "construction_year",
+    "EPC Rating": "epc",
+    "Number of Bedrooms": "nbr_bedrooms",
+    "Land Area (sqm)": "surface_land_sqm",
 }
+SWEEP_POINTS = 200
+SURFACE_POINTS = 30
+
+def sensitivity_chart(result: dict, labels: list):
+    """Altair line chart of a one-feature sweep, heatmap of a two-feature sweep."""
+    import altair as alt
+
+    def encoding(i, channel):
+        if result["features"][i] == "epc":
+            # Ratings are categories, shown best to worst
+            return channel(f"f{i}:O", title=labels[i], sort=result["values"][i])
+        if len(labels) == 2:
+            # One rect per grid cell
+            return channel(f"f{i}:O", title=labels[i], sort="ascending" if i == 0 else "descending",
+                           axis=alt.Axis(labelOverlap=True))
+        return channel(f"f{i}:Q", title=labels[i], scale=alt.Scale(zero=False))
+
+    def tooltip(i):
+        return alt.Tooltip(f"f{i}:{'N' if result['features'][i] == 'epc' else 'Q'}", title=labels[i])
+
+    price = alt.Tooltip("price:Q", title="Price (€)", format=",.0f")
+    if len(labels) == 1:
+        data = [{"f0": v, "price": p} for v, p in zip(result["values"][0], result["predictions"])]
+        return alt.Chart(alt.Data(values=data)).mark_line(point=len(data) <= 20).encode(
+            encoding(0, alt.X), alt.Y("price:Q", title="Price (€)", scale=alt.Scale(zero=False)),
+            tooltip=[tooltip(0), price]).interactive()
+    data = [{"f0": v0, "f1": v1, "price": p}
+            for v0, row in zip(result["values"][0], result["predictions"])
+            for v1, p in zip(result["values"][1], row)]
+    return alt.Chart(alt.Data(values=data)).mark_rect().encode(
+        encoding(0, alt.X), encoding(1, alt.Y),
+        alt.Color("price:Q", title="Price (€)", scale=alt.Scale(scheme="viridis")),
+        tooltip=[tooltip(0), tooltip(1), price])
 
-if predict_btn:
-    epc_to_energy = {"A+":50,"A":75,"B":100,"C":150,"D":200,"E":250,"F":300,"G":400,"Unknown":150}
-    input_data["primary_energy_consumption_sqm"] = epc_to_energy.get(epc_rating, 150)
-    try:
-        predicted_price = predict(input_data)
-        price_placeholder.markdown(f"""
-            <div style="padding:15px;border-radius:1px">
-                <h3>💶 Estimated Property Price: €{predicted_price:,.2f}</h3>
-            </div>
-        """, unsafe_allow_html=True)
-    except Exception as e:
-        price_placeholder.error(f"Prediction failed: {e}")
+def sensitivity_section(base: dict):
+    """What-if chart around base, the input of the prediction shown above it (timed as sensitivity.*)."""
+    with st.expander("📈 What-if: how the price responds to one or two features"):
+        labels = st.multiselect("Features to vary", list(SWEEP_FEATURES), default=["Internal Area (sqm)"],
+                                max_selections=2, key="sweep_features")
+        if not labels:
+            st.caption("Pick a feature to see the estimated price across its range.")
+            return
+        features = [SWEEP_FEATURES[label] for label in labels]
+        try:
+            result = sensitivity(base, features, points=SWEEP_POINTS if len(features) == 1 else SURFACE_POINTS)
+        except ValueError as e:
+            st.info(f"Can't vary these features for this property: {e}")
+            return
+        st.altair_chart(sensitivity_chart(result, labels), width="stretch")
+        st.caption(f"Estimated price of the predicted property: €{result['base']:,.0f}; "
+                   "all other features stay as they were when you clicked Predict Price.")
+
+# --- BULK SCORING ---
+# Rows per vectorized predict_batch call; small enough to keep memory flat and to let
+# other sessions' threads run between chunks
+BULK_CHUNK_SIZE = 5_000
+
+def score_upload(uploaded) -> dict:
+    """
+    Stream an uploaded file through the bulk scorer into a CSV of predictions, with a progress bar.
+    The files live in a temporary directory that is removed before returning: the result keeps
+    the CSV bytes, which st.download_button holds in memory anyway.
+    """
+    stem, ext = os.path.splitext(uploaded.name)
+    with tempfile.TemporaryDirectory(prefix="immo-eliza-bulk-") as workdir:
+        input_path = os.path.join(workdir, "input" + ext.lower())
+        output_path = os.path.join(workdir, "predictions.csv")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(uploaded, f, 1 << 20)
+
+        total = bulk_score.count_rows(input_path)
+        bar = st.progress(0.0, text="Scoring…")
+
+        def progress(rows, errors):
+            fraction = min(rows / total, 1.0) if total else 0.0
+            bar.progress(fraction, text=f"{rows:,} of {total:,} properties scored" if total else f"{rows:,} properties scored")
+
+        try:
+            summary = bulk_score.run(input_path, output_path, chunk_size=BULK_CHUNK_SIZE, log=io.StringIO(),
+                                     progress=progress)
+        finally:
+            bar.empty()
+        with open(output_path, "rb") as f:
+            data = f.read()
+    return {"data": data, "file_name": f"{stem}_predictions.csv", "summary": summary}
+
+@timed_fragment("app.fragment.bulk")
+def bulk_section():
+    st.markdown("<h3 style='font-size:20px; margin-bottom:1px;'>📂 Score a file of properties</h3>", unsafe_allow_html=True)
+    st.caption("CSV, Excel (.xlsx), Parquet or JSONL with one property per row and the model fields as "
+               "columns (property_type, region, total_area_sqm, ...). An optional id column is copied to the results.")
+    uploaded = st.file_uploader("Properties file", type=["csv", "xlsx", "parquet", "jsonl"], key="bulk_file")
+    if uploaded is not None and st.button("Score File", key="bulk_score"):
+        try:
+            st.session_state.bulk_result = score_upload(uploaded)
+        except Exception as e:
+            st.session_state.pop("bulk_result", None)
+            st.error(f"Scoring failed: {e}")
+
+    result = st.session_state.get("bulk_result")
+    if result is not None:
+        summary = result["summary"]
+        st.success(f"{summary['rows']:,} properties scored in {summary['seconds']:.1f} s "
+                   f"({summary['rows_per_second']:,.0f} rows/s), {summary['errors']:,} with errors")
+        st.download_button("Download Predictions (CSV)", result["data"], file_name=result["file_name"], mime="text/csv")
+
+tab_single, tab_bulk = st.tabs(["🏠 Single property", "📂 Bulk upload"])
+with tab_single:
+    details_section()
+    amenities_section()
+    site_section()
+    prediction_section()
+with tab_bulk:
+    bulk_section()
 
 st.markdown("""
     <div style="text-align: center; font-size: 12px;">
@@ -201,4 +423,6 @@ st.markdown("""
     <p style="text-align:center; color:#666; font-size:12px;">
         © 2025 Immo Eliza — All rights reserved
     </p>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+rerun_stopwatch.total("app.rerun")